@@ -1,25 +1,69 @@
 import asyncio
-import uuid
-from datetime import datetime, timedelta
-import os
-from typing import List, Dict, Optional, Set
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional, Set, Tuple
 
 import aiohttp
 from loguru import logger
 
 from web.config import Configs
 from web.schemas import (
-    CutRequest, 
     PlaceCut, 
-    S3ObjectRequest, 
     DetectionResponse,
-    ViolationCreate
+    ViolationCreate,
+    ZoneSnapshots,
+    CameraSnapshotData
 )
 from application.services.interfaces.i_parking_zone_service import IParkingZoneService
 from application.services.interfaces.i_violation_service import IViolationService
 from application.services.interfaces.i_booking_service import IBookingService
 from application.services.interfaces.i_camera_service import ICameraService
-from infrastructure.utils.rabbitmq_utils import rabbitmq_client
+from application.services.interfaces.i_camera_parking_place_service import ICameraParkingPlaceService
+from infrastructure.utils.cutter import place_cutter
+from infrastructure.utils.geometry_cache import PlaceGeometry
+from infrastructure.utils.metrics import LatencyStats
+from infrastructure.utils.place_fingerprint import Box, compute_fingerprints, place_fingerprints
+
+
+@dataclass
+class CycleStats:
+    """Статистика одного цикла проверки нарушений"""
+    zones_total: int = 0
+    zones_timed_out: int = 0
+    places_processed: int = 0
+    places_failed: int = 0
+    places_skipped: int = 0
+    places_unchanged: int = 0
+    snapshots_failed: int = 0
+    snapshots_stale: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    place_latency: LatencyStats = field(default_factory=LatencyStats)
+
+    def record_place(self, seconds: float, processed: bool) -> None:
+        self.place_latency.observe(seconds)
+        if processed:
+            self.places_processed += 1
+        else:
+            self.places_failed += 1
+
+    def summary(self) -> Dict:
+        duration = time.monotonic() - self.started_at
+        places_total = self.places_processed + self.places_failed
+        return {
+            "zones_total": self.zones_total,
+            "zones_timed_out": self.zones_timed_out,
+            "places_processed": self.places_processed,
+            "places_failed": self.places_failed,
+            "places_skipped": self.places_skipped,
+            "places_unchanged": self.places_unchanged,
+            "snapshots_failed": self.snapshots_failed,
+            "snapshots_stale": self.snapshots_stale,
+            "duration_s": round(duration, 2),
+            "places_per_second": round(places_total / duration, 2) if duration > 0 else 0.0,
+            "place_latency": self.place_latency.snapshot(),
+        }
+
 
 class ViolationDetectionService:
     def __init__(self, 
@@ -27,16 +71,24 @@ class ViolationDetectionService:
                  violation_service: IViolationService,
                  booking_service: IBookingService,
                  camera_service: ICameraService,
+                 camera_parking_place_service: ICameraParkingPlaceService,
                  settings: Configs,
                  check_interval_minutes: int = 15):
         self.parking_zone_service = parking_zone_service
         self.violation_service = violation_service
         self.booking_service = booking_service
         self.camera_service = camera_service
+        self.camera_parking_place_service = camera_parking_place_service
         self.settings = settings
         self.check_interval_minutes = check_interval_minutes
         self.is_running = False
         self.task = None
+        # Ограничители параллелизма: зоны, места, вызовы Cutter и Director
+        self._zone_semaphore = asyncio.Semaphore(settings.DETECTION_ZONE_CONCURRENCY)
+        self._place_semaphore = asyncio.Semaphore(settings.DETECTION_PLACE_CONCURRENCY)
+        self._cutter_semaphore = asyncio.Semaphore(settings.DETECTION_CUTTER_CONCURRENCY)
+        self._director_semaphore = asyncio.Semaphore(settings.DETECTION_DIRECTOR_CONCURRENCY)
+        self.last_cycle_summary: Optional[Dict] = None
 
     async def start(self):
         """Запуск фонового сервиса"""
@@ -85,18 +137,34 @@ class ViolationDetectionService:
         # Получаем текущее время для фильтрации активных бронирований
         current_time = datetime.now()
         
-        # Получаем все активные бронирования на текущий момент
-        active_bookings = await self.booking_service.get_active_bookings(current_time)
-        
-        # Создаем сет забронированных мест для быстрой проверки
-        booked_place_ids = {booking.parking_place_id for booking in active_bookings}
+        # Получаем сет забронированных на текущий момент мест для быстрой проверки
+        booked_place_ids = await self.booking_service.get_booked_place_ids(current_time)
         logger.info(f"Found {len(booked_place_ids)} currently booked places")
         
-        for zone in zones:
+        # Зоны проверяются параллельно, но не более DETECTION_ZONE_CONCURRENCY одновременно
+        stats = CycleStats(zones_total=len(zones))
+        async with asyncio.TaskGroup() as task_group:
+            for zone in zones:
+                task_group.create_task(self._check_zone_with_deadline(zone, booked_place_ids, stats))
+
+        self.last_cycle_summary = stats.summary()
+        logger.info(f"Violation detection cycle summary: {self.last_cycle_summary}")
+
+    async def _check_zone_with_deadline(self, zone, booked_place_ids: set, stats: "CycleStats"):
+        """Проверка зоны с ограничением параллелизма и времени выполнения"""
+        async with self._zone_semaphore:
             logger.info(f"Checking zone {zone.zone_name} (ID: {zone.id})")
-            await self._check_zone(zone.id, booked_place_ids)
+            try:
+                await asyncio.wait_for(
+                    self._check_zone(zone.id, booked_place_ids, stats),
+                    timeout=self.settings.DETECTION_ZONE_TIMEOUT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                stats.zones_timed_out += 1
+                logger.error(f"Zone {zone.id} check exceeded deadline of "
+                             f"{self.settings.DETECTION_ZONE_TIMEOUT_SECONDS} s and was cancelled")
 
-    async def _check_zone(self, zone_id: int, booked_place_ids: set):
+    async def _check_zone(self, zone_id: int, booked_place_ids: set, stats: "CycleStats"):
         """Проверка одной зоны на нарушения"""
         try:
             # Получаем информацию о зоне
@@ -119,34 +187,54 @@ class ViolationDetectionService:
                               if place_tuple[0].id not in booked_place_ids]
             logger.info(f"Checking {len(places_to_check)} non-booked places in zone {zone.zone_name}")
             
-            # Получаем изображения с камер зоны для анализа
+            # Получаем снимки камер зоны; устаревшие снимки не проверяются
             try:
-                # Получаем снимки с всех камер зоны
-                snapshots = await self.camera_service.get_zone_snapshots(zone_id)
-                if not snapshots:
-                    logger.warning(f"No camera snapshots available for zone {zone_id}, skipping")
-                    return
-                    
-                # Для простоты используем первый снимок с первой камеры
-                # В реальном приложении можно будет обрабатывать все снимки
-                # или выбирать снимок с конкретной камеры для каждого места
-                first_camera_id = next(iter(snapshots.keys()))
-                image_data = snapshots[first_camera_id]
-                
-                # Сохраняем изображение в MinIO и получаем URL
-                # Для простоты используем фиксированный URL
-                # В реальном приложении здесь будет загрузка изображения в S3/MinIO
-                image_url = f"images/test_{zone_id}.jpg"
-                logger.info(f"Got camera snapshot for zone {zone_id}, camera {first_camera_id}")
+                zone_snapshots = await self.camera_service.get_zone_snapshots(zone_id)
             except Exception as e:
                 logger.error(f"Error getting camera snapshots for zone {zone_id}: {e}")
-                # Используем запасной вариант с тестовым изображением
-                image_url = f"images/test_{zone_id}.jpg"
+                return
+            snapshots = self._fresh_snapshots(zone_snapshots, stats)
+            if not snapshots:
+                logger.warning(f"No fresh camera snapshots available for zone {zone_id}, skipping")
+                return
+            logger.info(f"Got {len(snapshots)} fresh camera snapshots for zone {zone_id}")
+
+            # Группируем места по камерам: один запрос на нарезку покрывает все места,
+            # которые видит камера (не более DETECTION_CUT_BATCH_SIZE мест в запросе)
+            places_by_camera: Dict[int, List] = {}
+            for place, place_data in places_to_check:
+                if place_data.get("camera_id") is None:
+                    logger.error(f"Place {place.id} is not bound to any camera, skipping")
+                    continue
+                places_by_camera.setdefault(place_data["camera_id"], []).append(place)
 
-            # Проверяем каждое незабронированное место
-            for place_tuple in places_to_check:
-                # Отправляем запрос на вырезание изображения места в Cutter сервис
-                await self._process_place(zone, place_tuple, image_url)
+            batch_size = max(1, self.settings.DETECTION_CUT_BATCH_SIZE)
+            async with asyncio.TaskGroup() as task_group:
+                for camera_id, places in places_by_camera.items():
+                    if camera_id not in snapshots:
+                        # Снимка камеры нет или он устарел - ее места пропускаются в этом цикле
+                        stats.places_skipped += len(places)
+                        logger.warning(f"Skipping {len(places)} places of camera {camera_id} in zone {zone_id}: "
+                                       f"no fresh snapshot")
+                        continue
+                    snapshot = snapshots[camera_id]
+
+                    # Полигоны мест камеры разбираются один раз и берутся из geometry_cache
+                    camera_places = await self._camera_places(camera_id, places)
+
+                    # Места, область которых не изменилась с последней классификации, не отправляются
+                    # в Cutter и Director
+                    fingerprints: Dict[int, Tuple[Box, int]] = {}
+                    if self.settings.DETECTION_FINGERPRINT_ENABLED:
+                        camera_places, fingerprints = await self._skip_unchanged(camera_places, snapshot, stats)
+
+                    for i in range(0, len(camera_places), batch_size):
+                        batch = camera_places[i:i + batch_size]
+                        task_group.create_task(
+                            self._process_batch(
+                                zone, camera_id, batch, snapshot.object_name, stats, fingerprints, snapshot.image
+                            )
+                        )
                 
             # Обновляем время последней проверки зоны
             update_success = await self.parking_zone_service.update_zone_check_time(zone_id)
@@ -157,113 +245,143 @@ class ViolationDetectionService:
                 
         except Exception as e:
             logger.error(f"Error checking zone {zone_id}: {e}")
-    
-    async def _process_place(self, zone, place_tuple, image_url: str):
-        """Обработка одного парковочного места"""
-        try:
-            # Распаковываем кортеж (место, {"location": координаты})
-            place, place_data = place_tuple
-            location = place_data.get("location")
-            
-            logger.info(f"Processing place {place.id} in zone {zone.zone_name} (ID: {zone.id})")
 
-            # Проверяем, есть ли координаты для места
-            if not location:
+    def _fresh_snapshots(self, zone_snapshots: ZoneSnapshots, stats: "CycleStats") -> Dict[int, CameraSnapshotData]:
+        """Снимки зоны по ID камеры без устаревших (старше DETECTION_SNAPSHOT_MAX_AGE_SECONDS)"""
+        stats.snapshots_failed += len(zone_snapshots.failed_camera_ids)
+        if zone_snapshots.failed_camera_ids:
+            logger.warning(f"Failed to get snapshots of cameras {zone_snapshots.failed_camera_ids} "
+                           f"in zone {zone_snapshots.zone_id}")
+
+        max_age = self.settings.DETECTION_SNAPSHOT_MAX_AGE_SECONDS
+        now = datetime.now(timezone.utc)
+        fresh = {}
+        for snapshot in zone_snapshots.snapshots:
+            # Время съемки неизвестно - снимок считается актуальным
+            if max_age > 0 and snapshot.captured_at is not None:
+                captured_at = snapshot.captured_at
+                if captured_at.tzinfo is None:
+                    captured_at = captured_at.replace(tzinfo=timezone.utc)
+                age = (now - captured_at).total_seconds()
+                if age > max_age:
+                    stats.snapshots_stale += 1
+                    logger.warning(f"Snapshot of camera {snapshot.camera_id} is stale "
+                                   f"({age:.0f} s old, etag {snapshot.etag}), skipping")
+                    continue
+            fresh[snapshot.camera_id] = snapshot
+        return fresh
+
+    async def _camera_places(self, camera_id: int, places: List) -> List[Tuple[object, PlaceGeometry]]:
+        """Места камеры вместе с их полигонами из geometry_cache; места без полигона пропускаются"""
+        geometry = await self.camera_parking_place_service.get_camera_geometry(camera_id)
+        camera_places = []
+        for place in places:
+            place_geometry = geometry.place(place.id)
+            if place_geometry is None:
                 logger.error(f"Place {place.id} has no location coordinates, skipping")
-                return
-            
-            # Формируем уникальный идентификатор запроса
-            request_id = str(uuid.uuid4())
-            
-            # Создаем временную очередь для ответа (как в ZoneService.process_zone_image)
-            response_queue, future = await rabbitmq_client.create_response_queue()
-            
-            # Формируем запрос на вырезание изображения в соответствии со схемой
-            # Создаем данные запроса
-            cut_data = {
-                "image_url": image_url,
-                "places": [
-                    {
-                        "place_id": place.id,
-                        "location": location
-                    }
-                ]
-            }
-            
-            # Оборачиваем в структуру с ключом "data", как ожидает Cutter сервис
-            cut_request = {
-                "request_id": request_id,
-                "data": cut_data
-            }
-            
-            # Отправляем запрос в Cutter сервис через RabbitMQ
-            # Используем очередь "cut_queue" вместо DRAW_QUEUE и указываем reply_to
-            await rabbitmq_client.publish_message(
-                "cut_queue",
-                cut_request,
-                reply_to=response_queue
+                continue
+            camera_places.append((place, place_geometry))
+        return camera_places
+
+    async def _skip_unchanged(self, places: List, snapshot: CameraSnapshotData, stats: "CycleStats"):
+        """Отпечатки областей мест на снимке и места, которые нужно проверить заново.
+
+        places - пары (место, полигон места). Возвращает (места для проверки,
+        {place_id: (область, отпечаток)}). Если снимок не удалось разобрать, проверяются все места.
+        """
+        boxes = {}
+        for place, place_geometry in places:
+            box = place_geometry.crop_box
+            if box[2] > box[0] and box[3] > box[1]:
+                boxes[place.id] = box
+        try:
+            hashes = await asyncio.to_thread(
+                compute_fingerprints, snapshot.image, boxes, self.settings.DETECTION_FINGERPRINT_HASH_SIZE
             )
-            logger.info(f"Sent cut request for place {place.id} to Cutter service, request_id: {request_id}")
-            
-            try:
-                # Ожидаем ответ с таймаутом
-                result = await asyncio.wait_for(future, timeout=30)
-                if not result:
-                    logger.error(f"Empty response from Cutter service for place {place.id}")
-                    return
-            except asyncio.TimeoutError:
-                logger.error(f"Timeout waiting for Cutter service response for place {place.id}")
-                return
-            finally:
-                # Очищаем временную очередь
-                try:
-                    await rabbitmq_client.cleanup_response_queue(response_queue)
-                except Exception as e:
-                    logger.error(f"Failed to cleanup response queue: {e}")
-            
-            # Получаем информацию о вырезанном изображении
-            # Обрабатываем ответ в зависимости от формата ответа
-            image_url = None
-            try:
-                if isinstance(result, dict):
-                    # Прямой ответ с URL изображения
-                    if "place_images" in result:
-                        # Формат ответа из process_zone_image
-                        place_images = result.get("place_images", [])
-                        logger.debug(f"Ответ от Cutter сервиса: {result}")
-                        for img_data in place_images:
-                            if img_data.get("place_id") == place.id:
-                                image_url = img_data.get("image_url")
-                                logger.info(f"Найден URL изображения для места {place.id}: {image_url}")
-                                break
-                    else:
-                        # Прямой ответ с URL изображения
-                        image_url = result.get("image_url")
-                elif isinstance(result, list) and len(result) > 0:
-                    # Список ответов, берем первый
-                    item = result[0]
-                    if isinstance(item, dict):
-                        image_url = item.get("image_url")
-            except Exception as e:
-                logger.error(f"Error parsing Cutter service response for place {place.id}: {e}")
-                return
-                    
-            if not image_url:
-                logger.error(f"No image URL in Cutter service response for place {place.id}")
-                return
-                
+        except Exception as e:
+            logger.warning(f"Failed to fingerprint snapshot of camera {snapshot.camera_id}: {e}")
+            return places, {}
+
+        fingerprints = {place_id: (boxes[place_id], value) for place_id, value in hashes.items()}
+        changed = []
+        for place_tuple in places:
+            fingerprint = fingerprints.get(place_tuple[0].id)
+            if fingerprint is not None and place_fingerprints.is_unchanged(place_tuple[0].id, *fingerprint):
+                stats.places_unchanged += 1
+                continue
+            changed.append(place_tuple)
+        if len(changed) < len(places):
+            logger.info(f"Skipping {len(places) - len(changed)} unchanged places of camera {snapshot.camera_id}")
+        return changed, fingerprints
+
+    async def _process_batch(self, zone, camera_id: Optional[int], batch: List, image_url: str, stats: "CycleStats",
+                             fingerprints: Optional[Dict[int, Tuple[Box, int]]] = None, image: Optional[bytes] = None):
+        """Нарезка пачки мест одной камеры одним запросом и параллельная проверка вырезанных изображений"""
+        started = time.monotonic()
+        place_ids = [place.id for place, _ in batch]
+        try:
+            # Количество одновременных запросов к Cutter ограничено
+            async with self._cutter_semaphore:
+                cut_images = await self._cut_places(image_url, batch, image)
+        except Exception as e:
+            logger.error(f"Error cutting places {place_ids} for camera {camera_id} in zone {zone.id}: {e}")
+            cut_images = {}
+
+        async with asyncio.TaskGroup() as task_group:
+            for place, _ in batch:
+                cut_image_url = cut_images.get(place.id)
+                if not cut_image_url:
+                    logger.error(f"No image URL in Cutter service response for place {place.id}")
+                    stats.record_place(time.monotonic() - started, False)
+                    continue
+                task_group.create_task(self._process_place_limited(
+                    place, cut_image_url, started, stats, (fingerprints or {}).get(place.id)
+                ))
+
+    async def _cut_places(self, image_url: str, batch: List, image: Optional[bytes] = None) -> Dict[int, str]:
+        """Нарезка всех мест пачки одним вызовом cutter, возвращает {place_id: image_url}"""
+        # Координаты уже разобраны и проверены в geometry_cache - повторная валидация не нужна
+        places = [
+            PlaceCut.model_construct(place_id=place.id, location=[list(point) for point in place_geometry.points])
+            for place, place_geometry in batch
+        ]
+        layout = tuple(
+            (place.id, place_geometry.points, place_geometry.crop_box) for place, place_geometry in batch
+        )
+        try:
+            return await place_cutter.cut(image_url, places, image, layout)
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout waiting for Cutter response for places {[place.place_id for place in places]}")
+            return {}
+
+    async def _process_place_limited(self, place, image_url: str, started: float, stats: "CycleStats",
+                                     fingerprint: Optional[Tuple[Box, int]] = None):
+        """Обработка места с ограничением числа одновременно обрабатываемых мест"""
+        async with self._place_semaphore:
+            processed = await self._process_place(place, image_url)
+            stats.record_place(time.monotonic() - started, processed)
+        # Отпечаток запоминается только для успешно классифицированного кадра
+        if processed and fingerprint is not None:
+            place_fingerprints.remember(place.id, *fingerprint)
+
+    async def _process_place(self, place, image_url: str) -> bool:
+        """Распознавание вырезанного изображения места. Возвращает True, если место проверено полностью"""
+        try:
             logger.info(f"Received cut result for place {place.id}, image_url: {image_url}")
             
             # Отправляем запрос в Director сервис через REST API
-            detection_result = await self._detect_car(image_url)
+            async with self._director_semaphore:
+                detection_result = await self._detect_car(image_url)
             if not detection_result:
                 logger.error(f"Failed to get detection result for place {place.id}")
-                return
+                return False
                 
             # Обрабатываем результат распознавания
             await self._process_detection_result(place, detection_result)
+            return True
         except Exception as e:
             logger.error(f"Error processing place {place.id}: {e}")
+            return False
     
     async def _detect_car(self, object_name: str) -> DetectionResponse:
         """Отправляет запрос в Director сервис для распознавания автомобиля"""
@@ -329,18 +447,10 @@ class ViolationDetectionService:
                 logger.info(f"Detected violation at place {place.id}: car with number {detection.plate_number}")
                 
                 # Проверяем, есть ли уже нарушение для этого места и номера за последние 2 часа
-                existing_violations = await self.violation_service.list_by_place(place.id)
-                
-                # Фильтруем по номеру и времени (не более 2 часов назад)
-                current_time = datetime.now()
-                two_hours_ago = current_time - timedelta(hours=2)
-                
-                recent_same_car_violation = False
-                for violation in existing_violations:
-                    if (violation.car_number == detection.plate_number and 
-                        violation.timestamp >= two_hours_ago):
-                        recent_same_car_violation = True
-                        break
+                two_hours_ago = datetime.now() - timedelta(hours=2)
+                recent_same_car_violation = await self.violation_service.has_recent_violation(
+                    place.id, detection.plate_number, two_hours_ago
+                )
                 
                 # Если нет недавнего нарушения для этого же авто, создаем новое
                 if not recent_same_car_violation:
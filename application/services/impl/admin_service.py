@@ -1,9 +1,11 @@
-from typing import List
+from typing import List, Optional
 from web.schemas import AdminCreate, AdminResponse
 from application.services.interfaces.i_admin_service import IAdminService
 from infrastructure.repositories.admin import AdminRepository
 from web.mapper import AdminMapper
 from domain.models import Admin
+from infrastructure.utils.auth_cache import auth_cache
+from web.security import hash_password
 
 class AdminService(IAdminService):
     def __init__(self, admin_repo: AdminRepository):
@@ -16,23 +18,30 @@ class AdminService(IAdminService):
             raise ValueError(f"Admin with id {admin_id} not found")
         return self.mapper.to_response(admin)
 
-    async def get_all_admins(self) -> List[AdminResponse]:
-        admins = await self.admin_repo.get_by_all(Admin)
+    async def get_all_admins(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[AdminResponse]:
+        admins = await self.admin_repo.get_by_all(Admin, after_id, limit)
         return [self.mapper.to_response(admin) for admin in admins]
 
     async def update_admin(self, admin_id: int, data: AdminCreate) -> AdminResponse:
-        admin = await self.admin_repo.get_by_id(Admin, admin_id)
-        if not admin:
-            raise ValueError(f"Admin with id {admin_id} not found")
-        
-        updated_admin = self.mapper.to_entity(data)
-        updated_admin.id = admin_id
-        
-        updated_admin = await self.admin_repo.update(updated_admin)
-        return self.mapper.to_response(updated_admin)
+        # Хеширование вне транзакции, чтобы не держать соединение на время bcrypt
+        hashed_password = await hash_password(data.password)
+        async with self.admin_repo.unit_of_work():
+            admin = await self.admin_repo.get_by_id(Admin, admin_id)
+            if not admin:
+                raise ValueError(f"Admin with id {admin_id} not found")
+
+            updated_admin = self.mapper.to_entity(data, hashed_password)
+            updated_admin.id = admin_id
+
+            updated_admin = await self.admin_repo.update(updated_admin)
+            response = self.mapper.to_response(updated_admin)
+        auth_cache.invalidate_subject("admin", admin_id)
+        return response
 
     async def delete_admin(self, admin_id: int) -> None:
-        admin = await self.admin_repo.get_by_id(Admin, admin_id)
-        if not admin:
-            raise ValueError(f"Admin with id {admin_id} not found")
-        await self.admin_repo.delete(admin)
\ No newline at end of file
+        async with self.admin_repo.unit_of_work():
+            admin = await self.admin_repo.get_by_id(Admin, admin_id)
+            if not admin:
+                raise ValueError(f"Admin with id {admin_id} not found")
+            await self.admin_repo.delete(admin)
+        auth_cache.invalidate_subject("admin", admin_id)
\ No newline at end of file
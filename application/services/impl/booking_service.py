@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional, Set, AsyncIterator
 from datetime import datetime, timedelta
 from web.schemas import BookingCreate, BookingResponse, ParkingPlaceCreate, BookingDetailedResponse, BookingCreateWithoutEnd, BookingFinishResponse
 from application.services.interfaces.i_booking_service import IBookingService
@@ -23,20 +23,16 @@ class BookingService(IBookingService):
         Активным считается бронирование, если current_time находится между start_time и end_time,
         либо если время окончания не установлено, а время начала уже прошло.
         """
-        bookings = await self.booking_repo.get_by_all(Booking)
-        active_bookings = []
-        for booking in bookings:
-            if booking.booking_status_id == 1:  # Предполагаем, что статус "активно" имеет id = 1
-                # Убедимся, что current_time наивный для сравнения
-                naive_current_time = current_time.replace(tzinfo=None)
-                if booking.end_time is not None:
-                    if booking.start_time <= naive_current_time <= booking.end_time:
-                        active_bookings.append(booking)
-                else:  # end_time is None
-                    if booking.start_time <= naive_current_time:
-                        active_bookings.append(booking)
-        
-        return [self.mapper.to_response(booking) for booking in active_bookings]
+        # Убедимся, что current_time наивный для сравнения
+        bookings = await self.booking_repo.list_active(current_time.replace(tzinfo=None))
+        return [self.mapper.to_response(booking) for booking in bookings]
+
+    async def get_booked_place_ids(self, current_time: datetime, zone_id: Optional[int] = None) -> Set[int]:
+        """
+        Возвращает множество ID мест с активным бронированием на указанный момент времени.
+        Фильтрация выполняется в БД, полные объекты бронирований не загружаются.
+        """
+        return await self.booking_repo.list_active_place_ids(current_time.replace(tzinfo=None), zone_id)
 
     async def list_by_user(self, user_id: int) -> List[BookingResponse]:
         bookings = await self.booking_repo.list_by_user(user_id)
@@ -47,21 +43,14 @@ class BookingService(IBookingService):
         return [self.mapper.to_response(booking) for booking in bookings]
 
     async def create_booking(self, data: BookingCreate) -> BookingResponse:
-        # 1. Проверяем на пересечение с существующими бронированиями
-        if await self.booking_repo.has_overlapping_booking(
-            data.parking_place_id, data.start_time, data.end_time
-        ):
-            raise ValueError("Выбранное время для бронирования уже занято.")
-
-        # 2. Создаем бронирование
+        # Пересечение с другими активными бронями проверяет ограничение bookings_no_overlap:
+        # вставка и смена статуса места выполняются одной транзакцией без предварительной проверки.
+        # Статус места меняется на "занято", только если бронь начинается сейчас
         booking = self.mapper.to_entity(data)
-        created_booking = await self.booking_repo.save(booking)
-
-        # 3. Обновляем статус места на "занято", только если бронь начинается сейчас
-        now = datetime.utcnow()
-        if created_booking.start_time <= now:
-            await self.parking_place_service.update_place_status(data.parking_place_id, 2)  # 2 - занято
-
+        occupy_now = booking.start_time.replace(tzinfo=None) <= datetime.utcnow()
+        created_booking = await self.booking_repo.create_with_place_status(
+            booking, 2 if occupy_now else None  # 2 - занято
+        )
         return self.mapper.to_response(created_booking)
 
     async def get_booking(self, booking_id: int) -> BookingResponse:
@@ -70,26 +59,32 @@ class BookingService(IBookingService):
             raise ValueError(f"Booking with id {booking_id} not found")
         return self.mapper.to_response(booking)
 
-    async def get_all_bookings(self) -> List[BookingResponse]:
-        bookings = await self.booking_repo.get_by_all(Booking)
+    async def get_all_bookings(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[BookingResponse]:
+        bookings = await self.booking_repo.get_by_all(Booking, after_id, limit)
         return [self.mapper.to_response(booking) for booking in bookings]
 
+    async def stream_all_bookings(self) -> AsyncIterator[BookingResponse]:
+        async for instance in self.booking_repo.stream_all(Booking):
+            yield self.mapper.to_response(instance)
+
     async def update_booking(self, booking_id: int, data: BookingCreate) -> BookingResponse:
-        booking = await self.booking_repo.get_by_id(booking_id)
-        if not booking:
-            raise ValueError(f"Booking with id {booking_id} not found")
-        
-        updated_booking = self.mapper.to_entity(data)
-        updated_booking.id = booking_id
-        
-        updated_booking = await self.booking_repo.update(updated_booking)
-        return self.mapper.to_response(updated_booking)
+        async with self.booking_repo.unit_of_work():
+            booking = await self.booking_repo.get_by_id(Booking, booking_id)
+            if not booking:
+                raise ValueError(f"Booking with id {booking_id} not found")
+
+            updated_booking = self.mapper.to_entity(data)
+            updated_booking.id = booking_id
+
+            updated_booking = await self.booking_repo.update(updated_booking)
+            return self.mapper.to_response(updated_booking)
 
     async def delete_booking(self, booking_id: int) -> None:
-        booking = await self.booking_repo.get_by_id(Booking, booking_id)
-        if not booking:
-            raise ValueError(f"Booking with id {booking_id} not found")
-        await self.booking_repo.delete(booking)
+        async with self.booking_repo.unit_of_work():
+            booking = await self.booking_repo.get_by_id(Booking, booking_id)
+            if not booking:
+                raise ValueError(f"Booking with id {booking_id} not found")
+            await self.booking_repo.delete(booking)
         
     async def get_detailed_by_user(self, user_id: int) -> List[BookingDetailedResponse]:
         """
@@ -130,28 +125,28 @@ class BookingService(IBookingService):
         Returns:
             Объект BookingResponse с информацией о созданном бронировании
         """
-        # Проверяем доступность места
-        place = await self.parking_place_service.get_place(data.parking_place_id)
-        if place.place_status_id == 2:  # 2 - Занято
-            raise ValueError(f"Parking place {data.parking_place_id} is already occupied")
-        
-        # Создаем объект бронирования с текущим временем начала и без конца
-        current_time = datetime.utcnow()
-        
-        booking = Booking(
-            car_user_id=data.car_user_id,
-            start_time=current_time,
-            end_time=None,  # Время окончания не указано
-            parking_place_id=data.parking_place_id,
-            booking_status_id=data.booking_status_id
-        )
-        
-        # Сохраняем бронирование
-        created_booking = await self.booking_repo.save(booking)
-        
-        # Обновляем статус места на 'Занято'
-        await self.parking_place_service.update_place_status(data.parking_place_id, 2)
-        
+        # Проверка места и вставка брони выполняются в одной транзакции (одной сессии)
+        async with self.booking_repo.unit_of_work():
+            # Проверяем доступность места
+            place = await self.parking_place_service.get_place(data.parking_place_id)
+            if place.place_status_id == 2:  # 2 - Занято
+                raise ValueError(f"Parking place {data.parking_place_id} is already occupied")
+
+            # Создаем объект бронирования с текущим временем начала и без конца
+            current_time = datetime.utcnow()
+
+            booking = Booking(
+                car_user_id=data.car_user_id,
+                start_time=current_time,
+                end_time=None,  # Время окончания не указано
+                parking_place_id=data.parking_place_id,
+                booking_status_id=data.booking_status_id
+            )
+
+            # Сохраняем бронирование и обновляем статус места на 'Занято';
+            # пересечение с будущими активными бронями отклоняет ограничение bookings_no_overlap
+            created_booking = await self.booking_repo.create_with_place_status(booking, 2)
+
         return BookingResponse(
             id=created_booking.id,
             car_user_id=created_booking.car_user_id,
@@ -171,47 +166,22 @@ class BookingService(IBookingService):
         Returns:
             Объект BookingFinishResponse с информацией о стоимости
         """
-        # Получаем бронирование
-        booking = await self.booking_repo.get_by_id(Booking, booking_id)
-        if not booking:
-            raise ValueError(f"Booking with id {booking_id} not found")
-        
-        # Проверяем, не завершено ли уже бронирование
-        if booking.end_time is not None:
+        # Закрытие брони, освобождение места и расчет стоимости - один запрос в одной транзакции
+        finished = await self.booking_repo.finish(booking_id, datetime.utcnow())
+        if finished is None:
+            # Запрос ничего не изменил: различаем отсутствие брони и повторное завершение
+            booking = await self.booking_repo.get_by_id(Booking, booking_id)
+            if not booking:
+                raise ValueError(f"Booking with id {booking_id} not found")
             raise ValueError(f"Booking with id {booking_id} is already finished")
-        
-        # Получаем информацию о парковочном месте и зоне для расчета стоимости
-        place = await self.parking_place_service.get_place(booking.parking_place_id)
-        
-        # Обновляем бронирование - устанавливаем время окончания и меняем статус
-        current_time = datetime.utcnow()
-        booking.end_time = current_time
-        booking.booking_status_id = 2  # Завершено
-        
-        # Сохраняем обновленное бронирование
-        await self.booking_repo.update(booking)
-        
-        # Освобождаем парковочное место
-        await self.parking_place_service.update_place_status(booking.parking_place_id, 1)  # 1 - Свободно
-        
-        # Получаем информацию о зоне для определения цены за минуту
-        zone = await self.booking_repo.get_zone_by_place_id(booking.parking_place_id)
-        
-        # Рассчитываем длительность в минутах и стоимость
-        duration_seconds = (current_time - booking.start_time).total_seconds()
-        duration_minutes = int(duration_seconds / 60)
-        if duration_minutes < 1:  # Минимальная оплата за 1 минуту
-            duration_minutes = 1
-            
-        total_price = zone.price_per_minute * duration_minutes
-        
+
         return BookingFinishResponse(
-            id=booking.id,
-            start_time=booking.start_time,
-            end_time=booking.end_time,
-            duration_minutes=duration_minutes,
-            price_per_minute=zone.price_per_minute,
-            total_price=total_price,
+            id=finished.id,
+            start_time=finished.start_time,
+            end_time=finished.end_time,
+            duration_minutes=finished.duration_minutes,
+            price_per_minute=finished.price_per_minute,
+            total_price=finished.total_price,
             status="Завершено"
         )
 
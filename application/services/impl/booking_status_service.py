@@ -26,18 +26,20 @@ class BookingStatusService(IBookingStatusService):
         return self.mapper.to_response(booking_status)
 
     async def update_booking_status(self, booking_status_id: int, data: BookingStatusCreate) -> BookingStatusResponse:
-        booking_status = await self.booking_status_repo.get_by_id(BookingStatus, booking_status_id)
-        if not booking_status:
-            raise ValueError(f"BookingStatus with id {booking_status_id} not found")
+        async with self.booking_status_repo.unit_of_work():
+            booking_status = await self.booking_status_repo.get_by_id(BookingStatus, booking_status_id)
+            if not booking_status:
+                raise ValueError(f"BookingStatus with id {booking_status_id} not found")
         
-        updated_booking_status = self.mapper.to_entity(data)
-        updated_booking_status.id = booking_status_id
+            updated_booking_status = self.mapper.to_entity(data)
+            updated_booking_status.id = booking_status_id
         
-        updated_booking_status = await self.booking_status_repo.update(updated_booking_status)
-        return self.mapper.to_response(updated_booking_status)
+            updated_booking_status = await self.booking_status_repo.update(updated_booking_status)
+            return self.mapper.to_response(updated_booking_status)
 
     async def delete_booking_status(self, booking_status_id: int) -> None:
-        booking_status = await self.booking_status_repo.get_by_id(BookingStatus, booking_status_id)
-        if not booking_status:
-            raise ValueError(f"BookingStatus with id {booking_status_id} not found")
-        await self.booking_status_repo.delete(booking_status) 
\ No newline at end of file
+        async with self.booking_status_repo.unit_of_work():
+            booking_status = await self.booking_status_repo.get_by_id(BookingStatus, booking_status_id)
+            if not booking_status:
+                raise ValueError(f"BookingStatus with id {booking_status_id} not found")
+            await self.booking_status_repo.delete(booking_status) 
\ No newline at end of file
@@ -1,7 +1,7 @@
-from typing import List
+from typing import List, Optional
 import logging
 import asyncio
-from web.schemas import CameraParkingPlaceCreate, CameraParkingPlaceResponse
+from web.schemas import CameraParkingPlaceCreate, CameraParkingPlaceResponse, PlaceGeometryResponse, PlaceOverlap
 from application.services.interfaces.i_camera_parking_place_service import ICameraParkingPlaceService
 from infrastructure.repositories.camera_parking_place import CameraParkingPlaceRepository
 from fastapi import HTTPException
@@ -9,8 +9,9 @@ from web.mapper import CameraParkingPlaceMapper
 from domain.models import CameraParkingPlace
 import base64
 import requests
-from infrastructure.utils.s3_utils import get_image_from_minio
+from infrastructure.utils.s3_utils import object_store
 from infrastructure.utils.rabbitmq_utils import rabbitmq_client
+from infrastructure.utils.geometry_cache import geometry_cache, normalize_polygon, CameraGeometry, PlaceGeometry
 from web.config import Configs
 
 config = Configs()
@@ -21,6 +22,7 @@ class CameraParkingPlaceService(ICameraParkingPlaceService):
         self._validate_polygon(data.location)
         camera_parking_place = self.mapper.to_entity(data)
         created_link = await self.camera_parking_place_repo.save(camera_parking_place)
+        geometry_cache.invalidate(created_link.camera_id)
         return self.mapper.to_response(created_link)
 
     async def list_places_for_camera(self, camera_id: int) -> List[CameraParkingPlaceResponse]:
@@ -36,7 +38,8 @@ class CameraParkingPlaceService(ICameraParkingPlaceService):
         self.mapper = CameraParkingPlaceMapper()
 
     def _validate_polygon(self, coordinates: List[List[float]]) -> None:
-        if not coordinates or len(coordinates) < 3:
+        # Те же правила разбора, что и в geometry_cache: принятый полигон всегда попадет в кэш
+        if not coordinates or normalize_polygon(coordinates) is None:
             raise HTTPException(status_code=400, detail="Polygon must have at least 3 points")
         if coordinates[0] != coordinates[-1]:
             raise HTTPException(status_code=400, detail="Polygon is not closed (first and last points must be the same)")
@@ -45,6 +48,7 @@ class CameraParkingPlaceService(ICameraParkingPlaceService):
         self._validate_polygon(data.location)
         camera_parking_place = self.mapper.to_entity(data)
         created_camera_parking_place = await self.camera_parking_place_repo.save(camera_parking_place)
+        geometry_cache.invalidate(created_camera_parking_place.camera_id)
         return self.mapper.to_response(created_camera_parking_place)
 
     async def get_camera_parking_place(self, camera_parking_place_id: int) -> CameraParkingPlaceResponse:
@@ -53,27 +57,64 @@ class CameraParkingPlaceService(ICameraParkingPlaceService):
             raise ValueError(f"CameraParkingPlace with id {camera_parking_place_id} not found")
         return self.mapper.to_response(camera_parking_place)
 
-    async def get_all_camera_parking_places(self) -> List[CameraParkingPlaceResponse]:
-        camera_parking_places = await self.camera_parking_place_repo.get_by_all(CameraParkingPlace)
+    async def get_all_camera_parking_places(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[CameraParkingPlaceResponse]:
+        camera_parking_places = await self.camera_parking_place_repo.get_by_all(CameraParkingPlace, after_id, limit)
         return [self.mapper.to_response(camera_parking_place) for camera_parking_place in camera_parking_places]
 
     async def update_camera_parking_place(self, camera_parking_place_id: int, data: CameraParkingPlaceCreate) -> CameraParkingPlaceResponse:
         self._validate_polygon(data.location)
-        camera_parking_place = await self.camera_parking_place_repo.get_by_id(CameraParkingPlace, camera_parking_place_id)
-        if not camera_parking_place:
-            raise ValueError(f"CameraParkingPlace with id {camera_parking_place_id} not found")
-        
-        updated_camera_parking_place = self.mapper.to_entity(data)
-        updated_camera_parking_place.id = camera_parking_place_id
-        
-        updated_camera_parking_place = await self.camera_parking_place_repo.update(updated_camera_parking_place)
+        async with self.camera_parking_place_repo.unit_of_work():
+            camera_parking_place = await self.camera_parking_place_repo.get_by_id(CameraParkingPlace, camera_parking_place_id)
+            if not camera_parking_place:
+                raise ValueError(f"CameraParkingPlace with id {camera_parking_place_id} not found")
+            previous_camera_id = camera_parking_place.camera_id
+
+            updated_camera_parking_place = self.mapper.to_entity(data)
+            updated_camera_parking_place.id = camera_parking_place_id
+
+            updated_camera_parking_place = await self.camera_parking_place_repo.update(updated_camera_parking_place)
+        # Связь могла перейти к другой камере - сбрасываем обе
+        geometry_cache.invalidate(previous_camera_id)
+        geometry_cache.invalidate(updated_camera_parking_place.camera_id)
         return self.mapper.to_response(updated_camera_parking_place)
 
     async def delete_camera_parking_place(self, camera_parking_place_id: int) -> None:
-        camera_parking_place = await self.camera_parking_place_repo.get_by_id(CameraParkingPlace, camera_parking_place_id)
-        if not camera_parking_place:
-            raise ValueError(f"CameraParkingPlace with id {camera_parking_place_id} not found")
-        await self.camera_parking_place_repo.delete(camera_parking_place)
+        async with self.camera_parking_place_repo.unit_of_work():
+            camera_parking_place = await self.camera_parking_place_repo.get_by_id(CameraParkingPlace, camera_parking_place_id)
+            if not camera_parking_place:
+                raise ValueError(f"CameraParkingPlace with id {camera_parking_place_id} not found")
+            await self.camera_parking_place_repo.delete(camera_parking_place)
+        geometry_cache.invalidate(camera_parking_place.camera_id)
+
+    async def get_camera_geometry(self, camera_id: int) -> CameraGeometry:
+        """Разобранные полигоны мест камеры (из кэша или одним запросом к БД)"""
+        geometry = geometry_cache.get(camera_id)
+        if geometry is None:
+            generation = geometry_cache.generation(camera_id)
+            links = await self.camera_parking_place_repo.list_places_by_camera(camera_id)
+            geometry = geometry_cache.build(camera_id, links, generation)
+        return geometry
+
+    @staticmethod
+    def _geometry_response(place: PlaceGeometry) -> PlaceGeometryResponse:
+        return PlaceGeometryResponse(
+            camera_parking_place_id=place.link_id,
+            parking_place_id=place.place_id,
+            bounds=list(place.bounds),
+            crop_box=list(place.crop_box),
+            area=place.area
+        )
+
+    async def locate_places(self, camera_id: int, x: float, y: float) -> List[PlaceGeometryResponse]:
+        geometry = await self.get_camera_geometry(camera_id)
+        return [self._geometry_response(place) for place in geometry.locate(x, y)]
+
+    async def find_overlaps(self, camera_id: int, min_area: float = 1.0) -> List[PlaceOverlap]:
+        geometry = await self.get_camera_geometry(camera_id)
+        return [
+            PlaceOverlap(parking_place_id=first, other_parking_place_id=second, area=area)
+            for first, second, area in geometry.overlaps(min_area)
+        ]
 
     async def get_marked_zone_image(self, zone_id: int) -> dict:
         try:
@@ -108,20 +149,14 @@ class CameraParkingPlaceService(ICameraParkingPlaceService):
             
             logger.info(f"Sending request to cutter service via RabbitMQ queue: {config.DRAW_QUEUE}")
             try:
-                # Создаем временную очередь для ответа
-                response_queue, future = await rabbitmq_client.create_response_queue()
-                
-                # Отправляем запрос в очередь обработки изображений
-                await rabbitmq_client.publish_message(
-                    queue_name=config.DRAW_QUEUE,
-                    message=draw_request,
-                    reply_to=response_queue
-                )
-                
-                # Ждем ответа
+                # Отправляем запрос в очередь обработки изображений и ждем ответа
                 try:
                     # Ожидаем ответа с таймаутом в 30 секунд
-                    response_data = await asyncio.wait_for(future, timeout=30.0)
+                    response_data = await rabbitmq_client.call(
+                        config.DRAW_QUEUE,
+                        draw_request,
+                        timeout=30.0
+                    )
                     
                     if "error" in response_data:
                         logger.error(f"Error from cutter service: {response_data['error']}")
@@ -135,7 +170,7 @@ class CameraParkingPlaceService(ICameraParkingPlaceService):
                     logger.info(f"Successfully got marked image URL: {marked_image_url}")
                     
                     logger.info("Getting image from MinIO")
-                    image_data = get_image_from_minio(marked_image_url)
+                    image_data = await object_store.get(marked_image_url)
                     
                     base64_image = base64.b64encode(image_data).decode('utf-8')
                     logger.info("Successfully encoded image to base64")
@@ -147,9 +182,6 @@ class CameraParkingPlaceService(ICameraParkingPlaceService):
                 except asyncio.TimeoutError:
                     logger.error("Timeout waiting for response from cutter service")
                     raise HTTPException(status_code=504, detail="Таймаут ожидания ответа от сервиса обработки")
-                finally:
-                    # Всегда очищаем временную очередь
-                    await rabbitmq_client.cleanup_response_queue(response_queue)
             except Exception as e:
                 logger.exception(f"Error communicating with RabbitMQ: {e}")
                 raise HTTPException(status_code=500, detail=f"Ошибка при работе с RabbitMQ: {str(e)}")
@@ -1,10 +1,17 @@
-from typing import List, Dict
-from web.schemas import CameraCreate, CameraResponse
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+from loguru import logger
+
+from web.schemas import CameraCreate, CameraResponse, CameraSnapshotData, ZoneSnapshots
 from application.services.interfaces.i_camera_service import ICameraService
 from infrastructure.repositories.camera import CameraRepository
 from web.mapper import CameraMapper
 from domain.models import Camera
-from infrastructure.utils.s3_utils import get_image_from_minio
+from infrastructure.utils.s3_utils import object_store
+from web.config import Configs
+
+config = Configs()
 
 class CameraService(ICameraService):
     async def list_by_zone(self, zone_id: int) -> List[CameraResponse]:
@@ -14,6 +21,8 @@ class CameraService(ICameraService):
     def __init__(self, camera_repo: CameraRepository):
         self.camera_repo = camera_repo
         self.mapper = CameraMapper()
+        # Общий для всех зон лимит одновременных запросов снимков
+        self._snapshot_semaphore = asyncio.Semaphore(config.CAMERA_SNAPSHOT_CONCURRENCY)
 
     async def create_camera(self, data: CameraCreate) -> CameraResponse:
         camera = self.mapper.to_entity(data)
@@ -26,38 +35,82 @@ class CameraService(ICameraService):
             raise ValueError(f"Camera with id {camera_id} not found")
         return self.mapper.to_response(camera)
 
-    async def get_all_cameras(self) -> List[CameraResponse]:
-        cameras = await self.camera_repo.get_by_all(Camera)
+    async def get_all_cameras(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[CameraResponse]:
+        cameras = await self.camera_repo.get_by_all(Camera, after_id, limit)
         return [self.mapper.to_response(camera) for camera in cameras]
 
     async def update_camera(self, camera_id: int, data: CameraCreate) -> CameraResponse:
-        camera = await self.camera_repo.get_by_id(Camera, camera_id)
-        if not camera:
-            raise ValueError(f"Camera with id {camera_id} not found")
+        async with self.camera_repo.unit_of_work():
+            camera = await self.camera_repo.get_by_id(Camera, camera_id)
+            if not camera:
+                raise ValueError(f"Camera with id {camera_id} not found")
         
-        updated_camera = self.mapper.to_entity(data)
-        updated_camera.id = camera_id
+            updated_camera = self.mapper.to_entity(data)
+            updated_camera.id = camera_id
         
-        updated_camera = await self.camera_repo.update(updated_camera)
-        return self.mapper.to_response(updated_camera)
+            updated_camera = await self.camera_repo.update(updated_camera)
+            return self.mapper.to_response(updated_camera)
 
     async def delete_camera(self, camera_id: int) -> None:
-        camera = await self.camera_repo.get_by_id(Camera, camera_id)
-        if not camera:
-            raise ValueError(f"Camera with id {camera_id} not found")
-        await self.camera_repo.delete(camera)
+        async with self.camera_repo.unit_of_work():
+            camera = await self.camera_repo.get_by_id(Camera, camera_id)
+            if not camera:
+                raise ValueError(f"Camera with id {camera_id} not found")
+            await self.camera_repo.delete(camera)
+
+    async def get_zone_snapshots(self, zone_id: int) -> ZoneSnapshots:
+        """Снимки всех камер зоны, запрашиваемые параллельно.
 
-    async def get_zone_snapshots(self, zone_id: int) -> Dict[int, bytes]:
+        Каждая камера ограничена CAMERA_SNAPSHOT_TIMEOUT_SECONDS; ошибка или таймаут одной
+        камеры не прерывает остальные - ее ID попадает в failed_camera_ids.
+        """
         cameras = await self.camera_repo.list_by_zone(zone_id)
         if not cameras:
             raise ValueError(f"No cameras found for zone {zone_id}")
-        
-        snapshots = {}
-        for camera in cameras:
-            # В реальном приложении здесь будет запрос к камере
-            # Сейчас просто получаем тестовое изображение из MinIO
-            image_name = f"images/test_{zone_id}.jpg"
-            image_data = get_image_from_minio(image_name)
-            snapshots[camera.id] = image_data
-            
-        return snapshots 
\ No newline at end of file
+
+        results = await asyncio.gather(*(self._fetch_snapshot(camera) for camera in cameras))
+
+        snapshots = ZoneSnapshots(zone_id=zone_id)
+        for camera, snapshot in zip(cameras, results):
+            if snapshot is None:
+                snapshots.failed_camera_ids.append(camera.id)
+            else:
+                snapshots.snapshots.append(snapshot)
+        return snapshots
+
+    @staticmethod
+    def _snapshot_object_name(camera: Camera) -> str:
+        """Имя объекта с последним снимком камеры (CAMERA_SNAPSHOT_OBJECT_NAME)"""
+        return config.CAMERA_SNAPSHOT_OBJECT_NAME.format(camera_id=camera.id, zone_id=camera.parking_zone_id)
+
+    async def _fetch_snapshot(self, camera: Camera) -> Optional[CameraSnapshotData]:
+        # В реальном приложении здесь будет запрос к камере
+        # Сейчас получаем последний сохраненный снимок камеры из хранилища
+        image_name = self._snapshot_object_name(camera)
+        try:
+            async with self._snapshot_semaphore:
+                image_data, info = await asyncio.wait_for(
+                    object_store.get_with_info(image_name),
+                    timeout=config.CAMERA_SNAPSHOT_TIMEOUT_SECONDS
+                )
+        except asyncio.TimeoutError:
+            logger.warning(f"Snapshot of camera {camera.id} timed out after {config.CAMERA_SNAPSHOT_TIMEOUT_SECONDS} s")
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to get snapshot of camera {camera.id}: {e}")
+            return None
+        return CameraSnapshotData(
+            camera_id=camera.id,
+            object_name=image_name,
+            image=image_data,
+            size=info.size,
+            captured_at=info.last_modified,
+            etag=info.etag
+        )
+
+    async def stream_camera_snapshot(self, camera_id: int) -> AsyncIterator[bytes]:
+        camera = await self.camera_repo.get_by_id(Camera, camera_id)
+        if not camera:
+            raise ValueError(f"Camera with id {camera_id} not found")
+        # Как и в get_zone_snapshots, вместо запроса к камере - ее сохраненный снимок
+        return object_store.stream(self._snapshot_object_name(camera))
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from web.schemas import CarCreate, CarResponse
 from application.services.interfaces.i_car_service import ICarService
 from infrastructure.repositories.car import CarRepository
@@ -21,23 +21,25 @@ class CarService(ICarService):
             raise ValueError(f"Car with id {car_id} not found")
         return self.mapper.to_response(car)
 
-    async def get_all_cars(self) -> List[CarResponse]:
-        cars = await self.car_repo.get_by_all(Car)
+    async def get_all_cars(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[CarResponse]:
+        cars = await self.car_repo.get_by_all(Car, after_id, limit)
         return [self.mapper.to_response(car) for car in cars]
 
     async def update_car(self, car_id: int, data: CarCreate) -> CarResponse:
-        car = await self.car_repo.get_by_id(Car, car_id)
-        if not car:
-            raise ValueError(f"Car with id {car_id} not found")
+        async with self.car_repo.unit_of_work():
+            car = await self.car_repo.get_by_id(Car, car_id)
+            if not car:
+                raise ValueError(f"Car with id {car_id} not found")
         
-        updated_car = self.mapper.to_entity(data)
-        updated_car.id = car_id
+            updated_car = self.mapper.to_entity(data)
+            updated_car.id = car_id
         
-        updated_car = await self.car_repo.update(updated_car)
-        return self.mapper.to_response(updated_car)
+            updated_car = await self.car_repo.update(updated_car)
+            return self.mapper.to_response(updated_car)
 
     async def delete_car(self, car_id: int) -> None:
-        car = await self.car_repo.get_by_id(Car, car_id)
-        if not car:
-            raise ValueError(f"Car with id {car_id} not found")
-        await self.car_repo.delete(car) 
\ No newline at end of file
+        async with self.car_repo.unit_of_work():
+            car = await self.car_repo.get_by_id(Car, car_id)
+            if not car:
+                raise ValueError(f"Car with id {car_id} not found")
+            await self.car_repo.delete(car) 
\ No newline at end of file
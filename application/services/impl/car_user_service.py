@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from web.schemas import CarUserCreate, CarUserResponse, CarUserDetailedResponse
 from application.services.interfaces.i_car_user_service import ICarUserService
 from infrastructure.repositories.car_user import CarUserRepository
@@ -31,10 +31,11 @@ class CarUserService(ICarUserService):
         return self.mapper.to_response(created_car_user)
 
     async def unassign_car(self, car_user_id: int) -> None:
-        car_user = await self.car_user_repo.get_by_id(CarUser, car_user_id)
-        if not car_user:
-            raise ValueError(f"CarUser with id {car_user_id} not found")
-        await self.car_user_repo.delete(car_user)
+        async with self.car_user_repo.unit_of_work():
+            car_user = await self.car_user_repo.get_by_id(CarUser, car_user_id)
+            if not car_user:
+                raise ValueError(f"CarUser with id {car_user_id} not found")
+            await self.car_user_repo.delete(car_user)
 
     async def list_by_user(self, user_id: int) -> List[CarUserResponse]:
         car_users = await self.car_user_repo.list_by_user(user_id)
@@ -55,23 +56,25 @@ class CarUserService(ICarUserService):
             raise ValueError(f"CarUser with id {car_user_id} not found")
         return self.mapper.to_response(car_user)
 
-    async def get_all_car_users(self) -> List[CarUserResponse]:
-        car_users = await self.car_user_repo.get_by_all(CarUser)
+    async def get_all_car_users(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[CarUserResponse]:
+        car_users = await self.car_user_repo.get_by_all(CarUser, after_id, limit)
         return [self.mapper.to_response(car_user) for car_user in car_users]
 
     async def update_car_user(self, car_user_id: int, data: CarUserCreate) -> CarUserResponse:
-        car_user = await self.car_user_repo.get_by_id(CarUser, car_user_id)
-        if not car_user:
-            raise ValueError(f"CarUser with id {car_user_id} not found")
+        async with self.car_user_repo.unit_of_work():
+            car_user = await self.car_user_repo.get_by_id(CarUser, car_user_id)
+            if not car_user:
+                raise ValueError(f"CarUser with id {car_user_id} not found")
         
-        updated_car_user = self.mapper.to_entity(data)
-        updated_car_user.id = car_user_id
+            updated_car_user = self.mapper.to_entity(data)
+            updated_car_user.id = car_user_id
         
-        updated_car_user = await self.car_user_repo.update(updated_car_user)
-        return self.mapper.to_response(updated_car_user)
+            updated_car_user = await self.car_user_repo.update(updated_car_user)
+            return self.mapper.to_response(updated_car_user)
 
     async def delete_car_user(self, car_user_id: int) -> None:
-        car_user = await self.car_user_repo.get_by_id(CarUser, car_user_id)
-        if not car_user:
-            raise ValueError(f"CarUser with id {car_user_id} not found")
-        await self.car_user_repo.delete(car_user) 
\ No newline at end of file
+        async with self.car_user_repo.unit_of_work():
+            car_user = await self.car_user_repo.get_by_id(CarUser, car_user_id)
+            if not car_user:
+                raise ValueError(f"CarUser with id {car_user_id} not found")
+            await self.car_user_repo.delete(car_user) 
\ No newline at end of file
@@ -1,6 +1,8 @@
-from typing import List
+from typing import List, Optional, AsyncIterator
+from loguru import logger
 from infrastructure.repositories.parking_place import ParkingPlaceRepository
-from web.schemas import ParkingPlaceCreate, ParkingPlaceResponse
+from infrastructure.utils.occupancy_cache import occupancy_cache
+from web.schemas import ParkingPlaceCreate, ParkingPlaceResponse, ZoneOccupancyResponse, PlaceOccupancy
 from web.mapper import ParkingPlaceMapper
 from application.services.interfaces.i_parking_place_service import IParkingPlaceService
 from domain.models import ParkingPlace
@@ -12,13 +14,64 @@ class ParkingPlaceService(IParkingPlaceService):
         self.mapper = ParkingPlaceMapper()
 
     async def list_by_zone(self, zone_id: int) -> List[ParkingPlaceResponse]:
+        zone = occupancy_cache.get_zone(zone_id)
+        if zone is not None:
+            return [
+                ParkingPlaceResponse(
+                    id=place_id,
+                    place_number=place_number,
+                    place_status_id=status_id,
+                    parking_zone_id=zone_id
+                )
+                for place_id, place_number, status_id in zone.places()
+            ]
         places = await self.parking_place_repo.list_by_zone(zone_id)
         return [self.mapper.to_response(place) for place in places]
 
     async def list_by_status(self, status_id: int) -> List[ParkingPlaceResponse]:
+        cached = occupancy_cache.list_by_status(status_id)
+        if cached is not None:
+            return [
+                ParkingPlaceResponse(
+                    id=place_id,
+                    place_number=place_number,
+                    place_status_id=place_status_id,
+                    parking_zone_id=zone_id
+                )
+                for place_id, zone_id, place_number, place_status_id in cached
+            ]
         places = await self.parking_place_repo.list_by_status(status_id)
         return [self.mapper.to_response(place) for place in places]
 
+    async def get_zone_occupancy(self, zone_id: int) -> ZoneOccupancyResponse:
+        zone = occupancy_cache.get_zone(zone_id)
+        if zone is not None:
+            places = zone.places()
+        else:
+            places = [
+                (place.id, place.place_number, place.place_status_id)
+                for place in await self.parking_place_repo.list_by_zone(zone_id)
+            ]
+        return ZoneOccupancyResponse(
+            zone_id=zone_id,
+            version=occupancy_cache.etag(zone_id),
+            total_places=len(places),
+            free_places=sum(1 for _, _, status_id in places if status_id == 1),  # 1 - Свободно
+            occupied_places=sum(1 for _, _, status_id in places if status_id == 2),  # 2 - Занято
+            places=[
+                PlaceOccupancy(id=place_id, place_number=place_number, place_status_id=status_id)
+                for place_id, place_number, status_id in places
+            ]
+        )
+
+    async def warm_occupancy_cache(self) -> None:
+        occupancy_cache.load(await self.parking_place_repo.list_occupancy())
+
+    async def reload_occupancy_cache(self) -> None:
+        fixed = await self.parking_place_repo.reconcile_occupancy_cache()
+        if fixed:
+            logger.warning(f"Occupancy cache reload fixed {fixed} places")
+
     async def get_places_by_zone(self, zone_id: int):
         return await self.parking_place_repo.list_by_zone(zone_id)
 
@@ -33,35 +86,38 @@ class ParkingPlaceService(IParkingPlaceService):
             raise ValueError(f"Parking place with id {place_id} not found")
         return self.mapper.to_response(place)
 
-    async def get_all_places(self) -> List[ParkingPlaceResponse]:
-        places = await self.parking_place_repo.get_by_all(ParkingPlace)
+    async def get_all_places(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[ParkingPlaceResponse]:
+        places = await self.parking_place_repo.get_by_all(ParkingPlace, after_id, limit)
         return [self.mapper.to_response(place) for place in places]
 
+    async def stream_all_places(self) -> AsyncIterator[ParkingPlaceResponse]:
+        async for instance in self.parking_place_repo.stream_all(ParkingPlace):
+            yield self.mapper.to_response(instance)
+
     async def update_place(self, place_id: int, data: ParkingPlaceCreate) -> ParkingPlaceResponse:
-        place = await self.parking_place_repo.get_by_id(ParkingPlace, place_id)
-        if not place:
-            raise ValueError(f"Parking place with id {place_id} not found")
+        async with self.parking_place_repo.unit_of_work():
+            place = await self.parking_place_repo.get_by_id(ParkingPlace, place_id)
+            if not place:
+                raise ValueError(f"Parking place with id {place_id} not found")
         
-        updated_place = self.mapper.to_entity(data)
-        updated_place.id = place_id
+            updated_place = self.mapper.to_entity(data)
+            updated_place.id = place_id
         
-        updated_place = await self.parking_place_repo.update(updated_place)
-        return self.mapper.to_response(updated_place)
+            updated_place = await self.parking_place_repo.update(updated_place)
+            return self.mapper.to_response(updated_place)
 
     async def delete_place(self, place_id: int) -> None:
-        place = await self.parking_place_repo.get_by_id(ParkingPlace, place_id)
-        if not place:
-            raise ValueError(f"Parking place with id {place_id} not found")
-        await self.parking_place_repo.delete(place)
+        async with self.parking_place_repo.unit_of_work():
+            place = await self.parking_place_repo.get_by_id(ParkingPlace, place_id)
+            if not place:
+                raise ValueError(f"Parking place with id {place_id} not found")
+            await self.parking_place_repo.delete(place)
 
     async def update_place_status(self, place_id: int, status_id: int) -> ParkingPlaceResponse:
-        place = await self.parking_place_repo.get_by_id(ParkingPlace, place_id)
+        place = await self.parking_place_repo.update_status(place_id, status_id)
         if not place:
             raise ValueError(f"Parking place with id {place_id} not found")
-        
-        place.place_status_id = status_id
-        updated_place_entity = await self.parking_place_repo.update(place)
-        return self.mapper.to_response(updated_place_entity)
+        return self.mapper.to_response(place)
 
     async def automate_place_statuses(self) -> None:
         await self.parking_place_repo.free_up_expired_booking_places()
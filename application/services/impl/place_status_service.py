@@ -26,18 +26,20 @@ class PlaceStatusService(IPlaceStatusService):
         return self.mapper.to_response(place_status)
 
     async def update_place_status(self, place_status_id: int, data: PlaceStatusCreate) -> PlaceStatusResponse:
-        place_status = await self.place_status_repo.get_by_id(PlaceStatus, place_status_id)
-        if not place_status:
-            raise ValueError(f"PlaceStatus with id {place_status_id} not found")
+        async with self.place_status_repo.unit_of_work():
+            place_status = await self.place_status_repo.get_by_id(PlaceStatus, place_status_id)
+            if not place_status:
+                raise ValueError(f"PlaceStatus with id {place_status_id} not found")
         
-        updated_place_status = self.mapper.to_entity(data)
-        updated_place_status.id = place_status_id
+            updated_place_status = self.mapper.to_entity(data)
+            updated_place_status.id = place_status_id
         
-        updated_place_status = await self.place_status_repo.update(updated_place_status)
-        return self.mapper.to_response(updated_place_status)
+            updated_place_status = await self.place_status_repo.update(updated_place_status)
+            return self.mapper.to_response(updated_place_status)
 
     async def delete_place_status(self, place_status_id: int) -> None:
-        place_status = await self.place_status_repo.get_by_id(PlaceStatus, place_status_id)
-        if not place_status:
-            raise ValueError(f"PlaceStatus with id {place_status_id} not found")
-        await self.place_status_repo.delete(place_status) 
\ No newline at end of file
+        async with self.place_status_repo.unit_of_work():
+            place_status = await self.place_status_repo.get_by_id(PlaceStatus, place_status_id)
+            if not place_status:
+                raise ValueError(f"PlaceStatus with id {place_status_id} not found")
+            await self.place_status_repo.delete(place_status) 
\ No newline at end of file
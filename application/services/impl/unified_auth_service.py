@@ -7,7 +7,7 @@ from domain.i_unified_auth import IUnifiedAuth
 from domain.i_user import IUser
 from domain.i_admin import IAdmin
 from application.services.interfaces.i_unified_auth_service import IUnifiedAuthService
-from web.security import get_password_hash, create_access_token
+from web.security import hash_password, create_access_token
 from web.config import Configs
 
 
@@ -23,16 +23,19 @@ class UnifiedAuthService(IUnifiedAuthService):
     async def register(self, data: Union[UserCreate, AdminCreate], role: str) -> Union[User, Admin]:
         email = data.email
 
+        # Проверки на существование - с основной БД: на реплике только что
+        # зарегистрированный пользователь может еще отсутствовать
         if role == "user":
-            existing_user = await self.user_repository.get_by_email(email)
-            if existing_user:
-                raise ValueError("Email уже зарегистрирован")
+            with self.user_repository.pin_primary():
+                existing_user = await self.user_repository.get_by_email(email)
+                if existing_user:
+                    raise ValueError("Email уже зарегистрирован")
 
-            existing_phone = await self.user_repository.get_by_phone(data.phone)
-            if existing_phone:
-                raise ValueError("Номер телефона уже зарегистрирован")
+                existing_phone = await self.user_repository.get_by_phone(data.phone)
+                if existing_phone:
+                    raise ValueError("Номер телефона уже зарегистрирован")
 
-            hashed_password = get_password_hash(data.password)
+            hashed_password = await hash_password(data.password)
             user = User(
                 user_name=data.user_name,
                 email=data.email,
@@ -41,11 +44,12 @@ class UnifiedAuthService(IUnifiedAuthService):
             )
             return await self.user_repository.save(user)
         else:
-            existing_admin = await self.admin_repository.get_by_email(email)
+            with self.admin_repository.pin_primary():
+                existing_admin = await self.admin_repository.get_by_email(email)
             if existing_admin:
                 raise ValueError("Email уже зарегистрирован")
 
-            hashed_password = get_password_hash(data.password)
+            hashed_password = await hash_password(data.password)
             admin = Admin(
                 admin_name=data.admin_name,
                 email=data.email,
@@ -1,9 +1,11 @@
-from typing import List
+from typing import List, Optional
 from web.schemas import UserCreate, UserResponse
 from application.services.interfaces.i_user_service import IUserService
 from infrastructure.repositories.user import UserRepository
 from web.mapper import UserMapper
 from domain.models import User
+from infrastructure.utils.auth_cache import auth_cache
+from web.security import hash_password
 
 class UserService(IUserService):
     def __init__(self, user_repo: UserRepository):
@@ -16,23 +18,30 @@ class UserService(IUserService):
             raise ValueError(f"User with id {user_id} not found")
         return self.mapper.to_response(user)
 
-    async def get_all_users(self) -> List[UserResponse]:
-        users = await self.user_repo.get_by_all(User)
+    async def get_all_users(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[UserResponse]:
+        users = await self.user_repo.get_by_all(User, after_id, limit)
         return [self.mapper.to_response(user) for user in users]
 
     async def update_user(self, user_id: int, data: UserCreate) -> UserResponse:
-        user = await self.user_repo.get_by_id(User, user_id)
-        if not user:
-            raise ValueError(f"User with id {user_id} not found")
-        
-        updated_user = self.mapper.to_entity(data)
-        updated_user.id = user_id
-        
-        updated_user = await self.user_repo.update(updated_user)
-        return self.mapper.to_response(updated_user)
+        # Хеширование вне транзакции, чтобы не держать соединение на время bcrypt
+        hashed_password = await hash_password(data.password)
+        async with self.user_repo.unit_of_work():
+            user = await self.user_repo.get_by_id(User, user_id)
+            if not user:
+                raise ValueError(f"User with id {user_id} not found")
+
+            updated_user = self.mapper.to_entity(data, hashed_password)
+            updated_user.id = user_id
+
+            updated_user = await self.user_repo.update(updated_user)
+            response = self.mapper.to_response(updated_user)
+        auth_cache.invalidate_subject("user", user_id)
+        return response
 
     async def delete_user(self, user_id: int) -> None:
-        user = await self.user_repo.get_by_id(User, user_id)
-        if not user:
-            raise ValueError(f"User with id {user_id} not found")
-        await self.user_repo.delete(user)
\ No newline at end of file
+        async with self.user_repo.unit_of_work():
+            user = await self.user_repo.get_by_id(User, user_id)
+            if not user:
+                raise ValueError(f"User with id {user_id} not found")
+            await self.user_repo.delete(user)
+        auth_cache.invalidate_subject("user", user_id)
\ No newline at end of file
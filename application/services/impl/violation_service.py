@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional, AsyncIterator
 from web.schemas import ViolationCreate, ViolationResponse
 from application.services.interfaces.i_violation_service import IViolationService
 from infrastructure.repositories.violation import ViolationRepository
@@ -15,6 +15,9 @@ class ViolationService(IViolationService):
         violations = await self.violation_repo.list_by_place(place_id)
         return [self.mapper.to_response(violation) for violation in violations]
 
+    async def has_recent_violation(self, place_id: int, car_number: str, since: datetime) -> bool:
+        return await self.violation_repo.has_recent_violation(place_id, car_number, since)
+
     async def list_by_date_range(self, start: datetime, end: datetime) -> List[ViolationResponse]:
         violations = await self.violation_repo.list_by_date_range(start, end)
         return [self.mapper.to_response(violation) for violation in violations]
@@ -30,23 +33,29 @@ class ViolationService(IViolationService):
             raise ValueError(f"Violation with id {violation_id} not found")
         return self.mapper.to_response(violation)
 
-    async def get_all_violations(self) -> List[ViolationResponse]:
-        violations = await self.violation_repo.get_by_all(Violation)
+    async def get_all_violations(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[ViolationResponse]:
+        violations = await self.violation_repo.get_by_all(Violation, after_id, limit)
         return [self.mapper.to_response(violation) for violation in violations]
 
+    async def stream_all_violations(self) -> AsyncIterator[ViolationResponse]:
+        async for instance in self.violation_repo.stream_all(Violation):
+            yield self.mapper.to_response(instance)
+
     async def update_violation(self, violation_id: int, data: ViolationCreate) -> ViolationResponse:
-        violation = await self.violation_repo.get_by_id(Violation, violation_id)
-        if not violation:
-            raise ValueError(f"Violation with id {violation_id} not found")
+        async with self.violation_repo.unit_of_work():
+            violation = await self.violation_repo.get_by_id(Violation, violation_id)
+            if not violation:
+                raise ValueError(f"Violation with id {violation_id} not found")
         
-        updated_violation = self.mapper.to_entity(data)
-        updated_violation.id = violation_id
+            updated_violation = self.mapper.to_entity(data)
+            updated_violation.id = violation_id
         
-        updated_violation = await self.violation_repo.update(updated_violation)
-        return self.mapper.to_response(updated_violation)
+            updated_violation = await self.violation_repo.update(updated_violation)
+            return self.mapper.to_response(updated_violation)
 
     async def delete_violation(self, violation_id: int) -> None:
-        violation = await self.violation_repo.get_by_id(Violation, violation_id)
-        if not violation:
-            raise ValueError(f"Violation with id {violation_id} not found")
-        await self.violation_repo.delete(violation) 
\ No newline at end of file
+        async with self.violation_repo.unit_of_work():
+            violation = await self.violation_repo.get_by_id(Violation, violation_id)
+            if not violation:
+                raise ValueError(f"Violation with id {violation_id} not found")
+            await self.violation_repo.delete(violation) 
\ No newline at end of file
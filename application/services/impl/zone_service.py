@@ -1,10 +1,10 @@
-import os
 import json
 import base64
 import uuid
 import asyncio
+import time
 import aiohttp
-from typing import List, Union, Dict
+from typing import List, Union, Dict, Optional
 
 from application.services.interfaces.i_booking_service import IBookingService
 from web.schemas import (
@@ -12,10 +12,12 @@ from web.schemas import (
     ParkingZoneResponse, 
     ParkingZoneDetailedResponse, 
     PlaceStatusUpdateResponse,
-    CutRequest,
     PlaceCut,
     S3ObjectRequest,
-    PlaceImage
+    PlaceImage,
+    PlaceClassifyRequest,
+    ClassifyBatchRequest,
+    ClassifyBatchResponse
 )
 from application.services.interfaces.i_parking_zone_service import IParkingZoneService
 from infrastructure.repositories.parking_zone import ParkingZoneRepository
@@ -25,17 +27,24 @@ from domain.models import ParkingZone
 from web.config import Configs
 from loguru import logger
 from infrastructure.utils.rabbitmq_utils import rabbitmq_client
+from infrastructure.utils.cutter import place_cutter
+from infrastructure.utils.geometry_cache import geometry_cache, normalize_polygon, ZoneGeometry
 from datetime import datetime, timedelta
 
+config = Configs()
+
 
 class ParkingZoneService(IParkingZoneService):
     def __init__(self, parking_zone_repo: ParkingZoneRepository, booking_service: IBookingService):
         self.booking_service = booking_service
         self.parking_zone_repo = parking_zone_repo
         self.mapper = ParkingZoneMapper()
+        # Время (monotonic), до которого пакетная классификация считается неподдерживаемой
+        self._batch_classify_disabled_until = 0.0
 
     def _validate_polygon(self, coordinates: List[List[float]]) -> None:
-        if not coordinates or len(coordinates) < 3:
+        # Те же правила разбора, что и в geometry_cache
+        if not coordinates or normalize_polygon(coordinates) is None:
             raise HTTPException(status_code=400, detail="Polygon must have at least 3 points")
         if coordinates[0] != coordinates[-1]:
             raise HTTPException(status_code=400, detail="Polygon is not closed (first and last points must be the same)")
@@ -52,27 +61,48 @@ class ParkingZoneService(IParkingZoneService):
             raise ValueError(f"Parking zone with id {zone_id} not found")
         return self.mapper.to_response(zone)
 
-    async def get_all_zones(self) -> List[ParkingZoneResponse]:
-        zones = await self.parking_zone_repo.get_by_all(ParkingZone)
+    async def get_all_zones(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[ParkingZoneResponse]:
+        zones = await self.parking_zone_repo.get_by_all(ParkingZone, after_id, limit)
         return [self.mapper.to_response(zone) for zone in zones]
 
     async def update_zone(self, zone_id: int, data: ParkingZoneCreate) -> ParkingZoneResponse:
-        #self._validate_polygon(data.location)
-        zone = await self.parking_zone_repo.get_by_id(ParkingZone, zone_id)
-        if not zone:
-            raise ValueError(f"Parking zone with id {zone_id} not found")
+        async with self.parking_zone_repo.unit_of_work():
+            #self._validate_polygon(data.location)
+            zone = await self.parking_zone_repo.get_by_id(ParkingZone, zone_id)
+            if not zone:
+                raise ValueError(f"Parking zone with id {zone_id} not found")
         
-        updated_zone = self.mapper.to_entity(data)
-        updated_zone.id = zone_id
+            updated_zone = self.mapper.to_entity(data)
+            updated_zone.id = zone_id
         
-        updated_zone = await self.parking_zone_repo.update(updated_zone)
-        return self.mapper.to_response(updated_zone)
+            updated_zone = await self.parking_zone_repo.update(updated_zone)
+            response = self.mapper.to_response(updated_zone)
+        # Контур зоны сбрасывается после фиксации, чтобы кэш не собрался заново из старых данных
+        geometry_cache.invalidate_zone(zone_id)
+        return response
 
     async def delete_zone(self, zone_id: Union[int, str]) -> None:
-        zone = await self.parking_zone_repo.get_by_id(ParkingZone, zone_id)
-        if not zone:
-            raise ValueError(f"Parking zone with id {zone_id} not found")
-        await self.parking_zone_repo.delete(zone)
+        async with self.parking_zone_repo.unit_of_work():
+            zone = await self.parking_zone_repo.get_by_id(ParkingZone, zone_id)
+            if not zone:
+                raise ValueError(f"Parking zone with id {zone_id} not found")
+            await self.parking_zone_repo.delete(zone)
+        geometry_cache.invalidate_zone(zone.id)
+
+    async def get_zone_geometry(self, zone_id: int) -> ZoneGeometry:
+        """Разобранный контур зоны (из кэша или одним чтением зоны)"""
+        geometry = geometry_cache.get_zone(zone_id)
+        if geometry is None:
+            generation = geometry_cache.zone_generation(zone_id)
+            zone = await self.parking_zone_repo.get_by_id(ParkingZone, zone_id)
+            if not zone:
+                raise ValueError(f"Parking zone with id {zone_id} not found")
+            geometry = geometry_cache.build_zone(zone_id, zone.location, generation)
+        return geometry
+
+    async def zone_contains(self, zone_id: int, x: float, y: float) -> bool:
+        geometry = await self.get_zone_geometry(zone_id)
+        return geometry.contains(x, y)
 
     async def get_zones_by_admin(self, admin_id: int) -> List[ParkingZoneResponse]:
         zones = await self.parking_zone_repo.list_by_admin(admin_id)
@@ -82,7 +112,14 @@ class ParkingZoneService(IParkingZoneService):
         result = await self.parking_zone_repo.get_zone_detailed(zone_id)
         if not result:
             raise ValueError(f"Parking zone with id {zone_id} not found")
-            
+        return self._to_detailed_response(result)
+
+    async def get_detailed_info_batch(self, zone_ids: List[int]) -> List[ParkingZoneDetailedResponse]:
+        results = await self.parking_zone_repo.get_zones_detailed(list(set(zone_ids)))
+        return [self._to_detailed_response(result) for result in results]
+
+    @staticmethod
+    def _to_detailed_response(result) -> ParkingZoneDetailedResponse:
         zone, zone_type, total_places, free_places, occupied_places, total_cameras = result
         
         return ParkingZoneDetailedResponse(
@@ -121,10 +158,11 @@ class ParkingZoneService(IParkingZoneService):
                     message=f"Successfully updated place {place_id} status"
                 )
             else:
-                logger.warning(f"Failed to update status for place {place_id}")
+                # Место не найдено или статус уже совпадает
+                logger.info(f"Status for place {place_id} was not changed")
                 return PlaceStatusUpdateResponse(
                     updated_places=0,
-                    message=f"Failed to update place {place_id} status"
+                    message=f"Place {place_id} status was not changed"
                 )
         except Exception as e:
             logger.error(f"Error updating place status: {e}")
@@ -145,18 +183,19 @@ class ParkingZoneService(IParkingZoneService):
         """
         try:
             logger.info(f"Updating last check time for zone {zone_id}")
-            # Получаем зону
-            zone = await self.parking_zone_repo.get_by_id(ParkingZone, zone_id)
-            if not zone:
-                logger.error(f"Zone {zone_id} not found")
-                return False
-                
-            # Обновляем время последней проверки
-            from datetime import datetime
-            zone.update_time = datetime.now()
-            
-            # Сохраняем изменения
-            await self.parking_zone_repo.update(zone)
+            async with self.parking_zone_repo.unit_of_work():
+                # Получаем зону
+                zone = await self.parking_zone_repo.get_by_id(ParkingZone, zone_id)
+                if not zone:
+                    logger.error(f"Zone {zone_id} not found")
+                    return False
+
+                # Обновляем время последней проверки
+                from datetime import datetime
+                zone.update_time = datetime.now()
+
+                # Сохраняем изменения
+                await self.parking_zone_repo.update(zone)
             logger.info(f"Successfully updated check time for zone {zone_id} to {zone.update_time}")
             return True
         except Exception as e:
@@ -171,7 +210,7 @@ class ParkingZoneService(IParkingZoneService):
             zone_id: ID зоны парковки
             
         Returns:
-            Список кортежей (место, {"location": координаты})
+            Список кортежей (место, {"location": координаты, "camera_id": ID камеры})
         """
         logger.info(f"Getting places for zone {zone_id}")
         
@@ -192,10 +231,10 @@ class ParkingZoneService(IParkingZoneService):
         1. Получает заглушечное изображение зоны (в будущем будет получать с камеры)
         2. Получает все места в зоне с их координатами
         3. Отправляет REST запрос в сервис нарезки для получения изображений отдельных мест
-        4. Для каждого полученного изображения места отправляет REST запрос в сервис классификации
+        4. Отправляет все изображения мест одним пакетным запросом в сервис классификации
+           (или параллельными одиночными запросами, если пакетный режим не поддерживается)
         5. Обновляет статусы мест в базе данных на основе результатов классификации
         """
-        settings = Configs()
         logger.info(f"Processing zone image for zone_id={zone_id}")
         
         # 1. Получаем заглушечное изображение зоны (в будущем будет реальное)
@@ -213,10 +252,8 @@ class ParkingZoneService(IParkingZoneService):
     
         current_time = datetime.now()
 
-        active_bookings = await self.booking_service.get_active_bookings(current_time)
-        
-        # Создаем сет забронированных мест для быстрой проверки
-        booked_place_ids = {booking.parking_place_id for booking in active_bookings}
+        # Получаем сет забронированных мест зоны для быстрой проверки
+        booked_place_ids = await self.booking_service.get_booked_place_ids(current_time, zone_id)
 
         places_to_check = [place_tuple for place_tuple in places_with_locations 
                               if place_tuple[0].id not in booked_place_ids]
@@ -238,110 +275,33 @@ class ParkingZoneService(IParkingZoneService):
             logger.warning("No places with valid location data found")
             return PlaceStatusUpdateResponse(updated_places=0, message="No places with valid location data")
         
-        # 3. Отправляем запрос на нарезку изображений
-        cut_request = CutRequest(
-            image_url=placeholder_image_url,
-            places=cut_places
-        )
-        
+        # 3. Нарезаем изображение на места (внешний cutter_service или локальная нарезка, см. CUTTER_BACKEND)
         try:
-            # Используем RabbitMQ для взаимодействия с сервисом нарезки
-            # Создаем уникальный идентификатор запроса, чтобы запросы разных пользователей не перемешались
-            request_id = str(uuid.uuid4())
-            logger.debug(f"Creating RabbitMQ response queue for request_id={request_id}")
-            
-            # Создаем временную очередь для получения ответа
-            response_queue, future = await rabbitmq_client.create_response_queue()
-            
             try:
-                logger.debug(f"Sending cut request via RabbitMQ")
-                # Добавляем request_id в запрос
-                message = {
-                    "request_id": request_id,
-                    "data": cut_request.dict()
-                }
-                
-                # Отправляем сообщение в очередь для сервиса нарезки с указанием очереди для ответа
-                await rabbitmq_client.publish_message("cut_queue", message, reply_to=response_queue)
-                
-                # Ожидаем ответ с таймаутом 30 секунд
-                try:
-                    cut_response = await asyncio.wait_for(future, timeout=30.0)
-                    place_images = cut_response.get("place_images", [])
-                    logger.debug(f"Received cut response with {len(place_images)} place images")
-                except asyncio.TimeoutError:
-                    logger.error("Timeout waiting for cutter service response")
-                    return PlaceStatusUpdateResponse(
-                        updated_places=0, 
-                        message="Cutter service timeout"
-                    )
-            finally:
-                # Очищаем временную очередь
-                await rabbitmq_client.cleanup_response_queue(response_queue)
+                place_images = await place_cutter.cut(placeholder_image_url, cut_places)
+                logger.debug(f"Received {len(place_images)} place images from cutter")
+            except asyncio.TimeoutError:
+                logger.error("Timeout waiting for cutter service response")
+                return PlaceStatusUpdateResponse(
+                    updated_places=0, 
+                    message="Cutter service timeout"
+                )
                     
             if not place_images:
                 logger.warning("No place images returned from cutter service")
                 return PlaceStatusUpdateResponse(updated_places=0, message="No place images received")
                 
-            # 4. Для каждого изображения места отправляем запрос на классификацию через RabbitMQ
-            place_status_updates = {}  # Словарь {place_id: status_id}
-            
-            for place_image in place_images:
-                # Получаем имя файла из URL изображения
-                filename = os.path.basename(place_image.get("image_url", ""))
-                place_id = place_image.get("place_id")
-                
-                if not filename or not place_id:
-                    logger.warning(f"Invalid place image data: {place_image}")
-                    continue
-                
-                # Добавляем префикс к имени файла (как указал пользователь)
-                filename = "cut_images/" + filename
-                class_request = S3ObjectRequest(filename=filename)
-                
-                # Создаем уникальный идентификатор для этого запроса
-                class_request_id = str(uuid.uuid4())
-                logger.debug(f"Creating RabbitMQ response queue for classification request_id={class_request_id}, place_id={place_id}")
-                
-                # Создаем временную очередь для получения ответа
-                class_response_queue, class_future = await rabbitmq_client.create_response_queue()
-                
-                try:
-                    # Отправляем запрос на классификацию через RabbitMQ
-                    logger.debug(f"Sending classification request for place_id={place_id}, filename={filename}")
-                    
-                    # Формируем сообщение в формате, который ожидает Director
-                    # Важно: reply_to должен быть в самом сообщении, а не только в метаданных
-                    class_message = {
-                        "request_id": class_request_id,
-                        "data": class_request.dict(),
-                        "reply_to": class_response_queue  # Добавляем очередь ответа в само сообщение
-                    }
-                    
-                    # Отправляем сообщение в очередь для сервиса классификации
-                    # Также передаем reply_to и в метаданных для надежности
-                    await rabbitmq_client.publish_message("classify_queue", class_message, reply_to=class_response_queue)
-                    
-                    # Ожидаем ответ с таймаутом 15 секунд
-                    try:
-                        classification = await asyncio.wait_for(class_future, timeout=30.0)
-                        class_id = classification.get("class_id")
-                        class_name = classification.get("class_name")
-                        
-                        logger.info(f"Place id={place_id} classified as {class_name} (id={class_id})")
-                        
-                        # Преобразуем class_id в status_id для нашей базы данных
-                        # Предполагаем, что class_id=0 означает "свободно" (status_id=1),
-                        # class_id=1 означает "занято" (status_id=2)
-                        status_id = class_id + 1  # Простое отображение для примера
-                        
-                        # Добавляем в список обновлений
-                        place_status_updates[place_id] = status_id
-                    except asyncio.TimeoutError:
-                        logger.error(f"Timeout waiting for classification response for place_id={place_id}")
-                finally:
-                    # Очищаем временную очередь
-                    await rabbitmq_client.cleanup_response_queue(class_response_queue)
+            # 4. Отправляем изображения мест на классификацию через RabbitMQ.
+            # Оба бэкенда нарезки возвращают имена объектов, они передаются как есть
+            classifications = await self._classify_places(place_images)
+
+            # Преобразуем class_id в status_id для нашей базы данных
+            # Предполагаем, что class_id=0 означает "свободно" (status_id=1),
+            # class_id=1 означает "занято" (status_id=2)
+            place_status_updates = {
+                place_id: class_id + 1  # Простое отображение для примера
+                for place_id, class_id in classifications.items()
+            }
             
             # 5. Обновляем статусы мест в базе данных
             if not place_status_updates:
@@ -361,4 +321,111 @@ class ParkingZoneService(IParkingZoneService):
             return PlaceStatusUpdateResponse(
                 updated_places=0,
                 message=f"Error processing zone image: {str(e)}"
-            )
\ No newline at end of file
+            )
+
+    async def _classify_places(self, place_files: Dict[int, str]) -> Dict[int, int]:
+        """Классифицирует изображения мест и возвращает словарь {place_id: class_id}"""
+        if not place_files:
+            return {}
+
+        if config.CLASSIFY_BATCH_ENABLED and time.monotonic() >= self._batch_classify_disabled_until:
+            classifications = None
+            try:
+                # Без потребителя пакетной очереди запрос только прождал бы CLASSIFY_TIMEOUT_SECONDS
+                if await rabbitmq_client.consumer_count(config.CLASSIFY_BATCH_QUEUE) == 0:
+                    raise LookupError(f"No consumers on queue {config.CLASSIFY_BATCH_QUEUE}")
+                classifications = await self._classify_batch(place_files)
+            except Exception as e:
+                # Удаленная сторона не поддерживает пакетный режим или не ответила вовремя:
+                # переходим на одиночные запросы и повторим попытку позже
+                logger.warning(f"Batch classification failed ({e!r}), falling back to single requests")
+                self._batch_classify_disabled_until = time.monotonic() + config.CLASSIFY_BATCH_RETRY_SECONDS
+
+            if classifications is not None:
+                # Места, которых нет в пакетном ответе, классифицируются одиночными запросами
+                missing = {
+                    place_id: filename
+                    for place_id, filename in place_files.items()
+                    if place_id not in classifications
+                }
+                if missing:
+                    logger.warning(f"Batch classification reply has no results for places {sorted(missing)}, "
+                                   f"retrying them with single requests")
+                    classifications.update(await self._classify_concurrently(missing))
+                return classifications
+
+        return await self._classify_concurrently(place_files)
+
+    async def _classify_batch(self, place_files: Dict[int, str]) -> Dict[int, int]:
+        """Один запрос на классификацию всех мест и один ответ со списком {place_id, class_id}"""
+        batch_request = ClassifyBatchRequest(items=[
+            PlaceClassifyRequest(place_id=place_id, filename=filename)
+            for place_id, filename in place_files.items()
+        ])
+        request_id = str(uuid.uuid4())
+        logger.debug(f"Sending batch classification request for {len(place_files)} places, request_id={request_id}")
+
+        reply = await rabbitmq_client.call(
+            config.CLASSIFY_BATCH_QUEUE,
+            {"request_id": request_id, "data": batch_request.dict()},
+            timeout=config.CLASSIFY_TIMEOUT_SECONDS,
+            embed_reply_to=True
+        )
+        if not isinstance(reply, dict) or "error" in reply:
+            raise ValueError(f"Unexpected batch classification reply: {reply}")
+
+        batch_response = ClassifyBatchResponse(**reply)
+        classifications = {}
+        for result in batch_response.results:
+            if result.place_id not in place_files:
+                logger.warning(f"Batch classification returned unknown place_id={result.place_id}")
+                continue
+            logger.info(f"Place id={result.place_id} classified as {result.class_name} (id={result.class_id})")
+            classifications[result.place_id] = result.class_id
+        return classifications
+
+    async def _classify_concurrently(self, place_files: Dict[int, str]) -> Dict[int, int]:
+        """Одиночные запросы на классификацию, не более CLASSIFY_CONCURRENCY одновременно"""
+        semaphore = asyncio.Semaphore(max(1, config.CLASSIFY_CONCURRENCY))
+
+        async def classify(place_id: int, filename: str) -> Optional[int]:
+            async with semaphore:
+                class_request = S3ObjectRequest(filename=filename)
+                class_request_id = str(uuid.uuid4())
+                logger.debug(f"Sending classification request for place_id={place_id}, filename={filename}, "
+                             f"request_id={class_request_id}")
+                
+                # Формируем сообщение в формате, который ожидает Director
+                # Важно: reply_to должен быть в самом сообщении, а не только в метаданных
+                class_message = {
+                    "request_id": class_request_id,
+                    "data": class_request.dict()
+                }
+                try:
+                    classification = await rabbitmq_client.call(
+                        config.CLASSIFY_QUEUE, class_message,
+                        timeout=config.CLASSIFY_TIMEOUT_SECONDS, embed_reply_to=True
+                    )
+                except asyncio.TimeoutError:
+                    logger.error(f"Timeout waiting for classification response for place_id={place_id}")
+                    return None
+                except Exception as e:
+                    # Ошибка одного места не отменяет классификацию остальных
+                    logger.error(f"Error classifying place_id={place_id}: {e!r}")
+                    return None
+
+                if not isinstance(classification, dict) or "error" in classification:
+                    logger.error(f"Unexpected classification reply for place_id={place_id}: {classification}")
+                    return None
+                class_id = classification.get("class_id")
+                class_name = classification.get("class_name")
+                logger.info(f"Place id={place_id} classified as {class_name} (id={class_id})")
+                return class_id
+
+        place_ids = list(place_files.keys())
+        class_ids = await asyncio.gather(*(classify(place_id, place_files[place_id]) for place_id in place_ids))
+        return {
+            place_id: class_id
+            for place_id, class_id in zip(place_ids, class_ids)
+            if class_id is not None
+        }
@@ -26,18 +26,20 @@ class ZoneTypeService(IZoneTypeService):
         return self.mapper.to_response(zone_type)
 
     async def update_zone_type(self, zone_type_id: int, data: ZoneTypeCreate) -> ZoneTypeResponse:
-        zone_type = await self.zone_type_repo.get_by_id(ZoneType, zone_type_id)
-        if not zone_type:
-            raise ValueError(f"ZoneType with id {zone_type_id} not found")
+        async with self.zone_type_repo.unit_of_work():
+            zone_type = await self.zone_type_repo.get_by_id(ZoneType, zone_type_id)
+            if not zone_type:
+                raise ValueError(f"ZoneType with id {zone_type_id} not found")
         
-        updated_zone_type = self.mapper.to_entity(data)
-        updated_zone_type.id = zone_type_id
+            updated_zone_type = self.mapper.to_entity(data)
+            updated_zone_type.id = zone_type_id
         
-        updated_zone_type = await self.zone_type_repo.update(updated_zone_type)
-        return self.mapper.to_response(updated_zone_type)
+            updated_zone_type = await self.zone_type_repo.update(updated_zone_type)
+            return self.mapper.to_response(updated_zone_type)
 
     async def delete_zone_type(self, zone_type_id: int) -> None:
-        zone_type = await self.zone_type_repo.get_by_id(ZoneType, zone_type_id)
-        if not zone_type:
-            raise ValueError(f"ZoneType with id {zone_type_id} not found")
-        await self.zone_type_repo.delete(zone_type) 
\ No newline at end of file
+        async with self.zone_type_repo.unit_of_work():
+            zone_type = await self.zone_type_repo.get_by_id(ZoneType, zone_type_id)
+            if not zone_type:
+                raise ValueError(f"ZoneType with id {zone_type_id} not found")
+            await self.zone_type_repo.delete(zone_type) 
\ No newline at end of file
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 
 from web.schemas import AdminCreate, AdminResponse
 
@@ -9,7 +9,7 @@ class IAdminService(ABC):
         pass
 
     @abstractmethod
-    async def get_all_admins(self) -> List[AdminResponse]:
+    async def get_all_admins(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[AdminResponse]:
         pass
 
     @abstractmethod
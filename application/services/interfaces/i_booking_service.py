@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional, Set, AsyncIterator
 from datetime import datetime
 
 from web.schemas import BookingCreate, BookingResponse, BookingDetailedResponse, BookingCreateWithoutEnd, BookingFinishResponse
@@ -14,7 +14,12 @@ class IBookingService(ABC):
         pass
 
     @abstractmethod
-    async def get_all_bookings(self) -> List[BookingResponse]:
+    async def get_all_bookings(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[BookingResponse]:
+        pass
+
+    @abstractmethod
+    def stream_all_bookings(self) -> AsyncIterator[BookingResponse]:
+        """Потоковая выдача всех записей пачками, без загрузки таблицы в память"""
         pass
 
     @abstractmethod
@@ -25,6 +30,10 @@ class IBookingService(ABC):
     async def get_active_bookings(self, current_time: datetime) -> List[BookingResponse]:
         pass
 
+    @abstractmethod
+    async def get_booked_place_ids(self, current_time: datetime, zone_id: Optional[int] = None) -> Set[int]:
+        pass
+
     @abstractmethod
     async def list_by_user(self, user_id: int) -> List[BookingResponse]:
         pass
@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 
-from web.schemas import CameraParkingPlaceCreate, CameraParkingPlaceResponse
+from infrastructure.utils.geometry_cache import CameraGeometry
+from web.schemas import CameraParkingPlaceCreate, CameraParkingPlaceResponse, PlaceGeometryResponse, PlaceOverlap
 
 class ICameraParkingPlaceService(ABC):
     @abstractmethod
@@ -29,7 +30,7 @@ class ICameraParkingPlaceService(ABC):
         pass
 
     @abstractmethod
-    async def get_all_camera_parking_places(self) -> List[CameraParkingPlaceResponse]:
+    async def get_all_camera_parking_places(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[CameraParkingPlaceResponse]:
         pass
 
     @abstractmethod
@@ -43,4 +44,19 @@ class ICameraParkingPlaceService(ABC):
 
     @abstractmethod
     async def get_marked_zone_image(self, zone_id: int) -> dict:
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    async def get_camera_geometry(self, camera_id: int) -> CameraGeometry:
+        """Разобранные полигоны мест камеры (из geometry_cache)"""
+        pass
+
+    @abstractmethod
+    async def locate_places(self, camera_id: int, x: float, y: float) -> List[PlaceGeometryResponse]:
+        """Места камеры, полигон которых содержит точку (x, y) снимка"""
+        pass
+
+    @abstractmethod
+    async def find_overlaps(self, camera_id: int, min_area: float = 1.0) -> List[PlaceOverlap]:
+        """Пары мест камеры, полигоны которых пересекаются (площадь пересечения не меньше min_area)"""
+        pass
@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import AsyncIterator, List, Optional
 
-from web.schemas import CameraCreate, CameraResponse
+from web.schemas import CameraCreate, CameraResponse, ZoneSnapshots
 
 class ICameraService(ABC):
     @abstractmethod
@@ -21,7 +21,7 @@ class ICameraService(ABC):
         pass
 
     @abstractmethod
-    async def get_all_cameras(self) -> List[CameraResponse]:
+    async def get_all_cameras(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[CameraResponse]:
         pass
 
     @abstractmethod
@@ -29,5 +29,11 @@ class ICameraService(ABC):
         pass
 
     @abstractmethod
-    async def get_zone_snapshots(self, zone_id: int) -> Dict[int, bytes]:
-        pass
\ No newline at end of file
+    async def get_zone_snapshots(self, zone_id: int) -> ZoneSnapshots:
+        """Снимки камер зоны; камеры, снимок которых получить не удалось, - в failed_camera_ids"""
+        pass
+
+    @abstractmethod
+    async def stream_camera_snapshot(self, camera_id: int) -> AsyncIterator[bytes]:
+        """Снимок камеры частями, без загрузки изображения в память целиком"""
+        pass
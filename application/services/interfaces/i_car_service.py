@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 
 from web.schemas import CarCreate, CarResponse
 
@@ -13,7 +13,7 @@ class ICarService(ABC):
         pass
 
     @abstractmethod
-    async def get_all_cars(self) -> List[CarResponse]:
+    async def get_all_cars(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[CarResponse]:
         pass
 
     @abstractmethod
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 
 from web.schemas import CarUserCreate, CarUserResponse, CarUserDetailedResponse
 
@@ -33,7 +33,7 @@ class ICarUserService(ABC):
         pass
 
     @abstractmethod
-    async def get_all_car_users(self) -> List[CarUserResponse]:
+    async def get_all_car_users(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[CarUserResponse]:
         pass
 
     @abstractmethod
@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional, AsyncIterator
 
-from web.schemas import ParkingPlaceCreate, ParkingPlaceResponse
+from web.schemas import ParkingPlaceCreate, ParkingPlaceResponse, ZoneOccupancyResponse
 
 class IParkingPlaceService(ABC):
     @abstractmethod
@@ -20,12 +20,32 @@ class IParkingPlaceService(ABC):
     async def list_by_status(self, status_id: int) -> List[ParkingPlaceResponse]:
         pass
 
+    @abstractmethod
+    async def get_zone_occupancy(self, zone_id: int) -> ZoneOccupancyResponse:
+        """Статусы мест зоны из кэша занятости вместе с версией (ETag)"""
+        pass
+
+    @abstractmethod
+    async def warm_occupancy_cache(self) -> None:
+        """Загрузить кэш занятости одним запросом"""
+        pass
+
+    @abstractmethod
+    async def reload_occupancy_cache(self) -> None:
+        """Сверить кэш занятости с БД (периодическая задача)"""
+        pass
+
     @abstractmethod
     async def delete_place(self, place_id: int) -> None:
         pass
 
     @abstractmethod
-    async def get_all_places(self) -> List[ParkingPlaceResponse]:
+    async def get_all_places(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[ParkingPlaceResponse]:
+        pass
+
+    @abstractmethod
+    def stream_all_places(self) -> AsyncIterator[ParkingPlaceResponse]:
+        """Потоковая выдача всех записей пачками, без загрузки таблицы в память"""
         pass
 
     @abstractmethod
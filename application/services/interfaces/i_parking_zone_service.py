@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List, Union
+from typing import List, Union, Optional
+from infrastructure.utils.geometry_cache import ZoneGeometry
 from web.schemas import ParkingZoneCreate, ParkingZoneResponse, ParkingZoneDetailedResponse, PlaceStatusUpdateResponse
 
 class IParkingZoneService(ABC):
@@ -12,7 +13,7 @@ class IParkingZoneService(ABC):
         pass
 
     @abstractmethod
-    async def get_all_zones(self) -> List[ParkingZoneResponse]:
+    async def get_all_zones(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[ParkingZoneResponse]:
         pass
 
     @abstractmethod
@@ -23,6 +24,16 @@ class IParkingZoneService(ABC):
     async def delete_zone(self, zone_id: Union[int, str]) -> None:
         pass
 
+    @abstractmethod
+    async def get_zone_geometry(self, zone_id: int) -> ZoneGeometry:
+        """Разобранный контур зоны (ParkingZone.location) из geometry_cache"""
+        pass
+
+    @abstractmethod
+    async def zone_contains(self, zone_id: int, x: float, y: float) -> bool:
+        """Точка (x, y) внутри контура зоны; False, если у зоны нет полигона"""
+        pass
+
     @abstractmethod
     async def get_zones_by_admin(self, admin_id: int) -> List[ParkingZoneResponse]:
         pass
@@ -30,6 +41,11 @@ class IParkingZoneService(ABC):
     @abstractmethod
     async def get_detailed_info(self, zone_id: int) -> ParkingZoneDetailedResponse:
         pass
+
+    @abstractmethod
+    async def get_detailed_info_batch(self, zone_ids: List[int]) -> List[ParkingZoneDetailedResponse]:
+        """Получить детальную информацию по нескольким зонам (несуществующие пропускаются)"""
+        pass
         
     @abstractmethod
     async def process_zone_image(self, zone_id: int) -> PlaceStatusUpdateResponse:
@@ -38,7 +54,7 @@ class IParkingZoneService(ABC):
         1. Получить изображение зоны (сейчас заглушка)
         2. Отправить запрос на нарезку изображений мест
         3. Получить результаты нарезки
-        4. Для каждого изображения места отправить запрос на классификацию
+        4. Отправить изображения мест на классификацию одним пакетным запросом
         5. Получить результаты классификации
         6. Обновить статусы мест в базе данных
         
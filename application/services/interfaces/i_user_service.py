@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 
 from web.schemas import UserCreate, UserResponse
 
@@ -9,7 +9,7 @@ class IUserService(ABC):
         pass
 
     @abstractmethod
-    async def get_all_users(self) -> List[UserResponse]:
+    async def get_all_users(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[UserResponse]:
         pass
 
     @abstractmethod
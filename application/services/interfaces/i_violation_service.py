@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional, AsyncIterator
 from datetime import datetime
 
 from web.schemas import ViolationCreate, ViolationResponse
@@ -17,12 +17,21 @@ class IViolationService(ABC):
     async def list_by_place(self, place_id: int) -> List[ViolationResponse]:
         pass
 
+    @abstractmethod
+    async def has_recent_violation(self, place_id: int, car_number: str, since: datetime) -> bool:
+        pass
+
     @abstractmethod
     async def list_by_date_range(self, start: datetime, end: datetime) -> List[ViolationResponse]:
         pass
 
     @abstractmethod
-    async def get_all_violations(self) -> List[ViolationResponse]:
+    async def get_all_violations(self, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[ViolationResponse]:
+        pass
+
+    @abstractmethod
+    def stream_all_violations(self) -> AsyncIterator[ViolationResponse]:
+        """Потоковая выдача всех записей пачками, без загрузки таблицы в память"""
         pass
 
     @abstractmethod
@@ -0,0 +1,3 @@
+class BookingConflictError(ValueError):
+    """Бронь пересекается по времени с активной бронью того же места"""
+    pass
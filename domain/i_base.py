@@ -1,13 +1,28 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional
 
 
 class IBase(ABC):
+    @abstractmethod
+    def unit_of_work(self):
+        pass
+
+    @abstractmethod
+    def pin_primary(self):
+        pass
+
     @abstractmethod
     async def get_by_id(self, model, model_id: int):
         pass
 
     @abstractmethod
-    async def get_by_all(self, model):
+    async def get_by_all(self, model, after_id: Optional[int] = None, limit: Optional[int] = None):
+        """Все строки модели; с after_id/limit - страница по возрастанию первичного ключа"""
+        pass
+
+    @abstractmethod
+    def stream_all(self, model, batch_size: int = 500) -> AsyncIterator:
+        """Асинхронный итератор по всем строкам модели без загрузки таблицы в память"""
         pass
 
     @abstractmethod
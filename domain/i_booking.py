@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, List, Optional, Set
 from domain.models import Booking
 from domain.i_base import IBase
 from abc import abstractmethod, ABC
@@ -14,14 +14,29 @@ class IBooking(IBase, ABC):
         pass
 
     @abstractmethod
-    async def list_active(self) -> List[Booking]:
+    async def list_active(self, current_time: Optional[datetime] = None) -> List[Booking]:
         """Все активные (текущие) бронирования"""
         pass
 
+    @abstractmethod
+    async def list_active_place_ids(self, current_time: datetime, zone_id: Optional[int] = None) -> Set[int]:
+        """ID мест с активным бронированием на указанный момент"""
+        pass
+
     @abstractmethod
     async def list_by_status(self, status_id: int) -> List[Booking]:
         """Фильтрация бронирований по статусу"""
 
+    @abstractmethod
+    async def create_with_place_status(self, booking: Booking, place_status_id: Optional[int] = None) -> Booking:
+        """Создание брони вместе со сменой статуса места; при пересечении - BookingConflictError"""
+        pass
+
+    @abstractmethod
+    async def finish(self, booking_id: int, finished_at: datetime) -> Optional[Any]:
+        """Завершение брони с освобождением места и расчетом стоимости; None - если брони нет или она завершена"""
+        pass
+
     @abstractmethod
     async def has_overlapping_booking(self, parking_place_id: int, start_time: datetime, end_time: datetime) -> bool:
         pass
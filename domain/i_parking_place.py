@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from domain.models import ParkingPlace
 from domain.i_base import IBase
 from infrastructure.repositories.base import BaseRepository
@@ -17,6 +17,21 @@ class IParkingPlace(BaseRepository, ABC):
     async def list_by_zone(self, zone_id: int) -> List[ParkingPlace]:
         pass
 
+    @abstractmethod
+    async def list_occupancy(self) -> List[Tuple[int, int, int, Optional[int]]]:
+        """Все места одним запросом: (place_id, zone_id, place_number, place_status_id)"""
+        pass
+
+    @abstractmethod
+    async def reconcile_occupancy_cache(self) -> int:
+        """Сверить кэш занятости с БД, вернуть число исправленных мест"""
+        pass
+
+    @abstractmethod
+    async def update_status(self, place_id: int, status_id: int) -> Optional[ParkingPlace]:
+        """Обновить статус места одним UPDATE; None, если места нет"""
+        pass
+
     @abstractmethod
     async def list_by_status(self, status_id: int) -> List[ParkingPlace]:
         pass
\ No newline at end of file
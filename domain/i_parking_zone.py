@@ -1,5 +1,5 @@
 from typing import List, Optional, Dict, Tuple
-from domain.models import ParkingZone, ParkingPlace
+from domain.models import ParkingZone, ParkingPlace, ZoneType
 from domain.i_base import IBase
 from abc import abstractmethod
 
@@ -12,9 +12,30 @@ class IParkingZone(IBase):
     async def list_by_type(self, type_id: int) -> List[ParkingZone]:
         pass
         
+    @abstractmethod
+    async def get_zone_detailed(self, zone_id: int) -> Optional[Tuple[ParkingZone, ZoneType, int, int, int, int]]:
+        """Получить зону с типом и счетчиками мест и камер
+        
+        Returns:
+            (зона, тип, всего мест, свободно, занято, камер) или None, если зоны нет
+        """
+        pass
+
+    @abstractmethod
+    async def get_zones_detailed(self, zone_ids: List[int]) -> List[Tuple[ParkingZone, ZoneType, int, int, int, int]]:
+        """Получить детальную информацию сразу по нескольким зонам одним запросом
+        
+        Несуществующие зоны в результат не попадают
+        """
+        pass
+
     @abstractmethod
     async def get_places_by_zone(self, zone_id: int) -> List[Tuple[ParkingPlace, Dict]]:
-        """Получить все парковочные места в зоне с их координатами"""
+        """Получить все парковочные места в зоне с их координатами и камерой одним запросом
+        
+        Returns:
+            Список кортежей (место, {"location": координаты, "camera_id": ID камеры})
+        """
         pass
         
     @abstractmethod
@@ -25,6 +46,6 @@ class IParkingZone(IBase):
             place_status_updates: Словарь {place_id: status_id}
             
         Returns:
-            Количество обновленных мест
+            Количество мест, статус которых действительно изменился
         """
         pass
\ No newline at end of file
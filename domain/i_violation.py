@@ -9,6 +9,11 @@ class IViolation(IBase):
     async def list_by_place(self, place_id: int) -> List[Violation]:
         pass
 
+    @abstractmethod
+    async def has_recent_violation(self, place_id: int, car_number: str, since: datetime) -> bool:
+        """Есть ли нарушение этого автомобиля на месте начиная с момента since"""
+        pass
+
     @abstractmethod
     async def list_by_date_range(self, start: datetime, end: datetime) -> List[Violation]:
         pass
\ No newline at end of file
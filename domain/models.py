@@ -1,5 +1,5 @@
-from sqlalchemy import (Column, Integer, String, DateTime, Time, Float, ForeignKey)
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import (Column, Integer, String, DateTime, Time, Float, ForeignKey, Index, text, func)
+from sqlalchemy.dialects.postgresql import JSONB, ExcludeConstraint
 from sqlalchemy.orm import relationship, declarative_base
 
 
@@ -63,6 +63,24 @@ class Booking(Base):
     status = relationship("BookingStatus", back_populates="bookings")
     parking_place = relationship("ParkingPlace", back_populates="bookings")
 
+    __table_args__ = (
+        # Проверка пересечений и активные брони конкретного места
+        Index("ix_bookings_place_status_period", "parking_place_id", "booking_status_id", "start_time", "end_time"),
+        # Активные брони по времени: list_active, автоматизация статусов, завершение просроченных
+        Index("ix_bookings_active_start_end", "start_time", "end_time", postgresql_where=text("booking_status_id = 1")),
+        Index("ix_bookings_active_end", "end_time", postgresql_where=text("booking_status_id = 1")),
+        Index("ix_bookings_car_user_id", "car_user_id"),
+        # Активные брони одного места не пересекаются по времени (нужно расширение btree_gist).
+        # Бронь без времени окончания занимает место бессрочно
+        ExcludeConstraint(
+            (parking_place_id, "="),
+            (func.tsrange(start_time, end_time), "&&"),
+            name="bookings_no_overlap",
+            using="gist",
+            where=text("booking_status_id = 1"),
+        ),
+    )
+
 
 class PlaceStatus(Base):
     __tablename__ = "place_statuses"
@@ -125,6 +143,10 @@ class Camera(Base):
     parking_zone = relationship("ParkingZone", back_populates="cameras")
     camera_places = relationship("CameraParkingPlace", back_populates="camera", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_cameras_parking_zone_id", "parking_zone_id"),
+    )
+
 
 class CameraParkingPlace(Base):
     __tablename__ = "camera_parking_places"
@@ -137,6 +159,11 @@ class CameraParkingPlace(Base):
     camera = relationship("Camera", back_populates="camera_places")
     parking_place = relationship("ParkingPlace", back_populates="camera_places")
 
+    __table_args__ = (
+        Index("ix_camera_parking_places_camera_id", "camera_id"),
+        Index("ix_camera_parking_places_parking_place_id", "parking_place_id"),
+    )
+
 
 class ParkingPlace(Base):
     __tablename__ = "parking_places"
@@ -152,6 +179,10 @@ class ParkingPlace(Base):
     bookings = relationship("Booking", back_populates="parking_place", cascade="all, delete-orphan")
     violations = relationship("Violation", back_populates="parking_place", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_parking_places_zone_status", "parking_zone_id", "place_status_id"),
+    )
+
 
 class Violation(Base):
     __tablename__ = "violations"
@@ -163,6 +194,12 @@ class Violation(Base):
 
     parking_place = relationship("ParkingPlace", back_populates="violations")
 
+    __table_args__ = (
+        # Поиск недавнего нарушения того же автомобиля на месте
+        Index("ix_violations_place_car_timestamp", "parking_place_id", "car_number", "timestamp"),
+        Index("ix_violations_timestamp", "timestamp"),
+    )
+
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
@@ -1,29 +1,253 @@
-from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Any
+import asyncio
+import itertools
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncGenerator, Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
 
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+# Сессия и отложенные колбэки текущего unit of work (общие для всех репозиториев внутри него)
+_current_session: ContextVar[Optional[AsyncSession]] = ContextVar("current_session", default=None)
+_after_commit: ContextVar[Optional[List[Callable[[], Any]]]] = ContextVar("after_commit", default=None)
+# Принудительное чтение с основной БД (read-your-writes)
+_pinned_primary: ContextVar[bool] = ContextVar("pinned_primary", default=False)
+
+REPLICA_STRATEGIES = ("round_robin", "least_connections")
+
+T = TypeVar("T")
+
+
+class _Replica:
+    def __init__(self, url: str, session_factory: async_sessionmaker, engine) -> None:
+        self.url = url
+        self.engine = engine
+        self.session_factory = session_factory
+        self.in_flight = 0
+        self.sessions = 0
+
 
 class Database:
-    def __init__(self, url: str) -> None:
-        self._async_engine = create_async_engine(
-            url=url,
-            pool_pre_ping=False,
+    def __init__(
+        self,
+        url: str,
+        pool_size: int = 10,
+        max_overflow: int = 20,
+        pool_recycle: int = 1800,
+        pool_timeout: float = 30,
+        pool_pre_ping: bool = False,
+        statement_cache_size: int = 100,
+        replica_urls: Optional[List[str]] = None,
+        replica_strategy: str = "round_robin",
+    ) -> None:
+        if replica_strategy not in REPLICA_STRATEGIES:
+            raise ValueError(f"Unknown replica strategy {replica_strategy!r}, expected one of {REPLICA_STRATEGIES}")
+
+        engine_options = dict(
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_recycle=pool_recycle,
+            pool_timeout=pool_timeout,
+            pool_pre_ping=pool_pre_ping,
+            statement_cache_size=statement_cache_size,
         )
+        self._async_engine = self._create_engine(url, **engine_options)
         self._async_session = async_sessionmaker(
             bind=self._async_engine,
             expire_on_commit=False,
         )
 
+        # Реплики используются только для read_only сессий вне unit of work
+        self._replicas: List[_Replica] = []
+        for replica_url in replica_urls or []:
+            engine = self._create_engine(replica_url, **engine_options)
+            self._replicas.append(_Replica(
+                url=make_url(replica_url).render_as_string(hide_password=True),
+                session_factory=async_sessionmaker(bind=engine, expire_on_commit=False),
+                engine=engine,
+            ))
+        self._replica_strategy = replica_strategy
+        self._round_robin = itertools.count()
+        # Фиксация транзакции с колбэками after_commit и их выполнение идут под одним замком:
+        # кэши (write-through) получают изменения в том же порядке, в котором они зафиксированы
+        self._commit_lock = asyncio.Lock()
+        self._primary_reads = 0
+        self._primary_writes = 0
+        self._units_of_work = 0
+
+    @staticmethod
+    def _create_engine(url: str, statement_cache_size: int, **pool_options):
+        engine_kwargs = {}
+        if url.startswith("postgresql+asyncpg"):
+            # Кэш подготовленных выражений asyncpg; 0 - при работе через pgbouncer в режиме transaction
+            engine_kwargs["connect_args"] = {"statement_cache_size": statement_cache_size}
+        if url.startswith("sqlite"):
+            # SQLite (например, в локальных проверках) не использует пул соединений с параметрами
+            pool_options = {"pool_pre_ping": pool_options["pool_pre_ping"]}
+        return create_async_engine(url=url, **pool_options, **engine_kwargs)
+
     @asynccontextmanager
-    async def get_session(self) -> AsyncGenerator[AsyncSession, Any]:
+    async def get_session(self, read_only: bool = False, allow_replica: bool = True) -> AsyncGenerator[AsyncSession, Any]:
+        """Сессия для одной операции репозитория.
+
+        Внутри unit_of_work возвращается его общая сессия, фиксация происходит при выходе
+        из unit_of_work. Иначе открывается своя сессия: для записи она фиксируется при
+        успешном завершении (колбэки after_commit, зарегистрированные внутри блока,
+        выполняются сразу после фиксации), для чтения (read_only) - только закрывается.
+        При ошибке транзакция откатывается.
+
+        Чтение вне unit_of_work уходит на реплику, если они настроены, чтение не
+        закреплено за основной БД (pin_primary) и allow_replica не выключен.
+        """
+        shared = _current_session.get()
+        if shared is not None:
+            yield shared
+            return
+
+        replica = None
+        if read_only and allow_replica and not _pinned_primary.get():
+            replica = self._choose_replica()
+
+        if replica is not None:
+            replica.in_flight += 1
+            replica.sessions += 1
+            session: AsyncSession = replica.session_factory()
+        else:
+            if read_only:
+                self._primary_reads += 1
+            else:
+                self._primary_writes += 1
+            session = self._async_session()
+
+        callbacks: List[Callable[[], Any]] = []
+        callbacks_token = None if read_only else _after_commit.set(callbacks)
+        try:
+            yield session
+            if not read_only:
+                await self._commit(session, callbacks)
+        except BaseException:
+            await session.rollback()
+            raise
+        finally:
+            if callbacks_token is not None:
+                _after_commit.reset(callbacks_token)
+            await session.close()
+            if replica is not None:
+                replica.in_flight -= 1
+
+    @asynccontextmanager
+    async def unit_of_work(self) -> AsyncGenerator[AsyncSession, Any]:
+        """Одна сессия и одна транзакция на все вызовы репозиториев внутри блока.
+
+        Сессия всегда открывается на основной БД, в том числе для чтений внутри блока:
+        проверки, по которым принимается решение о записи, видят актуальные данные.
+        Вложенный unit_of_work присоединяется к внешнему. Внутри блока не стоит
+        запускать конкурентные задачи, работающие с БД: сессия не потокобезопасна.
+        """
+        if _current_session.get() is not None:
+            yield _current_session.get()
+            return
+
+        self._units_of_work += 1
         session: AsyncSession = self._async_session()
+        callbacks: List[Callable[[], Any]] = []
+        session_token = _current_session.set(session)
+        callbacks_token = _after_commit.set(callbacks)
         try:
             yield session
-        except SQLAlchemyError:
+            await self._commit(session, callbacks)
+        except BaseException:
             await session.rollback()
             raise
         finally:
+            _current_session.reset(session_token)
+            _after_commit.reset(callbacks_token)
+            await session.close()
+
+    async def _commit(self, session: AsyncSession, callbacks: List[Callable[[], Any]]) -> None:
+        """Фиксация и колбэки after_commit.
+
+        Конкурирующие UPDATE одной строки упорядочены блокировкой строки в БД: второй
+        доходит до фиксации только после фиксации первого. Замок берется до COMMIT и
+        отпускается после колбэков, поэтому колбэки выполняются в порядке фиксаций.
+        """
+        if not callbacks:
+            await session.commit()
+            return
+        async with self._commit_lock:
             await session.commit()
-            await session.close()
\ No newline at end of file
+            for callback in callbacks:
+                callback()
+
+    @asynccontextmanager
+    async def snapshot_session(self, read_state: Callable[[], T]) -> AsyncGenerator[Tuple[AsyncSession, T], Any]:
+        """Сессия на основной БД с согласованным снимком данных для полной сверки кэша.
+
+        Снимок транзакции (REPEATABLE READ) берется под замком фиксаций, и там же
+        вызывается read_state: состояние кэша запоминается ровно на момент снимка.
+        Изменения транзакций с колбэками after_commit, зафиксированных после снимка,
+        видны по этому состоянию. Затем замок отпускается, и медленное чтение не
+        задерживает фиксации. Соединение берется до замка, чтобы ожидающие замка
+        записи не исчерпали пул.
+        """
+        async with self.get_session(read_only=True, allow_replica=False) as session:
+            if self._async_engine.dialect.name == "postgresql":
+                await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            else:
+                await session.connection()
+            async with self._commit_lock:
+                # Снимок REPEATABLE READ фиксируется первым запросом транзакции
+                await session.execute(select(1))
+                state = read_state()
+            yield session, state
+
+    @contextmanager
+    def pin_primary(self) -> Iterator[None]:
+        """Все чтения внутри блока выполняются на основной БД (read-your-writes)"""
+        token = _pinned_primary.set(True)
+        try:
+            yield
+        finally:
+            _pinned_primary.reset(token)
+
+    def _choose_replica(self) -> Optional[_Replica]:
+        if not self._replicas:
+            return None
+        if self._replica_strategy == "least_connections":
+            # При равной нагрузке начинаем со следующей по кругу реплики
+            offset = next(self._round_robin)
+            count = len(self._replicas)
+            return min(
+                (self._replicas[(offset + i) % count] for i in range(count)),
+                key=lambda replica: replica.in_flight,
+            )
+        return self._replicas[next(self._round_robin) % len(self._replicas)]
+
+    def get_routing_stats(self) -> Dict:
+        return {
+            "strategy": self._replica_strategy,
+            "primary": {
+                "reads": self._primary_reads,
+                "writes": self._primary_writes,
+                "units_of_work": self._units_of_work,
+            },
+            "replicas": [
+                {"url": replica.url, "reads": replica.sessions, "in_flight": replica.in_flight}
+                for replica in self._replicas
+            ],
+        }
+
+    def after_commit(self, callback: Callable[[], Any]) -> None:
+        """Выполнить callback после фиксации транзакции.
+
+        Внутри сессии на запись или unit_of_work callback откладывается до успешного
+        commit (при откате не вызывается); вне их транзакция уже зафиксирована и callback
+        вызывается сразу. Регистрировать колбэки write-through нужно внутри блока сессии,
+        иначе порядок их применения не гарантирован (см. _commit).
+        """
+        callbacks = _after_commit.get()
+        if callbacks is None:
+            callback()
+        else:
+            callbacks.append(callback)
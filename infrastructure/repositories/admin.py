@@ -8,11 +8,11 @@ from domain.models import Admin
 
 class AdminRepository(BaseRepository, IAdmin):
     async def get_by_name(self, admin_name: str) -> Optional[Admin]:
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(Admin).where(Admin.name == admin_name))
         return result.scalars().first()
         
     async def get_by_email(self, email: str) -> Optional[Admin]:
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(Admin).where(Admin.email == email))
             return result.scalars().first()
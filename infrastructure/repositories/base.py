@@ -1,3 +1,5 @@
+from typing import AsyncIterator, Optional
+
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -9,32 +11,58 @@ class BaseRepository(IBase):
     def __init__(self, db: Database):
         self.db = db
 
+    def unit_of_work(self):
+        """Одна транзакция для нескольких вызовов репозиториев (см. Database.unit_of_work)"""
+        return self.db.unit_of_work()
+
+    def pin_primary(self):
+        """Чтения внутри блока - с основной БД (см. Database.pin_primary)"""
+        return self.db.pin_primary()
+
     async def get_by_id(self, model, model_id: int):
         primary_key = model.__mapper__.primary_key[0]
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(model).where(primary_key == model_id))
         return result.scalars().first()
 
-    async def get_by_all(self, model):
-        async with self.db.get_session() as session:
-            result = await session.execute(select(model))
+    async def get_by_all(self, model, after_id: Optional[int] = None, limit: Optional[int] = None):
+        query = select(model)
+        if after_id is not None or limit is not None:
+            # Keyset-пагинация по первичному ключу: страница начинается после after_id
+            primary_key = model.__mapper__.primary_key[0]
+            query = query.order_by(primary_key)
+            if after_id is not None:
+                query = query.where(primary_key > after_id)
+            if limit is not None:
+                query = query.limit(limit)
+        async with self.db.get_session(read_only=True) as session:
+            result = await session.execute(query)
         return result.scalars().all()
 
+    async def stream_all(self, model, batch_size: int = 500) -> AsyncIterator:
+        """Все строки таблицы через серверный курсор пачками по batch_size"""
+        primary_key = model.__mapper__.primary_key[0]
+        query = select(model).order_by(primary_key).execution_options(yield_per=batch_size)
+        async with self.db.get_session(read_only=True) as session:
+            result = await session.stream_scalars(query)
+            async for instance in result:
+                yield instance
+
     async def save(self, instance):
         async with self.db.get_session() as session:
             session.add(instance)
-            await session.commit()
+            await session.flush()
             await session.refresh(instance)
         return instance
 
     async def update(self, instance):
         async with self.db.get_session() as session:
             merged_instance = await session.merge(instance)
-            await session.commit()
+            await session.flush()
             await session.refresh(merged_instance)
         return merged_instance
 
     async def delete(self, instance):
         async with self.db.get_session() as session:
             await session.delete(instance)
-            await session.commit()
+            await session.flush()
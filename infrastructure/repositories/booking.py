@@ -1,47 +1,73 @@
 from sqlalchemy.future import select
 from sqlalchemy import update
-from sqlalchemy import or_
+from sqlalchemy import or_, func, Integer
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Iterator, Optional, Set
 
+from domain.exceptions import BookingConflictError
 from domain.i_booking import IBooking
 from infrastructure.repositories.base import BaseRepository
+from infrastructure.repositories.parking_place import OCCUPANCY_COLUMNS
+from infrastructure.utils.occupancy_cache import occupancy_cache
 from domain.models import Booking, CarUser, ParkingPlace, ParkingZone, BookingStatus, Car
 
+# SQLSTATE нарушения ограничения-исключения (bookings_no_overlap)
+EXCLUSION_VIOLATION = "23P01"
+
 class BookingRepository(BaseRepository, IBooking):
     async def list_by_user(self, user_id: int):
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(Booking).where(Booking.user_id == user_id))
         return result.scalars().all()
 
     async def list_by_place(self, place_id: int):
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(Booking).where(Booking.parking_place_id == place_id))
         return result.scalars().all()
 
     async def list_by_date_range(self, start: datetime, end: datetime):
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(Booking).where(Booking.start_time.between(start, end)))
         return result.scalars().all()
 
-    async def list_active(self):
-        now = datetime.utcnow()
-        async with self.db.get_session() as session:
-            stmt = select(Booking).where(
-                Booking.booking_status_id == 1,
-                Booking.start_time <= now,
-                or_(Booking.end_time >= now, Booking.end_time.is_(None))
-            )
+    @staticmethod
+    def _active_at(now: datetime):
+        """Условия активного бронирования: статус "активно" и now попадает в интервал брони"""
+        return (
+            Booking.booking_status_id == 1,
+            Booking.start_time <= now,
+            or_(Booking.end_time >= now, Booking.end_time.is_(None))
+        )
+
+    async def list_active(self, current_time: Optional[datetime] = None):
+        now = current_time or datetime.utcnow()
+        async with self.db.get_session(read_only=True) as session:
+            stmt = select(Booking).where(*self._active_at(now))
             result = await session.execute(stmt)
         return result.scalars().all()
 
+    async def list_active_place_ids(self, current_time: datetime, zone_id: Optional[int] = None) -> Set[int]:
+        """ID мест с активным бронированием на момент current_time (опционально только в одной зоне)"""
+        async with self.db.get_session(read_only=True) as session:
+            stmt = select(Booking.parking_place_id).where(*self._active_at(current_time)).distinct()
+            if zone_id is not None:
+                stmt = stmt.join(
+                    ParkingPlace, Booking.parking_place_id == ParkingPlace.id
+                ).where(ParkingPlace.parking_zone_id == zone_id)
+            result = await session.execute(stmt)
+        return set(result.scalars().all())
+
     async def list_by_status(self, status_id: int):
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(Booking).where(Booking.booking_status_id == status_id))
         return result.scalars().all()
         
     async def get_detailed_by_user(self, user_id: int):
         """Получение детальной информации по всем бронированиям пользователя"""
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             # Создаем сложный запрос для получения всех необходимых данных в одной выборке
             stmt = select(
                 Booking,
@@ -69,7 +95,7 @@ class BookingRepository(BaseRepository, IBooking):
             
     async def get_zone_by_place_id(self, place_id: int):
         """Получение информации о зоне парковки по идентификатору места"""
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             stmt = select(ParkingZone).join(
                 ParkingPlace, ParkingZone.id == ParkingPlace.parking_zone_id
             ).where(ParkingPlace.id == place_id)
@@ -77,6 +103,99 @@ class BookingRepository(BaseRepository, IBooking):
             result = await session.execute(stmt)
             return result.scalar_one_or_none()
 
+    async def create_with_place_status(self, booking: Booking, place_status_id: Optional[int] = None) -> Booking:
+        """Вставка брони и (если place_status_id задан) смена статуса места в одной транзакции.
+
+        Пересечение с активными бронями проверяет ограничение bookings_no_overlap,
+        отдельный запрос на проверку не нужен. При конфликте - BookingConflictError.
+        """
+        changed = []
+        with self._overlap_as_conflict(booking):
+            async with self.db.get_session() as session:
+                session.add(booking)
+                await session.flush()
+                if place_status_id is not None:
+                    stmt = update(ParkingPlace).where(
+                        ParkingPlace.id == booking.parking_place_id
+                    ).values(place_status_id=place_status_id).returning(*OCCUPANCY_COLUMNS)
+                    result = await session.execute(stmt)
+                    changed = result.all()
+                self.db.after_commit(lambda: occupancy_cache.upsert_places(changed))
+        return booking
+
+    async def update(self, instance: Booking) -> Booking:
+        """Обновление брони; пересечение с активной бронью места - BookingConflictError"""
+        with self._overlap_as_conflict(instance):
+            return await super().update(instance)
+
+    @staticmethod
+    @contextmanager
+    def _overlap_as_conflict(booking: Booking) -> Iterator[None]:
+        """Нарушение bookings_no_overlap превращается в BookingConflictError"""
+        try:
+            yield
+        except IntegrityError as e:
+            if getattr(e.orig, "pgcode", None) == EXCLUSION_VIOLATION:
+                raise BookingConflictError(
+                    f"Parking place {booking.parking_place_id} is already booked for the requested time"
+                ) from e
+            raise
+
+    async def finish(self, booking_id: int, finished_at: datetime) -> Optional[Row]:
+        """Завершение брони, освобождение места и расчет стоимости одним запросом.
+
+        UPDATE bookings ... RETURNING и UPDATE parking_places в CTE, цена зоны - через join.
+        Условие end_time IS NULL защищает от повторного завершения: параллельный запрос
+        дождется блокировки строки, перепроверит условие и ничего не изменит.
+        Возвращает строку (id, start_time, end_time, duration_minutes, price_per_minute,
+        total_price) или None, если брони нет или она уже завершена.
+        """
+        finished = update(Booking).where(
+            Booking.id == booking_id,
+            Booking.end_time.is_(None)
+        ).values(
+            end_time=finished_at,
+            booking_status_id=2  # Завершено
+        ).returning(
+            Booking.id, Booking.start_time, Booking.end_time, Booking.parking_place_id
+        ).cte("finished")
+
+        freed = update(ParkingPlace).where(
+            ParkingPlace.id == finished.c.parking_place_id
+        ).values(
+            place_status_id=1  # Свободно
+        ).returning(*OCCUPANCY_COLUMNS).cte("freed")
+
+        # Минимальная оплата - за 1 минуту, неполная минута не учитывается
+        duration_minutes = func.greatest(
+            1, func.floor(func.extract("epoch", finished.c.end_time - finished.c.start_time) / 60)
+        ).cast(Integer)
+
+        stmt = select(
+            finished.c.id,
+            finished.c.start_time,
+            finished.c.end_time,
+            duration_minutes.label("duration_minutes"),
+            ParkingZone.price_per_minute,
+            (ParkingZone.price_per_minute * duration_minutes).label("total_price"),
+            freed.c.id.label("place_id"),
+            freed.c.parking_zone_id,
+            freed.c.place_number,
+            freed.c.place_status_id,
+        ).select_from(finished).join(
+            freed, freed.c.id == finished.c.parking_place_id
+        ).join(
+            ParkingZone, ParkingZone.id == freed.c.parking_zone_id
+        )
+
+        async with self.db.get_session() as session:
+            result = await session.execute(stmt)
+            row = result.first()
+            if row is not None:
+                place_row = (row.place_id, row.parking_zone_id, row.place_number, row.place_status_id)
+                self.db.after_commit(lambda: occupancy_cache.upsert_places([place_row]))
+        return row
+
     async def complete_expired_bookings(self) -> None:
         now = datetime.utcnow()
         async with self.db.get_session() as session:
@@ -86,10 +205,9 @@ class BookingRepository(BaseRepository, IBooking):
             ).values(booking_status_id=2)  # Completed status
             
             await session.execute(stmt)
-            await session.commit()
 
     async def has_overlapping_booking(self, parking_place_id: int, start_time: datetime, end_time: datetime) -> bool:
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             stmt = select(Booking.id).where(
                 Booking.parking_place_id == parking_place_id,
                 Booking.booking_status_id == 1,  # Active bookings
@@ -6,6 +6,6 @@ from domain.models import Camera
 
 class CameraRepository(BaseRepository, ICamera):
     async def list_by_zone(self, zone_id: int):
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(Camera).where(Camera.parking_zone_id == zone_id))
         return result.scalars().all()
\ No newline at end of file
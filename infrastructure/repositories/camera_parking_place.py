@@ -6,17 +6,17 @@ from domain.models import CameraParkingPlace, Camera
 
 class CameraParkingPlaceRepository(BaseRepository, ICameraParkingPlace):
     async def list_places_by_camera(self, camera_id: int):
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(CameraParkingPlace).where(CameraParkingPlace.camera_id == camera_id))
         return result.scalars().all()
 
     async def list_cameras_by_place(self, place_id: int):
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(CameraParkingPlace).where(CameraParkingPlace.parking_place_id == place_id))
         return result.scalars().all()
 
     async def list_places_by_zone(self, zone_id: int):
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             # Use selectinload to eagerly load the parking_place relationship
             from sqlalchemy.orm import selectinload
             result = await session.execute(
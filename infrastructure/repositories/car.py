@@ -6,6 +6,6 @@ from domain.models import Car
 
 class CarRepository(BaseRepository, ICar):
     async def get_by_number(self, number: str):
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(Car).where(Car.number == number))
         return result.scalars().first()
\ No newline at end of file
@@ -1,22 +1,57 @@
+from typing import List, Optional
 from sqlalchemy.future import select
 from sqlalchemy import update
 from datetime import datetime
 
 from domain.i_parking_place import IParkingPlace
 from infrastructure.repositories.base import BaseRepository
+from infrastructure.utils.occupancy_cache import occupancy_cache, PlaceRow
 from domain.models import ParkingPlace, Booking
 
+# Колонки, которые возвращаются из UPDATE ... RETURNING для обновления кэша занятости
+OCCUPANCY_COLUMNS = (
+    ParkingPlace.id,
+    ParkingPlace.parking_zone_id,
+    ParkingPlace.place_number,
+    ParkingPlace.place_status_id,
+)
+
+
 class ParkingPlaceRepository(IParkingPlace):
     async def list_by_zone(self, zone_id: int):
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(ParkingPlace).where(ParkingPlace.parking_zone_id == zone_id))
         return result.scalars().all()
 
     async def list_by_status(self, status_id: int):
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(ParkingPlace).where(ParkingPlace.place_status_id == status_id))
         return result.scalars().all()
 
+    async def list_occupancy(self) -> List[PlaceRow]:
+        async with self.db.get_session(read_only=True) as session:
+            result = await session.execute(
+                select(*OCCUPANCY_COLUMNS).order_by(ParkingPlace.parking_zone_id, ParkingPlace.id)
+            )
+        return [tuple(row) for row in result.all()]
+
+    async def update_status(self, place_id: int, status_id: int) -> Optional[ParkingPlace]:
+        async with self.db.get_session() as session:
+            stmt = (
+                update(ParkingPlace)
+                .where(ParkingPlace.id == place_id)
+                .values(place_status_id=status_id)
+                .returning(ParkingPlace)
+                # populate_existing: внутри unit of work место может уже лежать в identity map
+                .execution_options(synchronize_session=False, populate_existing=True)
+            )
+            result = await session.execute(stmt)
+            place = result.scalars().first()
+            if place:
+                row = self._occupancy_row(place)
+                self.db.after_commit(lambda: occupancy_cache.upsert_places([row]))
+        return place
+
     async def free_up_expired_booking_places(self) -> None:
         now = datetime.utcnow()
         async with self.db.get_session() as session:
@@ -28,10 +63,11 @@ class ParkingPlaceRepository(IParkingPlace):
             stmt = update(ParkingPlace).where(
                 ParkingPlace.id.in_(select(subquery)),
                 ParkingPlace.place_status_id == 2
-            ).values(place_status_id=1)
-            
-            await session.execute(stmt)
-            await session.commit()
+            ).values(place_status_id=1).returning(*OCCUPANCY_COLUMNS)
+
+            result = await session.execute(stmt)
+            changed = result.all()
+            self.db.after_commit(lambda: occupancy_cache.upsert_places(changed))
 
     async def occupy_started_booking_places(self) -> None:
         now = datetime.utcnow()
@@ -45,7 +81,45 @@ class ParkingPlaceRepository(IParkingPlace):
             stmt = update(ParkingPlace).where(
                 ParkingPlace.id.in_(select(subquery)),
                 ParkingPlace.place_status_id == 1
-            ).values(place_status_id=2)
-            
-            await session.execute(stmt)
-            await session.commit()
\ No newline at end of file
+            ).values(place_status_id=2).returning(*OCCUPANCY_COLUMNS)
+
+            result = await session.execute(stmt)
+            changed = result.all()
+            self.db.after_commit(lambda: occupancy_cache.upsert_places(changed))
+
+    async def reconcile_occupancy_cache(self) -> int:
+        """Сверить кэш занятости с БД по снимку Database.snapshot_session.
+
+        Версии зон запоминаются на момент снимка: зоны, изменившиеся после него, не сверяются.
+        """
+        async with self.db.snapshot_session(occupancy_cache.versions) as (session, versions):
+            result = await session.execute(
+                select(*OCCUPANCY_COLUMNS).order_by(ParkingPlace.parking_zone_id, ParkingPlace.id)
+            )
+            rows = [tuple(row) for row in result.all()]
+        return occupancy_cache.reconcile(rows, versions)
+
+    # Запись и колбэк кэша - в одном unit of work, чтобы колбэк выполнился при фиксации
+    async def save(self, instance):
+        async with self.db.unit_of_work():
+            instance = await super().save(instance)
+            row = self._occupancy_row(instance)
+            self.db.after_commit(lambda: occupancy_cache.upsert_places([row]))
+        return instance
+
+    async def update(self, instance):
+        async with self.db.unit_of_work():
+            instance = await super().update(instance)
+            row = self._occupancy_row(instance)
+            self.db.after_commit(lambda: occupancy_cache.upsert_places([row]))
+        return instance
+
+    async def delete(self, instance):
+        async with self.db.unit_of_work():
+            await super().delete(instance)
+            place_id = instance.id
+            self.db.after_commit(lambda: occupancy_cache.remove_place(place_id))
+
+    @staticmethod
+    def _occupancy_row(place: ParkingPlace) -> PlaceRow:
+        return place.id, place.parking_zone_id, place.place_number, place.place_status_id
@@ -1,116 +1,131 @@
-from typing import List, Tuple, Dict
+from typing import List, Optional, Tuple, Dict
 
 from sqlalchemy.future import select
-from sqlalchemy import and_, func, update
+from sqlalchemy import func, update
 from sqlalchemy.orm import joinedload
 
 from domain.i_parking_zone import IParkingZone
 from infrastructure.repositories.base import BaseRepository
-from domain.models import ParkingZone, ParkingPlace, Camera, ZoneType, PlaceStatus, CameraParkingPlace
+from infrastructure.repositories.parking_place import OCCUPANCY_COLUMNS
+from infrastructure.utils.occupancy_cache import occupancy_cache
+from domain.models import ParkingZone, ParkingPlace, Camera, ZoneType, CameraParkingPlace
 
 class ParkingZoneRepository(BaseRepository, IParkingZone):
     async def list_by_admin(self, admin_id: int):
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(ParkingZone).where(ParkingZone.admin_id == admin_id))
         return result.scalars().all()
 
     async def list_by_type(self, type_id: int):
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(ParkingZone).where(ParkingZone.zone_type_id == type_id))
         return result.scalars().all()
 
-    async def get_zone_detailed(self, zone_id: int) -> Tuple[ParkingZone, ZoneType, int, int, int, int]:
-        async with self.db.get_session() as session:
-            zone_query = select(ParkingZone, ZoneType).join(
-                ZoneType, ParkingZone.zone_type_id == ZoneType.id
-            ).where(ParkingZone.id == zone_id)
-            zone_result = await session.execute(zone_query)
-            zone_data = zone_result.first()
-            
-            if not zone_data:
-                return None
-
-            zone, zone_type = zone_data
+    async def get_zone_detailed(self, zone_id: int) -> Optional[Tuple[ParkingZone, ZoneType, int, int, int, int]]:
+        result = await self.get_zones_detailed([zone_id])
+        return result[0] if result else None
 
-            places_query = select(func.count(ParkingPlace.id)).where(ParkingPlace.parking_zone_id == zone_id)
-            total_places = await session.execute(places_query)
-            total_places = total_places.scalar() or 0
+    async def get_zones_detailed(self, zone_ids: List[int]) -> List[Tuple[ParkingZone, ZoneType, int, int, int, int]]:
+        if not zone_ids:
+            return []
 
-            free_places_query = select(func.count(ParkingPlace.id)).join(
-                PlaceStatus, ParkingPlace.place_status_id == PlaceStatus.id
-            ).where(
-                and_(
-                    ParkingPlace.parking_zone_id == zone_id,
-                    PlaceStatus.status_name == "Свободно"
-                )
+        # Счетчики мест по зонам считаются одним проходом по parking_places
+        places_stats = (
+            select(
+                ParkingPlace.parking_zone_id.label("zone_id"),
+                func.count().label("total_places"),
+                func.count().filter(ParkingPlace.place_status_id == 1).label("free_places"),  # 1 - Свободно
+                func.count().filter(ParkingPlace.place_status_id == 2).label("occupied_places"),  # 2 - Занято
+            )
+            .where(ParkingPlace.parking_zone_id.in_(zone_ids))
+            .group_by(ParkingPlace.parking_zone_id)
+            .subquery()
+        )
+        cameras_stats = (
+            select(
+                Camera.parking_zone_id.label("zone_id"),
+                func.count().label("total_cameras"),
             )
-            free_places = await session.execute(free_places_query)
-            free_places = free_places.scalar() or 0
+            .where(Camera.parking_zone_id.in_(zone_ids))
+            .group_by(Camera.parking_zone_id)
+            .subquery()
+        )
 
-            occupied_places_query = select(func.count(ParkingPlace.id)).join(
-                PlaceStatus, ParkingPlace.place_status_id == PlaceStatus.id
-            ).where(
-                and_(
-                    ParkingPlace.parking_zone_id == zone_id,
-                    PlaceStatus.status_name == "Занято"
-                )
+        query = (
+            select(
+                ParkingZone,
+                ZoneType,
+                func.coalesce(places_stats.c.total_places, 0),
+                func.coalesce(places_stats.c.free_places, 0),
+                func.coalesce(places_stats.c.occupied_places, 0),
+                func.coalesce(cameras_stats.c.total_cameras, 0),
             )
-            occupied_places = await session.execute(occupied_places_query)
-            occupied_places = occupied_places.scalar() or 0
+            .join(ZoneType, ParkingZone.zone_type_id == ZoneType.id)
+            .outerjoin(places_stats, places_stats.c.zone_id == ParkingZone.id)
+            .outerjoin(cameras_stats, cameras_stats.c.zone_id == ParkingZone.id)
+            .where(ParkingZone.id.in_(zone_ids))
+            .order_by(ParkingZone.id)
+        )
 
-            cameras_query = select(func.count(Camera.id)).where(Camera.parking_zone_id == zone_id)
-            total_cameras = await session.execute(cameras_query)
-            total_cameras = total_cameras.scalar() or 0
+        async with self.db.get_session(read_only=True) as session:
+            result = await session.execute(query)
+            return [tuple(row) for row in result.all()]
 
-            return zone, zone_type, total_places, free_places, occupied_places, total_cameras
-            
     async def get_places_by_zone(self, zone_id: int) -> List[Tuple[ParkingPlace, Dict]]:
-        """Получить все парковочные места в зоне с их координатами"""
-        async with self.db.get_session() as session:
-            # Получаем все места в зоне
-            places_query = select(ParkingPlace).where(ParkingPlace.parking_zone_id == zone_id)
-            places_result = await session.execute(places_query)
-            parking_places = places_result.scalars().all()
-            
-            result = []
+        """Получить все парковочные места в зоне с их координатами и камерой"""
+        async with self.db.get_session(read_only=True) as session:
+            # Одним запросом (LEFT JOIN) получаем места вместе с привязкой к камере;
+            # если место видят несколько камер, берем первую привязку (DISTINCT ON)
+            query = (
+                select(ParkingPlace, CameraParkingPlace.camera_id, CameraParkingPlace.location)
+                .outerjoin(CameraParkingPlace, CameraParkingPlace.parking_place_id == ParkingPlace.id)
+                .where(ParkingPlace.parking_zone_id == zone_id)
+                .distinct(ParkingPlace.id)
+                .order_by(ParkingPlace.id, CameraParkingPlace.id)
+            )
+            result = await session.execute(query)
             
-            # Для каждого места находим его координаты в таблице CameraParkingPlace
-            for place in parking_places:
-                camera_place_query = select(CameraParkingPlace).where(
-                    CameraParkingPlace.parking_place_id == place.id
-                )
-                camera_place_result = await session.execute(camera_place_query)
-                camera_place = camera_place_result.scalars().first()
-                
-                # Если есть связь с камерой, используем координаты из нее
-                location = None
-                if camera_place:
-                    location = camera_place.location
-                
-                result.append((place, {"location": location}))
-                
-            return result
+            return [
+                (place, {"location": location, "camera_id": camera_id})
+                for place, camera_id, location in result.all()
+            ]
     
     async def update_places_status(self, place_status_updates: Dict[int, int]) -> int:
-        """Обновить статусы парковочных мест"""
+        """Обновить статусы парковочных мест.
+        
+        Выполняется один UPDATE на каждый целевой статус; строки, у которых статус уже
+        совпадает, не перезаписываются. Возвращает количество реально измененных мест.
+        """
         if not place_status_updates:
             return 0
+        
+        # Группируем места по целевому статусу
+        places_by_status: Dict[int, List[int]] = {}
+        for place_id, status_id in place_status_updates.items():
+            places_by_status.setdefault(status_id, []).append(place_id)
             
-        updated_count = 0
+        changed = []
         async with self.db.get_session() as session:
-            for place_id, status_id in place_status_updates.items():
-                # Получаем место по ID
-                place_query = select(ParkingPlace).where(ParkingPlace.id == place_id)
-                place_result = await session.execute(place_query)
-                place = place_result.scalars().first()
-                
-                if place:
-                    # Обновляем статус
-                    place.place_status_id = status_id
-                    session.add(place)
-                    updated_count += 1
-            
-            # Сохраняем изменения
-            await session.commit()
-            
-        return updated_count
\ No newline at end of file
+            for status_id, place_ids in places_by_status.items():
+                stmt = (
+                    update(ParkingPlace)
+                    .where(
+                        ParkingPlace.id.in_(place_ids),
+                        ParkingPlace.place_status_id.is_distinct_from(status_id)
+                    )
+                    .values(place_status_id=status_id)
+                    .returning(*OCCUPANCY_COLUMNS)
+                    .execution_options(synchronize_session=False)
+                )
+                result = await session.execute(stmt)
+                changed.extend(result.all())
+            self.db.after_commit(lambda: occupancy_cache.upsert_places(changed))
+
+        return len(changed)
+
+    async def delete(self, instance):
+        async with self.db.unit_of_work():
+            await super().delete(instance)
+            # Места зоны удаляются каскадно
+            zone_id = instance.id
+            self.db.after_commit(lambda: occupancy_cache.drop_zone(zone_id))
@@ -7,13 +7,13 @@ import secrets
 from domain.i_unified_auth import IUnifiedAuth
 from domain.models import User, Admin, RefreshToken, AdminRefreshToken
 from infrastructure.repositories.base import BaseRepository
-from web.security import verify_password
+from web.security import verify_and_update_password
 from web.config import Configs
 
 
 class UnifiedAuthRepository(BaseRepository, IUnifiedAuth):
     async def verify_credentials(self, email: str, password: str, role: str) -> Optional[Union[User, Admin]]:
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             model = User if role == "user" else Admin
             
             result = await session.execute(select(model).where(model.email == email))
@@ -22,10 +22,19 @@ class UnifiedAuthRepository(BaseRepository, IUnifiedAuth):
             if not subject:
                 return None
                 
-            if not verify_password(password, subject.password):
-                return None
-                
-            return subject
+        verified, new_hash = await verify_and_update_password(password, subject.password)
+        if not verified:
+            return None
+
+        if new_hash:
+            # Хеш создан с устаревшими параметрами - сохраняем пересчитанный
+            async with self.db.get_session() as session:
+                await session.execute(
+                    update(model).where(model.id == subject.id).values(password=new_hash)
+                )
+            subject.password = new_hash
+            
+        return subject
     
     async def save_refresh_token(self, subject_id: int, role: str, token: str = None) -> str:
         if token is None:
@@ -59,12 +68,12 @@ class UnifiedAuthRepository(BaseRepository, IUnifiedAuth):
                 delete(model).where(fk_column)
             )
             session.add(new_token)
-            await session.commit()
+            await session.flush()
             
         return token
     
     async def get_refresh_token(self, subject_id: int, role: str) -> Optional[str]:
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True, allow_replica=False) as session:
             if role == "user":
                 model = RefreshToken
                 fk_column = RefreshToken.user_id == subject_id
@@ -88,7 +97,7 @@ class UnifiedAuthRepository(BaseRepository, IUnifiedAuth):
             return token_record.token
     
     async def validate_refresh_token(self, subject_id: int, role: str, token: str) -> bool:
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True, allow_replica=False) as session:
             if role == "user":
                 model = RefreshToken
                 fk_column = RefreshToken.user_id == subject_id
@@ -118,4 +127,3 @@ class UnifiedAuthRepository(BaseRepository, IUnifiedAuth):
             await session.execute(
                 delete(model).where(fk_column)
             )
-            await session.commit()
@@ -7,11 +7,22 @@ from domain.models import Violation
 
 class ViolationRepository(BaseRepository, IViolation):
     async def list_by_place(self, place_id: int):
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(Violation).where(Violation.parking_place_id == place_id))
         return result.scalars().all()
 
+    async def has_recent_violation(self, place_id: int, car_number: str, since: datetime) -> bool:
+        # По результату решается, создавать ли нарушение: отстающая реплика дала бы дубликат
+        async with self.db.get_session(read_only=True, allow_replica=False) as session:
+            stmt = select(Violation.id).where(
+                Violation.parking_place_id == place_id,
+                Violation.car_number == car_number,
+                Violation.timestamp >= since
+            ).limit(1)
+            result = await session.execute(stmt)
+        return result.scalar_one_or_none() is not None
+
     async def list_by_date_range(self, start: datetime, end: datetime):
-        async with self.db.get_session() as session:
+        async with self.db.get_session(read_only=True) as session:
             result = await session.execute(select(Violation).where(Violation.timestamp.between(start, end)))
         return result.scalars().all()
@@ -0,0 +1,122 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from web.config import Configs
+
+config = Configs()
+
+# Поля, которые не попадают в снимок субъекта
+_EXCLUDED_FIELDS = {"password"}
+
+
+class _Entry:
+    __slots__ = ("expires_at", "token_data", "model", "values", "subject_key")
+
+    def __init__(self, expires_at: float, token_data: Any, model: type, values: Dict[str, Any], subject_key: Tuple[str, int]):
+        self.expires_at = expires_at
+        self.token_data = token_data
+        self.model = model
+        self.values = values
+        self.subject_key = subject_key
+
+
+class AuthCache:
+    """LRU-кэш проверенных access токенов с TTL
+
+    Ключ - sha256 токена (сам токен в памяти не хранится). Значение - декодированные
+    TokenData и снимок колонок пользователя/администратора без пароля. Запись живет
+    не дольше ttl и не дольше exp токена. При выходе, изменении или удалении субъекта
+    его записи сбрасываются явно.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60, enabled: bool = True):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._by_subject: Dict[Tuple[str, int], Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Tuple[Any, Any]]:
+        """(token_data, субъект) из кэша; субъект - новый несвязанный с сессией экземпляр модели"""
+        if not self.enabled:
+            return None
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.time():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.token_data, entry.model(**entry.values)
+
+    def put(self, token: str, token_data: Any, subject: Any, role: str, token_exp: Optional[float] = None) -> None:
+        if not self.enabled:
+            return
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        values = {
+            column.key: getattr(subject, column.key)
+            for column in subject.__mapper__.column_attrs
+            if column.key not in _EXCLUDED_FIELDS
+        }
+        key = self._key(token)
+        subject_key = (role, subject.id)
+        self._remove(key)
+        self._entries[key] = _Entry(expires_at, token_data, type(subject), values, subject_key)
+        self._by_subject.setdefault(subject_key, set()).add(key)
+        while len(self._entries) > self.max_size:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def invalidate_token(self, token: str) -> None:
+        self._remove(self._key(token))
+
+    def invalidate_subject(self, role: str, subject_id: int) -> None:
+        for key in list(self._by_subject.get((role, subject_id), ())):
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_subject.clear()
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_subject.get(entry.subject_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_subject[entry.subject_key]
+
+
+auth_cache = AuthCache(
+    max_size=config.AUTH_CACHE_MAX_SIZE,
+    ttl=config.AUTH_CACHE_TTL_SECONDS,
+    enabled=config.AUTH_CACHE_ENABLED
+)
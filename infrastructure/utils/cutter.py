@@ -0,0 +1,172 @@
+import asyncio
+import multiprocessing
+import os
+import posixpath
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from infrastructure.utils.geometry_cache import PolygonGeometry, normalize_polygon
+from infrastructure.utils.place_crop import Layout, crop_places
+from infrastructure.utils.rabbitmq_utils import rabbitmq_client
+from infrastructure.utils.s3_utils import object_store
+from web.config import Configs
+from web.schemas import CutRequest, PlaceCut
+
+config = Configs()
+
+CUTTER_BACKENDS = ("rabbitmq", "local")
+
+class PlaceCutter(ABC):
+    """Нарезка снимка на изображения отдельных мест"""
+
+    @abstractmethod
+    async def cut(self, image_url: str, places: List[PlaceCut], image: Optional[bytes] = None,
+                  layout: Optional[Layout] = None) -> Dict[int, str]:
+        """Вырезать места из снимка image_url, вернуть {place_id: имя объекта с изображением места}.
+
+        Имена объектов передаются в Director и на классификацию без изменений.
+
+        image - уже загруженное содержимое снимка, если оно есть у вызывающего кода.
+        layout - уже разобранные полигоны тех же мест (например, из geometry_cache).
+        При таймауте выбрасывается asyncio.TimeoutError.
+        """
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class RabbitMQCutter(PlaceCutter):
+    """Внешний cutter_service: запрос через очередь cut_queue, вырезанные места он пишет в MinIO"""
+
+    def __init__(self, queue_name: str = "cut_queue", timeout: float = 30.0, prefix: str = "cut_images/"):
+        self.queue_name = queue_name
+        self.timeout = timeout
+        self.prefix = prefix
+
+    def _object_name(self, image_url: str) -> str:
+        """cutter_service отвечает URL изображения, объект лежит в cut_images/ под тем же именем файла"""
+        return self.prefix + posixpath.basename(image_url)
+
+    async def cut(self, image_url: str, places: List[PlaceCut], image: Optional[bytes] = None,
+                  layout: Optional[Layout] = None) -> Dict[int, str]:
+        request_id = str(uuid.uuid4())
+        cut_request = CutRequest(image_url=image_url, places=places)
+
+        # Оборачиваем в структуру с ключом "data", как ожидает Cutter сервис;
+        # ответ приходит в общую очередь ответов RabbitMQ-клиента
+        logger.info(f"Sending cut request for {len(places)} places to Cutter service, request_id: {request_id}")
+        result = await rabbitmq_client.call(
+            self.queue_name,
+            {"request_id": request_id, "data": cut_request.dict()},
+            timeout=self.timeout
+        )
+
+        if not result:
+            logger.error(f"Empty response from Cutter service, request_id: {request_id}")
+            return {}
+
+        logger.debug(f"Ответ от Cutter сервиса: {result}")
+        if isinstance(result, dict) and "error" in result:
+            logger.error(f"Error from Cutter service: {result['error']}")
+            return {}
+        if isinstance(result, dict) and "place_images" in result:
+            place_images = result.get("place_images", [])
+        elif isinstance(result, list):
+            place_images = result
+        elif isinstance(result, dict) and len(places) == 1:
+            # Прямой ответ с URL изображения для единственного места
+            place_images = [{"place_id": places[0].place_id, "image_url": result.get("image_url")}]
+        else:
+            logger.error(f"Unexpected Cutter service response format: {result}")
+            return {}
+
+        object_names = {}
+        for img_data in place_images:
+            if not isinstance(img_data, dict):
+                continue
+            place_id, image_url = img_data.get("place_id"), img_data.get("image_url")
+            if not place_id or not image_url or not posixpath.basename(image_url):
+                logger.warning(f"Invalid place image data: {place_id} {image_url}")
+                continue
+            object_names[place_id] = self._object_name(image_url)
+        return object_names
+
+
+class LocalCutter(PlaceCutter):
+    """Нарезка в пуле процессов внутри сервиса, без обращения к cutter_service
+
+    Вырезанные изображения записываются в хранилище объектов, так как Director
+    читает их оттуда по имени объекта. Имена постоянные для пары (снимок, место):
+    каждый цикл перезаписывает изображения прошлого, и они не накапливаются.
+    """
+
+    def __init__(self, workers: int, quality: int, prefix: str = "cut_images/"):
+        self.workers = workers or os.cpu_count() or 1
+        self.quality = quality
+        self.prefix = prefix
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @staticmethod
+    def _layout(places: List[PlaceCut]) -> Layout:
+        """Разметка из PlaceCut, когда вызывающий код не передал готовую (места без полигона пропускаются)"""
+        layout = []
+        for place in places:
+            points = normalize_polygon(place.location)
+            if points is not None:
+                geometry = PolygonGeometry(points)
+                layout.append((place.place_id, geometry.points, geometry.crop_box))
+        return tuple(layout)
+
+    def _object_name(self, image_url: str, place_id: int) -> str:
+        """cut_images/<имя снимка>/place_<id>.jpg - у каждой камеры свой снимок"""
+        snapshot = posixpath.splitext(image_url.strip("/"))[0].replace("/", "_")
+        return f"{self.prefix}{snapshot}/place_{place_id}.jpg"
+
+    async def cut(self, image_url: str, places: List[PlaceCut], image: Optional[bytes] = None,
+                  layout: Optional[Layout] = None) -> Dict[int, str]:
+        if image is None:
+            image = await object_store.get(image_url)
+        if self._executor is None:
+            # Пул создается при первом использовании, чтобы не запускать процессы при импорте.
+            # Процессы не форкаются от сервиса (потоки, соединения, event loop в родителе)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(_start_method()),
+            )
+
+        crops = await asyncio.get_running_loop().run_in_executor(
+            self._executor, crop_places, image, layout if layout is not None else self._layout(places), self.quality
+        )
+
+        object_names = {place_id: self._object_name(image_url, place_id) for place_id in crops}
+        await asyncio.gather(*(
+            object_store.put(object_names[place_id], data, content_type="image/jpeg")
+            for place_id, data in crops.items()
+        ))
+        logger.info(f"Cut {len(crops)} of {len(places)} places locally from {image_url}")
+        return object_names
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _start_method() -> str:
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def create_cutter() -> PlaceCutter:
+    if config.CUTTER_BACKEND not in CUTTER_BACKENDS:
+        raise ValueError(f"Unknown cutter backend {config.CUTTER_BACKEND!r}, expected one of {CUTTER_BACKENDS}")
+    if config.CUTTER_BACKEND == "local":
+        return LocalCutter(workers=config.CUTTER_LOCAL_WORKERS, quality=config.CUTTER_LOCAL_JPEG_QUALITY)
+    return RabbitMQCutter(timeout=config.CUTTER_TIMEOUT_SECONDS)
+
+
+place_cutter = create_cutter()
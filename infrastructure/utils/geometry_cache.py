@@ -0,0 +1,262 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+Point = Tuple[float, float]
+# (min_x, min_y, max_x, max_y)
+Bounds = Tuple[float, float, float, float]
+# (left, upper, right, lower) в целых пикселях - прямоугольник для вырезания места
+CropBox = Tuple[int, int, int, int]
+
+
+def normalize_polygon(location: Sequence) -> Optional[Tuple[Point, ...]]:
+    """Вершины полигона без повторяющей первую замыкающей точки; None - если координаты не разобрать"""
+    try:
+        points = tuple((float(point[0]), float(point[1])) for point in location)
+    except (TypeError, ValueError, IndexError, KeyError):
+        return None
+    if len(points) > 1 and points[0] == points[-1]:
+        points = points[:-1]
+    if len(points) < 3:
+        return None
+    return points
+
+
+def _segments_intersect(p1: Point, p2: Point, q1: Point, q2: Point) -> bool:
+    def orientation(a: Point, b: Point, c: Point) -> float:
+        return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+    def on_segment(a: Point, b: Point, c: Point) -> bool:
+        return min(a[0], b[0]) <= c[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= c[1] <= max(a[1], b[1])
+
+    d1 = orientation(q1, q2, p1)
+    d2 = orientation(q1, q2, p2)
+    d3 = orientation(p1, p2, q1)
+    d4 = orientation(p1, p2, q2)
+    if ((d1 > 0 > d2) or (d1 < 0 < d2)) and ((d3 > 0 > d4) or (d3 < 0 < d4)):
+        return True
+    return (
+        (d1 == 0 and on_segment(q1, q2, p1))
+        or (d2 == 0 and on_segment(q1, q2, p2))
+        or (d3 == 0 and on_segment(p1, p2, q1))
+        or (d4 == 0 and on_segment(p1, p2, q2))
+    )
+
+
+class PolygonGeometry:
+    """Разобранный полигон с предвычисленными характеристиками"""
+
+    __slots__ = ("points", "bounds", "area", "crop_box")
+
+    def __init__(self, points: Tuple[Point, ...]):
+        self.points = points
+        xs = [x for x, _ in points]
+        ys = [y for _, y in points]
+        self.bounds: Bounds = (min(xs), min(ys), max(xs), max(ys))
+        # Площадь по формуле шнурования
+        self.area = abs(sum(
+            x1 * y2 - x2 * y1
+            for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1])
+        )) / 2
+        self.crop_box: CropBox = (
+            max(0, int(self.bounds[0])), max(0, int(self.bounds[1])),
+            int(self.bounds[2]) + 1, int(self.bounds[3]) + 1
+        )
+
+    def edges(self) -> Iterable[Tuple[Point, Point]]:
+        return zip(self.points, self.points[1:] + self.points[:1])
+
+    def contains(self, x: float, y: float) -> bool:
+        """Точка внутри полигона (трассировка луча); точки на границе считаются внутренними"""
+        min_x, min_y, max_x, max_y = self.bounds
+        if not (min_x <= x <= max_x and min_y <= y <= max_y):
+            return False
+        inside = False
+        for (x1, y1), (x2, y2) in self.edges():
+            if _segments_intersect((x1, y1), (x2, y2), (x, y), (x, y)):
+                return True
+            if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+                inside = not inside
+        return inside
+
+    def overlap_area(self, other: "PolygonGeometry") -> float:
+        """Площадь пересечения с другим местом (отсечение Сазерленда - Ходжмана).
+
+        Точна, когда полигон other выпуклый (обычный случай для разметки мест);
+        общая граница соседних мест дает площадь 0.
+        """
+        a, b = self.bounds, other.bounds
+        if a[2] <= b[0] or b[2] <= a[0] or a[3] <= b[1] or b[3] <= a[1]:
+            return 0.0
+        # Знак ориентации отсекающего полигона: внутренняя сторона ребра зависит от обхода
+        orientation = 1.0 if sum(
+            x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in other.edges()
+        ) > 0 else -1.0
+
+        def inside(point: Point, edge_start: Point, edge_end: Point) -> bool:
+            return orientation * (
+                (edge_end[0] - edge_start[0]) * (point[1] - edge_start[1])
+                - (edge_end[1] - edge_start[1]) * (point[0] - edge_start[0])
+            ) >= 0
+
+        def intersection(p1: Point, p2: Point, edge_start: Point, edge_end: Point) -> Point:
+            dx, dy = p2[0] - p1[0], p2[1] - p1[1]
+            ex, ey = edge_end[0] - edge_start[0], edge_end[1] - edge_start[1]
+            t = (ex * (p1[1] - edge_start[1]) - ey * (p1[0] - edge_start[0])) / (ey * dx - ex * dy)
+            return p1[0] + t * dx, p1[1] + t * dy
+
+        polygon = list(self.points)
+        for edge_start, edge_end in other.edges():
+            if not polygon:
+                return 0.0
+            clipped = []
+            for current, following in zip(polygon, polygon[1:] + polygon[:1]):
+                current_inside = inside(current, edge_start, edge_end)
+                following_inside = inside(following, edge_start, edge_end)
+                if current_inside:
+                    clipped.append(current)
+                if current_inside != following_inside:
+                    clipped.append(intersection(current, following, edge_start, edge_end))
+            polygon = clipped
+        if len(polygon) < 3:
+            return 0.0
+        return abs(sum(
+            x1 * y2 - x2 * y1
+            for (x1, y1), (x2, y2) in zip(polygon, polygon[1:] + polygon[:1])
+        )) / 2
+
+
+class PlaceGeometry(PolygonGeometry):
+    """Полигон места на снимке камеры"""
+
+    __slots__ = ("link_id", "place_id")
+
+    def __init__(self, link_id: int, place_id: int, points: Tuple[Point, ...]):
+        super().__init__(points)
+        self.link_id = link_id
+        self.place_id = place_id
+
+
+class CameraGeometry:
+    """Полигоны всех мест одной камеры"""
+
+    def __init__(self, camera_id: int, places: List[PlaceGeometry]):
+        self.camera_id = camera_id
+        self.places = places
+        # Если место привязано к камере несколько раз, используется первая привязка
+        self._by_place: Dict[int, PlaceGeometry] = {}
+        for place in places:
+            self._by_place.setdefault(place.place_id, place)
+        self._overlaps: Optional[List[Tuple[int, int, float]]] = None
+
+    def place(self, place_id: int) -> Optional[PlaceGeometry]:
+        return self._by_place.get(place_id)
+
+    def locate(self, x: float, y: float) -> List[PlaceGeometry]:
+        """Места, полигон которых содержит точку (x, y)"""
+        return [place for place in self.places if place.contains(x, y)]
+
+    def overlaps(self, min_area: float = 1.0) -> List[Tuple[int, int, float]]:
+        """Пересекающиеся места (place_id, place_id, площадь пересечения); касание границами
+        не считается. Вычисляется один раз на разметку"""
+        if self._overlaps is None:
+            ordered = sorted(self.places, key=lambda place: place.bounds[0])
+            pairs = []
+            for i, place in enumerate(ordered):
+                for other in ordered[i + 1:]:
+                    # Места отсортированы по левой границе: дальше только правее правой границы place
+                    if other.bounds[0] > place.bounds[2]:
+                        break
+                    area = place.overlap_area(other)
+                    if area > 0:
+                        first, second = sorted((place.place_id, other.place_id))
+                        pairs.append((first, second, round(area, 2)))
+            self._overlaps = sorted(pairs)
+        return [pair for pair in self._overlaps if pair[2] >= min_area]
+
+
+class ZoneGeometry:
+    """Контур зоны (ParkingZone.location); outline None - у зоны нет разбираемого полигона"""
+
+    def __init__(self, zone_id: int, outline: Optional[PolygonGeometry]):
+        self.zone_id = zone_id
+        self.outline = outline
+
+    def contains(self, x: float, y: float) -> bool:
+        return self.outline is not None and self.outline.contains(x, y)
+
+
+class GeometryCache:
+    """Разобранные полигоны мест по камерам и контуры зон
+
+    Заполняется при первом обращении к камере (зоне); запись камеры сбрасывается при
+    создании, изменении или удалении ее связей с местами, запись зоны - при изменении
+    или удалении зоны.
+    """
+
+    def __init__(self):
+        self._cameras: Dict[int, CameraGeometry] = {}
+        # Счетчик сбросов по камере: разметка, прочитанная до сброса, не сохраняется
+        self._generations: Dict[int, int] = {}
+        self._zones: Dict[int, ZoneGeometry] = {}
+        self._zone_generations: Dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, camera_id: int) -> Optional[CameraGeometry]:
+        geometry = self._cameras.get(camera_id)
+        if geometry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return geometry
+
+    def generation(self, camera_id: int) -> int:
+        return self._generations.get(camera_id, 0)
+
+    def build(self, camera_id: int, links: Iterable, generation: Optional[int] = None) -> CameraGeometry:
+        """Разобрать связи камеры с местами (CameraParkingPlace) и сохранить результат.
+
+        generation - значение generation(camera_id) до чтения связей из БД; если с тех пор
+        камера была сброшена, результат возвращается, но не кэшируется.
+        """
+        places = []
+        for link in links:
+            points = normalize_polygon(link.location or ())
+            if points is not None:
+                places.append(PlaceGeometry(link.id, link.parking_place_id, points))
+        geometry = CameraGeometry(camera_id, places)
+        if generation is None or generation == self.generation(camera_id):
+            self._cameras[camera_id] = geometry
+        return geometry
+
+    def invalidate(self, camera_id: int) -> None:
+        self._cameras.pop(camera_id, None)
+        self._generations[camera_id] = self.generation(camera_id) + 1
+
+    def get_zone(self, zone_id: int) -> Optional[ZoneGeometry]:
+        geometry = self._zones.get(zone_id)
+        if geometry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return geometry
+
+    def zone_generation(self, zone_id: int) -> int:
+        return self._zone_generations.get(zone_id, 0)
+
+    def build_zone(self, zone_id: int, location, generation: Optional[int] = None) -> ZoneGeometry:
+        """Разобрать ParkingZone.location и сохранить результат (generation - как в build)"""
+        points = normalize_polygon(location or ())
+        geometry = ZoneGeometry(zone_id, PolygonGeometry(points) if points is not None else None)
+        if generation is None or generation == self.zone_generation(zone_id):
+            self._zones[zone_id] = geometry
+        return geometry
+
+    def invalidate_zone(self, zone_id: int) -> None:
+        self._zones.pop(zone_id, None)
+        self._zone_generations[zone_id] = self.zone_generation(zone_id) + 1
+
+    def stats(self) -> Dict:
+        return {"cameras": len(self._cameras), "zones": len(self._zones), "hits": self.hits, "misses": self.misses}
+
+
+geometry_cache = GeometryCache()
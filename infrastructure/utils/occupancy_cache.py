@@ -0,0 +1,217 @@
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from infrastructure.utils.status_hub import status_hub, StatusEvent
+
+# (place_id, zone_id, place_number, place_status_id)
+PlaceRow = Tuple[int, int, int, Optional[int]]
+
+
+class ZoneOccupancy:
+    """Компактное состояние мест одной зоны: параллельные массивы ID, номеров и статусов
+
+    Статус NULL хранится как 0.
+    """
+
+    __slots__ = ("zone_id", "place_ids", "place_numbers", "statuses", "index", "version")
+
+    def __init__(self, zone_id: int, version: int = 0):
+        self.zone_id = zone_id
+        self.place_ids = array("q")
+        self.place_numbers = array("i")
+        self.statuses = array("i")
+        self.index: Dict[int, int] = {}
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.place_ids)
+
+    def set_place(self, place_id: int, place_number: int, status_id: Optional[int]) -> bool:
+        """Добавить или обновить место. Возвращает True, если что-то изменилось"""
+        status = status_id or 0
+        position = self.index.get(place_id)
+        if position is None:
+            self.index[place_id] = len(self.place_ids)
+            self.place_ids.append(place_id)
+            self.place_numbers.append(place_number)
+            self.statuses.append(status)
+            return True
+        if self.statuses[position] == status and self.place_numbers[position] == place_number:
+            return False
+        self.statuses[position] = status
+        self.place_numbers[position] = place_number
+        return True
+
+    def remove_place(self, place_id: int) -> bool:
+        position = self.index.pop(place_id, None)
+        if position is None:
+            return False
+        del self.place_ids[position]
+        del self.place_numbers[position]
+        del self.statuses[position]
+        for moved_id in self.place_ids[position:]:
+            self.index[moved_id] -= 1
+        return True
+
+    def count_status(self, status_id: int) -> int:
+        return self.statuses.count(status_id)
+
+    def places(self) -> List[Tuple[int, int, Optional[int]]]:
+        """Список (place_id, place_number, place_status_id) в порядке добавления"""
+        return [
+            (place_id, place_number, status or None)
+            for place_id, place_number, status in zip(self.place_ids, self.place_numbers, self.statuses)
+        ]
+
+
+class OccupancyCache:
+    """Кэш занятости мест по зонам внутри процесса
+
+    Прогревается одним запросом при старте и дальше обновляется write-through из всех
+    путей записи статусов (репозитории возвращают измененные строки через RETURNING).
+    Изменения применяются в порядке фиксации транзакций (см. Database._commit); раз в
+    OCCUPANCY_CACHE_RELOAD_SECONDS кэш сверяется с БД (изменения других процессов).
+    Пока кэш не прогрет, get_zone возвращает None и чтение идет в БД.
+    Версия зоны растет при каждом изменении и используется для условных запросов (ETag);
+    каждое изменение публикуется в status_hub для потоковой выдачи клиентам.
+    """
+
+    def __init__(self):
+        self._zones: Dict[int, ZoneOccupancy] = {}
+        self._place_zone: Dict[int, int] = {}
+        self._versions: Dict[int, int] = {}
+        # Эпоха отличает версии разных запусков процесса
+        self.epoch = format(int(time.time()), "x")
+        self.ready = False
+
+    def load(self, rows: Iterable[PlaceRow]) -> None:
+        """Полностью заменить содержимое кэша (прогрев)"""
+        self._zones.clear()
+        self._place_zone.clear()
+        for place_id, zone_id, place_number, status_id in rows:
+            self._zone(zone_id).set_place(place_id, place_number, status_id)
+            self._place_zone[place_id] = zone_id
+        for zone_id in self._zones:
+            self._bump(zone_id)
+        self.ready = True
+        logger.info(f"Occupancy cache warmed: {len(self._place_zone)} places in {len(self._zones)} zones")
+
+    def get_zone(self, zone_id: int) -> Optional[ZoneOccupancy]:
+        """Состояние зоны; для зоны без мест возвращается пустое состояние"""
+        if not self.ready:
+            return None
+        zone = self._zones.get(zone_id)
+        if zone is None:
+            return ZoneOccupancy(zone_id, self._versions.get(zone_id, 0))
+        return zone
+
+    def version(self, zone_id: int) -> int:
+        return self._versions.get(zone_id, 0)
+
+    def versions(self) -> Dict[int, int]:
+        """Версии всех зон (для сверки по снимку БД, см. reconcile)"""
+        return dict(self._versions)
+
+    def etag(self, zone_id: int) -> Optional[str]:
+        """ETag зоны; до прогрева версии не отслеживаются и ETag не выдается"""
+        if not self.ready:
+            return None
+        return f'"{self.epoch}-{zone_id}-{self._versions.get(zone_id, 0)}"'
+
+    def list_by_status(self, status_id: Optional[int]) -> Optional[List[PlaceRow]]:
+        if not self.ready:
+            return None
+        status = status_id or 0
+        return [
+            (place_id, zone.zone_id, place_number, status_id)
+            for zone in self._zones.values()
+            for place_id, place_number, place_status in zip(zone.place_ids, zone.place_numbers, zone.statuses)
+            if place_status == status
+        ]
+
+    def reconcile(self, rows: Iterable[PlaceRow], versions: Optional[Dict[int, int]] = None) -> int:
+        """Сверить кэш с полной выборкой мест из БД (периодическая перезагрузка).
+
+        В отличие от load, меняются только расходящиеся места, и версии остальных зон
+        не растут. versions - версии зон на момент снимка, по которому сделана выборка:
+        зоны, изменившиеся после снимка (write-through), пропускаются, так как кэш по ним
+        новее выборки. Возвращает число исправленных мест.
+        """
+        if not self.ready:
+            self.load(rows)
+            return 0
+
+        def changed_since_snapshot(zone_id: Optional[int]) -> bool:
+            return versions is not None and self._versions.get(zone_id, 0) != versions.get(zone_id, 0)
+
+        rows = list(rows)
+        present = {row[0] for row in rows}
+        missing = [
+            place_id for place_id, zone_id in self._place_zone.items()
+            if place_id not in present and not changed_since_snapshot(zone_id)
+        ]
+        for place_id in missing:
+            self.remove_place(place_id)
+        return len(missing) + self.upsert_places(
+            row for row in rows
+            if not changed_since_snapshot(row[1]) and not changed_since_snapshot(self._place_zone.get(row[0]))
+        )
+
+    def upsert_places(self, rows: Iterable[PlaceRow]) -> int:
+        """Записать актуальные значения мест (write-through после UPDATE/INSERT).
+
+        Возвращает число мест, значения которых изменились.
+        """
+        if not self.ready:
+            return 0
+        changed: Dict[int, List[Dict]] = {}
+        reset_zones = set()
+        for place_id, zone_id, place_number, status_id in rows:
+            previous_zone_id = self._place_zone.get(place_id)
+            if previous_zone_id is not None and previous_zone_id != zone_id:
+                self._zones[previous_zone_id].remove_place(place_id)
+                reset_zones.add(previous_zone_id)
+            if self._zone(zone_id).set_place(place_id, place_number, status_id):
+                changed.setdefault(zone_id, []).append(
+                    {"id": place_id, "place_number": place_number, "place_status_id": status_id}
+                )
+            self._place_zone[place_id] = zone_id
+        for zone_id in reset_zones:
+            self._bump(zone_id, kind="reset")
+        for zone_id, places in changed.items():
+            self._bump(zone_id, places=places)
+        return sum(len(places) for places in changed.values())
+
+    def remove_place(self, place_id: int) -> None:
+        zone_id = self._place_zone.pop(place_id, None)
+        if zone_id is not None and self._zones[zone_id].remove_place(place_id):
+            self._bump(zone_id, kind="reset")
+
+    def drop_zone(self, zone_id: int) -> None:
+        zone = self._zones.pop(zone_id, None)
+        if zone is None:
+            return
+        for place_id in zone.place_ids:
+            self._place_zone.pop(place_id, None)
+        self._bump(zone_id, kind="reset")
+
+    def _zone(self, zone_id: int) -> ZoneOccupancy:
+        zone = self._zones.get(zone_id)
+        if zone is None:
+            zone = self._zones[zone_id] = ZoneOccupancy(zone_id, self._versions.get(zone_id, 0))
+        return zone
+
+    def _bump(self, zone_id: int, kind: Optional[str] = None, places: Optional[List[Dict]] = None) -> None:
+        version = self._versions.get(zone_id, 0) + 1
+        self._versions[zone_id] = version
+        zone = self._zones.get(zone_id)
+        if zone is not None:
+            zone.version = version
+        if kind or places:
+            status_hub.publish(StatusEvent(zone_id, version, kind or "delta", places or []))
+
+
+occupancy_cache = OccupancyCache()
@@ -0,0 +1,64 @@
+"""Нарезка снимка на места в процессе-обработчике LocalCutter.
+
+Модуль импортируется процессами пула, поэтому зависит только от Pillow.
+"""
+import io
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+# (left, upper, right, lower) в пикселях снимка
+Box = Tuple[int, int, int, int]
+# Разметка камеры: ((place_id, ((x, y), ...), область полигона), ...) -
+# полигоны и области мест берутся из geometry_cache
+Layout = Tuple[Tuple[int, Tuple[Tuple[float, float], ...], Box], ...]
+
+
+# Кэш масок в процессе-обработчике: (place_id, полигон, размер снимка) -> (область, маска).
+# Ключ по отдельному месту, чтобы кэш не зависел от состава пачки
+_mask_cache: "OrderedDict[tuple, Optional[Tuple[Box, Image.Image]]]" = OrderedDict()
+_MASK_CACHE_SIZE = 4096
+
+
+def _place_mask(place_id: int, points: Tuple[Tuple[float, float], ...], crop_box: Box,
+                size: Tuple[int, int]) -> Optional[Tuple[Box, Image.Image]]:
+    """Область и маска полигона места (вычисляются один раз на полигон и размер снимка)"""
+    key = (place_id, points, size)
+    if key in _mask_cache:
+        _mask_cache.move_to_end(key)
+        return _mask_cache[key]
+
+    width, height = size
+    box = (crop_box[0], crop_box[1], min(width, crop_box[2]), min(height, crop_box[3]))
+    result = None
+    if box[2] > box[0] and box[3] > box[1]:
+        mask = Image.new("L", (box[2] - box[0], box[3] - box[1]), 0)
+        ImageDraw.Draw(mask).polygon([(x - box[0], y - box[1]) for x, y in points], fill=255)
+        result = (box, mask)
+
+    _mask_cache[key] = result
+    if len(_mask_cache) > _MASK_CACHE_SIZE:
+        _mask_cache.popitem(last=False)
+    return result
+
+
+def crop_places(image_data: bytes, layout: Layout, quality: int) -> Dict[int, bytes]:
+    """Вырезать места из снимка: область полигона, пиксели вне полигона - черные. JPEG по каждому месту.
+
+    Выполняется в процессе-обработчике: снимок декодируется один раз на все места разметки.
+    """
+    with Image.open(io.BytesIO(image_data)) as source:
+        image = source.convert("RGB")
+    crops = {}
+    for place_id, points, crop_box in layout:
+        place_mask = _place_mask(place_id, points, crop_box, image.size)
+        if place_mask is None:
+            continue
+        box, mask = place_mask
+        crop = Image.new("RGB", mask.size)
+        crop.paste(image.crop(box), mask=mask)
+        buffer = io.BytesIO()
+        crop.save(buffer, format="JPEG", quality=quality)
+        crops[place_id] = buffer.getvalue()
+    return crops
@@ -0,0 +1,105 @@
+import io
+import time
+from typing import Dict, Tuple
+
+from PIL import Image
+
+from web.config import Configs
+
+config = Configs()
+
+# (left, upper, right, lower) в пикселях снимка
+Box = Tuple[int, int, int, int]
+
+
+def average_hash(image: Image.Image, box: Box, hash_size: int) -> int:
+    """Average hash области: уменьшенная до hash_size x hash_size копия в оттенках серого,
+    бит равен 1, если пиксель ярче среднего"""
+    region = image.crop(box).convert("L").resize((hash_size, hash_size), Image.Resampling.BILINEAR)
+    pixels = list(region.getdata())
+    mean = sum(pixels) / len(pixels)
+    value = 0
+    for pixel in pixels:
+        value = (value << 1) | (pixel > mean)
+    return value
+
+
+def compute_fingerprints(image_data: bytes, boxes: Dict[int, Box], hash_size: int) -> Dict[int, int]:
+    """Отпечатки мест одного снимка {place_id: hash}.
+
+    Область обрезается по границам снимка (как при нарезке); пропускаются только места,
+    от области которых после обрезки ничего не осталось.
+
+    Синхронная функция (декодирование изображения) - вызывать в отдельном потоке.
+    """
+    with Image.open(io.BytesIO(image_data)) as image:
+        original_width, original_height = image.size
+        # Для JPEG декодирование сразу в уменьшенном (до 4 раз) размере и оттенках серого
+        image.draft("L", (original_width // 4 or 1, original_height // 4 or 1))
+        image = image.convert("L")
+    width, height = image.size
+    scale_x, scale_y = width / original_width, height / original_height
+
+    fingerprints = {}
+    for place_id, box in boxes.items():
+        box = (max(0, box[0]), max(0, box[1]), min(original_width, box[2]), min(original_height, box[3]))
+        if box[2] <= box[0] or box[3] <= box[1]:
+            continue
+        scaled = (
+            int(box[0] * scale_x), int(box[1] * scale_y),
+            max(int(box[2] * scale_x), int(box[0] * scale_x) + 1),
+            max(int(box[3] * scale_y), int(box[1] * scale_y) + 1)
+        )
+        fingerprints[place_id] = average_hash(image, scaled, hash_size)
+    return fingerprints
+
+
+class PlaceFingerprintCache:
+    """Отпечатки областей мест на момент последней успешной классификации
+
+    Место считается неизменившимся, если отпечаток его области на новом снимке отличается
+    от сохраненного не более чем на max_distance бит, область не менялась и с последней
+    классификации прошло меньше max_age секунд.
+    """
+
+    def __init__(self, max_distance: int = 4, max_age: float = 3600):
+        self.max_distance = max_distance
+        self.max_age = max_age
+        # place_id -> (область, отпечаток, время классификации)
+        self._entries: Dict[int, Tuple[Box, int, float]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def is_unchanged(self, place_id: int, box: Box, fingerprint: int) -> bool:
+        entry = self._entries.get(place_id)
+        if (
+            entry is not None
+            and entry[0] == box
+            and (entry[1] ^ fingerprint).bit_count() <= self.max_distance
+            and time.monotonic() - entry[2] < self.max_age
+        ):
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def remember(self, place_id: int, box: Box, fingerprint: int) -> None:
+        self._entries[place_id] = (box, fingerprint, time.monotonic())
+
+    def forget(self, place_id: int) -> None:
+        self._entries.pop(place_id, None)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "places": len(self._entries),
+            "unchanged": self.hits,
+            "changed": self.misses,
+            "unchanged_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+place_fingerprints = PlaceFingerprintCache(
+    max_distance=config.DETECTION_FINGERPRINT_MAX_DISTANCE,
+    max_age=config.DETECTION_FINGERPRINT_MAX_AGE_SECONDS
+)
@@ -2,8 +2,13 @@ import aio_pika
 import json
 import uuid
 import asyncio
-from typing import Any, Dict, Callable, Awaitable
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Callable, Awaitable, Optional, List
+from loguru import logger
 from web.config import Configs
+from infrastructure.utils.metrics import LatencyStats
 
 config = Configs()
 
@@ -11,34 +16,195 @@ class RabbitMQClient:
     def __init__(self):
         self.connection = None
         self.channel = None
+        self._connect_lock = asyncio.Lock()
+        # Пул каналов для публикации, чтобы параллельные публикации не ждали друг друга на одном канале
+        self._channel_pool: Optional[asyncio.Queue] = None
+        self._publish_latency: Dict[str, LatencyStats] = defaultdict(LatencyStats)
         self._response_queues = {}
+        # Общая очередь ответов RPC и ожидающие ответа future по correlation_id
+        self._rpc_queue = None
+        self._rpc_queue_lock = asyncio.Lock()
+        self._rpc_futures: Dict[str, asyncio.Future] = {}
+        # request_id из тела -> correlation_id, для ответов без correlation_id
+        self._rpc_request_ids: Dict[str, str] = {}
 
     async def connect(self):
-        if not self.connection:
-            self.connection = await aio_pika.connect_robust(
+        if self.connection:
+            return
+        async with self._connect_lock:
+            if self.connection:
+                return
+            connection = await aio_pika.connect_robust(
                 host=config.RABBITMQ_HOST,
                 port=config.RABBITMQ_PORT,
                 login=config.RABBITMQ_USER,
                 password=config.RABBITMQ_PASSWORD,
                 virtualhost=config.RABBITMQ_VHOST
             )
-            self.channel = await self.connection.channel()
+            # Канал для потребителей (очереди ответов)
+            self.channel = await connection.channel()
+            await self.channel.set_qos(prefetch_count=config.RABBITMQ_PREFETCH_COUNT)
+
+            channel_pool = asyncio.Queue()
+            for _ in range(max(1, config.RABBITMQ_CHANNEL_POOL_SIZE)):
+                channel = await connection.channel(publisher_confirms=config.RABBITMQ_PUBLISHER_CONFIRMS)
+                await channel.set_qos(prefetch_count=config.RABBITMQ_PREFETCH_COUNT)
+                channel_pool.put_nowait(channel)
+            self._channel_pool = channel_pool
+            self.connection = connection
 
     async def close(self):
+        for future in self._rpc_futures.values():
+            if not future.done():
+                future.cancel()
+        self._rpc_futures.clear()
+        self._rpc_request_ids.clear()
+        self._rpc_queue = None
+        self._channel_pool = None
         if self.connection:
             await self.connection.close()
+            self.connection = None
 
-    async def publish_message(self, queue_name: str, message: Dict[str, Any], reply_to: str = None):
+    @asynccontextmanager
+    async def _acquire_channel(self):
+        """Берет свободный канал из пула и возвращает его обратно после публикации"""
         await self.connect()
-        await self.channel.default_exchange.publish(
-            aio_pika.Message(
-                body=json.dumps(message).encode(),
-                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-                reply_to=reply_to
-            ),
-            routing_key=queue_name
+        pool = self._channel_pool
+        channel = await pool.get()
+        try:
+            yield channel
+        finally:
+            pool.put_nowait(channel)
+
+    async def _wait_unblocked(self):
+        """Backpressure: пока брокер блокирует соединение (connection.blocked), новые публикации ждут"""
+        transport = self.connection.transport if self.connection else None
+        if transport is None:
+            return
+        await asyncio.wait_for(transport.connection.ready(), timeout=config.RABBITMQ_BLOCKED_TIMEOUT_SECONDS)
+
+    @staticmethod
+    def _build_message(message: Dict[str, Any], reply_to: str = None,
+                       correlation_id: Optional[str] = None) -> aio_pika.Message:
+        return aio_pika.Message(
+            body=json.dumps(message).encode(),
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            reply_to=reply_to,
+            correlation_id=correlation_id
         )
 
+    async def publish_message(self, queue_name: str, message: Dict[str, Any], reply_to: str = None,
+                              correlation_id: Optional[str] = None):
+        await self.connect()
+        await self._wait_unblocked()
+        started = time.monotonic()
+        async with self._acquire_channel() as channel:
+            # При включенных publisher confirms publish завершается после подтверждения брокером
+            await channel.default_exchange.publish(
+                self._build_message(message, reply_to, correlation_id),
+                routing_key=queue_name
+            )
+        self._publish_latency[queue_name].observe(time.monotonic() - started)
+
+    async def publish_batch(self, queue_name: str, messages: List[Dict[str, Any]], reply_to: str = None):
+        """Публикует пачку сообщений на одном канале и ждет все подтверждения брокера разом"""
+        if not messages:
+            return
+        await self.connect()
+        await self._wait_unblocked()
+        started = time.monotonic()
+        async with self._acquire_channel() as channel:
+            await asyncio.gather(*(
+                channel.default_exchange.publish(
+                    self._build_message(message, reply_to, message.get("request_id")),
+                    routing_key=queue_name
+                )
+                for message in messages
+            ))
+        self._publish_latency[queue_name].observe(time.monotonic() - started)
+
+    async def consumer_count(self, queue_name: str) -> int:
+        """Число потребителей очереди (пассивное объявление, очередь не создается).
+
+        Несуществующая очередь - 0 потребителей. Объявление выполняется на отдельном
+        временном канале: брокер закрывает канал, если очереди нет.
+        """
+        await self.connect()
+        channel = await self.connection.channel()
+        try:
+            queue = await channel.declare_queue(queue_name, passive=True)
+            return queue.declaration_result.consumer_count
+        except aio_pika.exceptions.ChannelNotFoundEntity:
+            return 0
+        finally:
+            if not channel.is_closed:
+                await channel.close()
+
+    def get_publish_stats(self) -> Dict[str, Dict[str, float]]:
+        """Задержки публикации по очередям (cut_queue, classify_queue, draw_queue и т.д.)"""
+        return {queue_name: stats.snapshot() for queue_name, stats in self._publish_latency.items()}
+
+    async def call(self, queue_name: str, message: Dict[str, Any], timeout: float = 30.0,
+                   embed_reply_to: bool = False) -> Any:
+        """Отправляет запрос и ожидает ответ через общую очередь ответов процесса.
+
+        Ответ сопоставляется с запросом по correlation_id, который генерируется на каждый вызов:
+        request_id задает вызывающий код, и он может совпасть у параллельных запросов.
+        При таймауте выбрасывается asyncio.TimeoutError, а future удаляется,
+        поэтому опоздавшие ответы просто отбрасываются.
+        """
+        reply_to = await self._ensure_rpc_queue()
+        correlation_id = str(uuid.uuid4())
+        request_id = message.get("request_id")
+        if embed_reply_to:
+            # Некоторые сервисы читают очередь ответа из тела сообщения
+            message = {**message, "reply_to": reply_to}
+
+        future = asyncio.get_running_loop().create_future()
+        self._rpc_futures[correlation_id] = future
+        if request_id is not None:
+            # При повторе request_id ответ без correlation_id достается первому из ожидающих
+            self._rpc_request_ids.setdefault(request_id, correlation_id)
+        try:
+            await self.publish_message(queue_name, message, reply_to=reply_to, correlation_id=correlation_id)
+            return await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            self._rpc_futures.pop(correlation_id, None)
+            if request_id is not None and self._rpc_request_ids.get(request_id) == correlation_id:
+                del self._rpc_request_ids[request_id]
+
+    async def _ensure_rpc_queue(self) -> str:
+        """Создает (один раз на процесс) эксклюзивную очередь ответов и подписывается на неё"""
+        await self.connect()
+        if self._rpc_queue is None:
+            async with self._rpc_queue_lock:
+                if self._rpc_queue is None:
+                    queue = await self.channel.declare_queue(
+                        f"rpc_reply_{uuid.uuid4()}", exclusive=True, auto_delete=True
+                    )
+                    await queue.consume(self._on_rpc_reply, no_ack=True)
+                    self._rpc_queue = queue
+        return self._rpc_queue.name
+
+    async def _on_rpc_reply(self, message: aio_pika.abc.AbstractIncomingMessage):
+        try:
+            data = json.loads(message.body.decode())
+        except Exception as e:
+            logger.error(f"Error decoding RPC reply: {e}")
+            return
+
+        correlation_id = message.correlation_id
+        if correlation_id is None and isinstance(data, dict):
+            # Сервис мог не скопировать correlation_id, но вернуть request_id в теле
+            correlation_id = self._rpc_request_ids.get(data.get("request_id"))
+
+        future = self._rpc_futures.pop(correlation_id, None)
+        if future is None:
+            logger.warning(f"Dropping RPC reply with unknown correlation_id={correlation_id}")
+            return
+        if not future.done():
+            future.set_result(data)
+
     async def consume_messages(self, queue_name: str, callback: Callable[[Dict[str, Any]], Awaitable[None]], durable: bool = True, auto_delete: bool = False):
         await self.connect()
         queue = await self.channel.declare_queue(queue_name, durable=durable, auto_delete=auto_delete)
@@ -53,7 +219,11 @@ class RabbitMQClient:
                         print(f"Error processing message: {e}")
 
     async def create_response_queue(self) -> tuple[str, asyncio.Future]:
-        """Создает временную очередь для получения ответа и возвращает её имя и future для получения результата"""
+        """Создает временную очередь для получения ответа и возвращает её имя и future для получения результата.
+
+        Устаревший режим: каждая очередь стоит отдельных queue.declare/basic.consume/cancel,
+        для запросов-ответов используйте call().
+        """
         await self.connect()
         queue_name = f"response_queue_{uuid.uuid4()}"
         queue = await self.channel.declare_queue(queue_name, durable=False, auto_delete=True)
@@ -1,16 +1,319 @@
+import asyncio
+import io
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+
+import certifi
+import urllib3
 from minio import Minio
+from minio.time import from_http_header
 from web.config import Configs
 
 config = Configs()
 
-def get_minio_client():
-    return Minio(
-        config.MINIO_ENDPOINT,
-        access_key=config.MINIO_ACCESS_KEY,
-        secret_key=config.MINIO_SECRET_KEY,
-        secure=config.MINIO_SECURE
+OBJECT_STORE_BACKENDS = ("minio", "local")
+
+_minio_client: Optional[Minio] = None
+
+
+def _build_http_client() -> urllib3.PoolManager:
+    """Пул HTTP-соединений к MinIO: keep-alive, таймауты и повторы на 5xx"""
+    return urllib3.PoolManager(
+        maxsize=config.MINIO_MAX_POOL_SIZE,
+        block=True,  # при исчерпании пула запрос ждет соединение, а не открывает лишнее
+        timeout=urllib3.Timeout(
+            connect=config.MINIO_CONNECT_TIMEOUT_SECONDS,
+            read=config.MINIO_READ_TIMEOUT_SECONDS
+        ),
+        retries=urllib3.Retry(
+            total=config.MINIO_RETRIES,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504]
+        ),
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=certifi.where()
+    )
+
+
+def get_minio_client() -> Minio:
+    """Общий для процесса клиент MinIO (потокобезопасен, соединения переиспользуются)"""
+    global _minio_client
+    if _minio_client is None:
+        _minio_client = Minio(
+            config.MINIO_ENDPOINT,
+            access_key=config.MINIO_ACCESS_KEY,
+            secret_key=config.MINIO_SECRET_KEY,
+            secure=config.MINIO_SECURE,
+            http_client=_build_http_client()
+        )
+    return _minio_client
+
+
+@dataclass
+class ObjectInfo:
+    name: str
+    size: int
+    content_type: Optional[str] = None
+    last_modified: Optional[datetime] = None
+    etag: Optional[str] = None
+
+
+class ObjectStore(ABC):
+    """Асинхронный доступ к хранилищу изображений"""
+
+    @abstractmethod
+    async def get(self, object_name: str) -> bytes:
+        """Объект целиком"""
+        pass
+
+    @abstractmethod
+    async def get_with_info(self, object_name: str) -> Tuple[bytes, ObjectInfo]:
+        """Объект целиком вместе с метаданными (размер, время изменения, ETag) за один запрос"""
+        pass
+
+    @abstractmethod
+    def stream(self, object_name: str, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Объект частями по chunk_size байт, без буферизации целиком"""
+        pass
+
+    @abstractmethod
+    async def put(self, object_name: str, data: bytes, content_type: str = "application/octet-stream") -> str:
+        """Записать объект, вернуть его URL"""
+        pass
+
+    @abstractmethod
+    async def upload_file(self, file_path: str, object_name: str) -> str:
+        """Загрузить локальный файл, вернуть URL объекта"""
+        pass
+
+    @abstractmethod
+    async def stat(self, object_name: str) -> ObjectInfo:
+        pass
+
+    @abstractmethod
+    async def list(self, prefix: Optional[str] = None) -> List[str]:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class MinioObjectStore(ObjectStore):
+    """Хранилище в MinIO
+
+    Клиент minio синхронный, поэтому вызовы выполняются в отдельном ограниченном пуле
+    потоков и не блокируют цикл событий. Число потоков не больше размера пула соединений.
+    """
+
+    def __init__(self, client: Minio, bucket_name: str, workers: int, chunk_size: int):
+        self.client = client
+        self.bucket_name = bucket_name
+        self.chunk_size = chunk_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="minio")
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _url(self, object_name: str) -> str:
+        return f"https://{config.MINIO_ENDPOINT}/{self.bucket_name}/{object_name}"
+
+    def _read_all(self, object_name: str) -> bytes:
+        response = self.client.get_object(self.bucket_name, object_name)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    def _read_with_info(self, object_name: str) -> Tuple[bytes, ObjectInfo]:
+        response = self.client.get_object(self.bucket_name, object_name)
+        try:
+            data = response.read()
+            last_modified = response.headers.get("last-modified")
+            return data, ObjectInfo(
+                name=object_name,
+                size=len(data),
+                content_type=response.headers.get("content-type"),
+                last_modified=from_http_header(last_modified) if last_modified else None,
+                etag=(response.headers.get("etag") or "").replace('"', "") or None
+            )
+        finally:
+            response.close()
+            response.release_conn()
+
+    async def get(self, object_name: str) -> bytes:
+        try:
+            return await self._run(self._read_all, object_name)
+        except Exception as e:
+            raise Exception(f"Error getting image from MinIO: {e}")
+
+    async def get_with_info(self, object_name: str) -> Tuple[bytes, ObjectInfo]:
+        try:
+            return await self._run(self._read_with_info, object_name)
+        except Exception as e:
+            raise Exception(f"Error getting image from MinIO: {e}")
+
+    async def stream(self, object_name: str, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+        chunk_size = chunk_size or self.chunk_size
+        try:
+            response = await self._run(self.client.get_object, self.bucket_name, object_name)
+        except Exception as e:
+            raise Exception(f"Error getting image from MinIO: {e}")
+        try:
+            while True:
+                chunk = await self._run(response.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            response.close()
+            response.release_conn()
+
+    async def put(self, object_name: str, data: bytes, content_type: str = "application/octet-stream") -> str:
+        try:
+            await self._run(
+                lambda: self.client.put_object(
+                    self.bucket_name, object_name, io.BytesIO(data), len(data), content_type=content_type
+                )
+            )
+        except Exception as e:
+            raise Exception(f"Error uploading to MinIO: {e}")
+        return self._url(object_name)
+
+    async def upload_file(self, file_path: str, object_name: str) -> str:
+        try:
+            await self._run(self.client.fput_object, self.bucket_name, object_name, file_path)
+        except Exception as e:
+            raise Exception(f"Error uploading to MinIO: {e}")
+        return self._url(object_name)
+
+    async def stat(self, object_name: str) -> ObjectInfo:
+        result = await self._run(self.client.stat_object, self.bucket_name, object_name)
+        return ObjectInfo(
+            name=result.object_name,
+            size=result.size,
+            content_type=result.content_type,
+            last_modified=result.last_modified,
+            etag=result.etag
+        )
+
+    async def list(self, prefix: Optional[str] = None) -> List[str]:
+        def list_names():
+            objects = self.client.list_objects(self.bucket_name, prefix=prefix, recursive=True)
+            return [obj.object_name for obj in objects]
+        return await self._run(list_names)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+class LocalObjectStore(ObjectStore):
+    """Хранилище в локальном каталоге (локальный запуск и проверки без MinIO)
+
+    Имя объекта - относительный путь внутри root; файловые операции выполняются в потоке.
+    """
+
+    def __init__(self, root: str, chunk_size: int):
+        self.root = os.path.abspath(root)
+        self.chunk_size = chunk_size
+
+    def _path(self, object_name: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, object_name))
+        if os.path.commonpath([path, self.root]) != self.root:
+            raise ValueError(f"Object name {object_name!r} is outside of the store root")
+        return path
+
+    @staticmethod
+    def _read(path: str) -> bytes:
+        with open(path, "rb") as file:
+            return file.read()
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(data)
+
+    @staticmethod
+    def _info(object_name: str, result: os.stat_result) -> ObjectInfo:
+        return ObjectInfo(
+            name=object_name,
+            size=result.st_size,
+            last_modified=datetime.fromtimestamp(result.st_mtime, timezone.utc),
+            # ETag по времени изменения и размеру файла
+            etag=f"{result.st_mtime_ns:x}-{result.st_size:x}"
+        )
+
+    async def get(self, object_name: str) -> bytes:
+        return await asyncio.to_thread(self._read, self._path(object_name))
+
+    async def get_with_info(self, object_name: str) -> Tuple[bytes, ObjectInfo]:
+        path = self._path(object_name)
+
+        def read_with_info():
+            with open(path, "rb") as file:
+                return file.read(), self._info(object_name, os.fstat(file.fileno()))
+        return await asyncio.to_thread(read_with_info)
+
+    async def stream(self, object_name: str, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+        chunk_size = chunk_size or self.chunk_size
+        file = await asyncio.to_thread(open, self._path(object_name), "rb")
+        try:
+            while True:
+                chunk = await asyncio.to_thread(file.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            file.close()
+
+    async def put(self, object_name: str, data: bytes, content_type: str = "application/octet-stream") -> str:
+        path = self._path(object_name)
+        await asyncio.to_thread(self._write, path, data)
+        return f"file://{path}"
+
+    async def upload_file(self, file_path: str, object_name: str) -> str:
+        data = await asyncio.to_thread(self._read, file_path)
+        return await self.put(object_name, data)
+
+    async def stat(self, object_name: str) -> ObjectInfo:
+        result = await asyncio.to_thread(os.stat, self._path(object_name))
+        return self._info(object_name, result)
+
+    async def list(self, prefix: Optional[str] = None) -> List[str]:
+        def list_names():
+            names = []
+            for directory, _, files in os.walk(self.root):
+                for file_name in files:
+                    name = os.path.relpath(os.path.join(directory, file_name), self.root).replace(os.sep, "/")
+                    if not prefix or name.startswith(prefix):
+                        names.append(name)
+            return sorted(names)
+        return await asyncio.to_thread(list_names)
+
+
+def create_object_store() -> ObjectStore:
+    if config.OBJECT_STORE_BACKEND not in OBJECT_STORE_BACKENDS:
+        raise ValueError(
+            f"Unknown object store backend {config.OBJECT_STORE_BACKEND!r}, expected one of {OBJECT_STORE_BACKENDS}"
+        )
+    if config.OBJECT_STORE_BACKEND == "local":
+        return LocalObjectStore(config.OBJECT_STORE_LOCAL_ROOT, config.OBJECT_STORE_CHUNK_SIZE)
+    return MinioObjectStore(
+        get_minio_client(),
+        config.BUCKET_NAME,
+        workers=config.MINIO_WORKERS,
+        chunk_size=config.OBJECT_STORE_CHUNK_SIZE
     )
 
+
+object_store = create_object_store()
+
+
 def list_bucket_files():
     client = get_minio_client()
     try:
@@ -21,17 +324,23 @@ def list_bucket_files():
         return []
 
 def get_image_from_minio(object_name: str) -> bytes:
+    """Синхронное чтение (для кода вне цикла событий); в async-коде - object_store.get"""
     client = get_minio_client()
     try:
         data = client.get_object(config.BUCKET_NAME, object_name)
-        return data.read()
+        try:
+            return data.read()
+        finally:
+            data.close()
+            data.release_conn()
     except Exception as e:
         raise Exception(f"Error getting image from MinIO: {e}")
 
 def upload_to_minio(file_path: str, object_name: str) -> str:
+    """Синхронная загрузка (для кода вне цикла событий); в async-коде - object_store.upload_file"""
     client = get_minio_client()
     try:
         client.fput_object(config.BUCKET_NAME, object_name, file_path)
         return f"https://{config.MINIO_ENDPOINT}/{config.BUCKET_NAME}/{object_name}"
     except Exception as e:
-        raise Exception(f"Error uploading to MinIO: {e}") 
\ No newline at end of file
+        raise Exception(f"Error uploading to MinIO: {e}")
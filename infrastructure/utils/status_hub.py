@@ -0,0 +1,117 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Set
+
+from web.config import Configs
+
+config = Configs()
+
+
+@dataclass
+class StatusEvent:
+    """Изменение статусов мест зоны
+
+    kind = "delta" - в places только изменившиеся места;
+    kind = "reset" - состав мест зоны изменился, клиенту нужен новый снимок.
+    """
+    zone_id: int
+    version: int
+    kind: str = "delta"
+    places: List[Dict] = field(default_factory=list)
+
+
+class Subscription:
+    """Подписка на события одной зоны с ограниченной очередью
+
+    Если подписчик не успевает читать, очередь очищается и в нее кладется None -
+    сигнал, что нужно заново отправить снимок зоны вместо пропущенных событий.
+    """
+
+    def __init__(self, zone_id: int, max_queue: int):
+        self.zone_id = zone_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.overflows = 0
+
+    def push(self, event: StatusEvent) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflows += 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class StatusHub:
+    """Внутрипроцессная шина изменений статусов мест
+
+    Публикация синхронная и не ждет подписчиков: каждому подписчику событие кладется
+    в его собственную ограниченную очередь. По каждой зоне хранится кольцевой буфер
+    последних событий для продолжения потока после переподключения.
+    """
+
+    def __init__(self, history_size: int = 256, max_queue: int = 100):
+        self.history_size = history_size
+        self.max_queue = max_queue
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._history: Dict[int, Deque[StatusEvent]] = {}
+        self.published = 0
+        self.overflows = 0
+
+    def subscribe(self, zone_id: int) -> Subscription:
+        subscription = Subscription(zone_id, self.max_queue)
+        self._subscribers.setdefault(zone_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.zone_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        self.overflows += subscription.overflows
+        if not subscribers:
+            del self._subscribers[subscription.zone_id]
+
+    def publish(self, event: StatusEvent) -> None:
+        history = self._history.get(event.zone_id)
+        if history is None:
+            history = self._history[event.zone_id] = deque(maxlen=self.history_size)
+        history.append(event)
+        self.published += 1
+        for subscription in self._subscribers.get(event.zone_id, ()):
+            subscription.push(event)
+
+    def events_since(self, zone_id: int, version: int) -> Optional[List[StatusEvent]]:
+        """События зоны с версией больше version.
+
+        None - если часть событий уже вытеснена из буфера (или среди них есть reset)
+        и клиенту нужен полный снимок.
+        """
+        history = self._history.get(zone_id)
+        if not history:
+            return None
+        if history[0].version > version + 1:
+            return None
+        events = [event for event in history if event.version > version]
+        if any(event.kind == "reset" for event in events):
+            return None
+        return events
+
+    def stats(self) -> Dict:
+        return {
+            "zones": len(self._subscribers),
+            "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "published": self.published,
+            "overflows": self.overflows + sum(
+                subscription.overflows
+                for subscribers in self._subscribers.values()
+                for subscription in subscribers
+            ),
+        }
+
+
+status_hub = StatusHub(
+    history_size=config.STATUS_STREAM_HISTORY_SIZE,
+    max_queue=config.STATUS_STREAM_QUEUE_SIZE
+)
\ No newline at end of file
@@ -1,3 +1,4 @@
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine
 from domain.models import Base
 from web.config import Configs
@@ -11,6 +12,9 @@ engine = create_async_engine(DATABASE_URL, echo=True)
 
 async def create_tables():
     async with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            # btree_gist нужен ограничению bookings_no_overlap (= по integer внутри gist-индекса)
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
         await conn.run_sync(Base.metadata.create_all)
 
 if __name__ == "__main__":
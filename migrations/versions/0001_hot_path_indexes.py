@@ -0,0 +1,72 @@
+"""hot path indexes
+
+Базовые таблицы создаются скриптом init_db.py (Base.metadata.create_all).
+Миграция добавляет составные и частичные индексы для частых запросов:
+проверка пересечения броней, активные брони, автоматизация статусов мест,
+поиск недавних нарушений и выборки мест/камер по зоне.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_bookings_place_status_period', 'bookings',
+        ['parking_place_id', 'booking_status_id', 'start_time', 'end_time'],
+        if_not_exists=True
+    )
+    op.create_index(
+        'ix_bookings_active_start_end', 'bookings', ['start_time', 'end_time'],
+        postgresql_where=sa.text('booking_status_id = 1'), if_not_exists=True
+    )
+    op.create_index(
+        'ix_bookings_active_end', 'bookings', ['end_time'],
+        postgresql_where=sa.text('booking_status_id = 1'), if_not_exists=True
+    )
+    op.create_index('ix_bookings_car_user_id', 'bookings', ['car_user_id'], if_not_exists=True)
+    op.create_index(
+        'ix_violations_place_car_timestamp', 'violations',
+        ['parking_place_id', 'car_number', 'timestamp'],
+        if_not_exists=True
+    )
+    op.create_index('ix_violations_timestamp', 'violations', ['timestamp'], if_not_exists=True)
+    op.create_index(
+        'ix_parking_places_zone_status', 'parking_places', ['parking_zone_id', 'place_status_id'],
+        if_not_exists=True
+    )
+    op.create_index('ix_cameras_parking_zone_id', 'cameras', ['parking_zone_id'], if_not_exists=True)
+    op.create_index(
+        'ix_camera_parking_places_camera_id', 'camera_parking_places', ['camera_id'],
+        if_not_exists=True
+    )
+    op.create_index(
+        'ix_camera_parking_places_parking_place_id', 'camera_parking_places', ['parking_place_id'],
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_camera_parking_places_parking_place_id', table_name='camera_parking_places', if_exists=True)
+    op.drop_index('ix_camera_parking_places_camera_id', table_name='camera_parking_places', if_exists=True)
+    op.drop_index('ix_cameras_parking_zone_id', table_name='cameras', if_exists=True)
+    op.drop_index('ix_parking_places_zone_status', table_name='parking_places', if_exists=True)
+    op.drop_index('ix_violations_timestamp', table_name='violations', if_exists=True)
+    op.drop_index('ix_violations_place_car_timestamp', table_name='violations', if_exists=True)
+    op.drop_index('ix_bookings_car_user_id', table_name='bookings', if_exists=True)
+    op.drop_index('ix_bookings_active_end', table_name='bookings', if_exists=True)
+    op.drop_index('ix_bookings_active_start_end', table_name='bookings', if_exists=True)
+    op.drop_index('ix_bookings_place_status_period', table_name='bookings', if_exists=True)
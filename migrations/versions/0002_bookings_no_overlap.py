@@ -0,0 +1,46 @@
+"""bookings no overlap
+
+Ограничение-исключение на пересечение активных броней одного места.
+Проверка пересечения при создании брони выполняется самой БД: две конкурентные
+вставки на одно и то же время не могут обе пройти. Бронь без времени окончания
+(tsrange с верхней границей NULL) занимает место бессрочно.
+
+Перед применением пересекающиеся активные брони должны быть завершены, иначе
+ограничение не будет создано.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    # init_db.py на новой базе уже создает ограничение вместе с таблицей
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'bookings_no_overlap') THEN
+                ALTER TABLE bookings
+                    ADD CONSTRAINT bookings_no_overlap
+                    EXCLUDE USING gist (parking_place_id WITH =, tsrange(start_time, end_time) WITH &&)
+                    WHERE (booking_status_id = 1);
+            END IF;
+        END
+        $$;
+    """)
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE bookings DROP CONSTRAINT IF EXISTS bookings_no_overlap')
@@ -0,0 +1,47 @@
+"""Стоимость получения сервиса в обработчике: container.resolve против get_service.
+
+Для каждого интерфейса замеряется среднее время одного вызова
+get_container().resolve(...) (обход графа punq на каждый запрос) и
+get_service(...) (поиск в таблице уже собранных зависимостей).
+Подключение к БД и брокеру не требуется.
+
+    python scripts/container_resolve_benchmark.py --number 20000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application.services.interfaces.i_booking_service import IBookingService  # noqa: E402
+from application.services.interfaces.i_parking_place_service import IParkingPlaceService  # noqa: E402
+from application.services.interfaces.i_parking_zone_service import IParkingZoneService  # noqa: E402
+from application.services.interfaces.i_unified_auth_service import IUnifiedAuthService  # noqa: E402
+from web.container import get_container, get_service, resolve_all  # noqa: E402
+
+INTERFACES = (IParkingPlaceService, IBookingService, IParkingZoneService, IUnifiedAuthService)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="вызовов в одном замере")
+    parser.add_argument("--repeat", type=int, default=5, help="замеров, берется лучший")
+    args = parser.parse_args()
+
+    container = get_container()
+    resolve_all()
+
+    print(f"{'interface':<24}{'resolve, us':>14}{'get_service, us':>18}{'speedup':>10}")
+    for interface in INTERFACES:
+        resolve = min(timeit.repeat(
+            lambda: container.resolve(interface), number=args.number, repeat=args.repeat
+        )) / args.number * 1e6
+        lookup = min(timeit.repeat(
+            lambda: get_service(interface), number=args.number, repeat=args.repeat
+        )) / args.number * 1e6
+        print(f"{interface.__name__:<24}{resolve:>14.2f}{lookup:>18.3f}{resolve / lookup:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Задержка несвязанного эндпоинта во время потока входов (bcrypt).
+
+Сначала замеряется задержка эндпоинта-пробы без нагрузки, затем - пока
+--logins параллельных клиентов непрерывно вызывают /auth/token/user.
+bcrypt выполняется в отдельном пуле потоков (web/security.py), поэтому p99
+пробы под нагрузкой не должен заметно отличаться от базового.
+
+Пример (сервис уже запущен, пользователь зарегистрирован):
+    python scripts/login_flood_benchmark.py --base-url http://localhost:8000 \\
+        --email user@example.com --password secret --logins 64 --duration 20
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import Dict, List
+
+import aiohttp
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def probe(session: aiohttp.ClientSession, url: str, stop: asyncio.Event, interval: float) -> List[float]:
+    """Последовательные запросы к пробе до сигнала stop; задержки в миллисекундах"""
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        async with session.get(url) as response:
+            await response.read()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def login_loop(session: aiohttp.ClientSession, url: str, credentials: Dict[str, str],
+                     stop: asyncio.Event, statuses: Counter) -> None:
+    while not stop.is_set():
+        async with session.post(url, json=credentials) as response:
+            await response.read()
+            statuses[response.status] += 1
+
+
+async def measure(args, logins: int) -> Dict:
+    stop = asyncio.Event()
+    statuses: Counter = Counter()
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        credentials = {"email": args.email, "password": args.password}
+        flooders = [
+            asyncio.create_task(login_loop(session, f"{args.base_url}/auth/token/user", credentials, stop, statuses))
+            for _ in range(logins)
+        ]
+        prober = asyncio.create_task(probe(session, f"{args.base_url}{args.probe_path}", stop, args.probe_interval))
+        await asyncio.sleep(args.duration)
+        stop.set()
+        latencies = await prober
+        await asyncio.gather(*flooders)
+    return {"latencies": latencies, "statuses": statuses}
+
+
+def report(title: str, result: Dict, duration: float) -> None:
+    latencies = result["latencies"]
+    print(f"{title}: {len(latencies)} probe requests")
+    print("  p50 {:.1f} ms, p95 {:.1f} ms, p99 {:.1f} ms, max {:.1f} ms".format(
+        percentile(latencies, 50), percentile(latencies, 95), percentile(latencies, 99), max(latencies)
+    ))
+    if result["statuses"]:
+        total = sum(result["statuses"].values())
+        by_status = ", ".join(f"{code}: {count}" for code, count in sorted(result["statuses"].items()))
+        print(f"  logins: {total} ({total / duration:.1f}/s), by status: {by_status}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=64, help="параллельных клиентов, вызывающих вход")
+    parser.add_argument("--duration", type=float, default=20, help="длительность каждого замера, с")
+    parser.add_argument("--probe-path", default="/metrics/", help="несвязанный эндпоинт для замера задержки")
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="пауза между запросами пробы, с")
+    args = parser.parse_args()
+    args.base_url = args.base_url.rstrip("/")
+
+    baseline = await measure(args, logins=0)
+    report("baseline", baseline, args.duration)
+    flood = await measure(args, logins=args.logins)
+    report(f"during login flood ({args.logins} clients)", flood, args.duration)
+    print("p99 change: {:+.1f} ms".format(
+        percentile(flood["latencies"], 99) - percentile(baseline["latencies"], 99)
+    ))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+import asyncio
+import os
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from domain.models import Base
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Тесты на Postgres запускаются только при заданном TEST_DATABASE_URL
+# (postgresql+asyncpg://...); база полностью пересоздается
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+# Минимальный набор строк для бронирования: зона с одним свободным местом и машина пользователя
+_SEED_SQL = (
+    "TRUNCATE admins, zone_types, place_statuses, booking_statuses, users, cars RESTART IDENTITY CASCADE",
+    "INSERT INTO admins (admin_name, password, email) VALUES ('admin', 'x', 'admin@example.com')",
+    "INSERT INTO zone_types (type_name) VALUES ('paid')",
+    "INSERT INTO place_statuses (status_name) VALUES ('free'), ('occupied')",
+    "INSERT INTO booking_statuses (status_name) VALUES ('active'), ('finished')",
+    "INSERT INTO parking_zones (zone_name, zone_type_id, address, start_time, end_time, price_per_minute, admin_id)"
+    " VALUES ('zone', 1, 'address', '00:00', '23:59', 2, 1)",
+    "INSERT INTO parking_places (place_number, place_status_id, parking_zone_id) VALUES (1, 1, 1)",
+    "INSERT INTO users (user_name, phone, password, email) VALUES ('user', '+70000000000', 'x', 'user@example.com')",
+    "INSERT INTO cars (car_number) VALUES ('A123BC')",
+    "INSERT INTO car_users (user_id, car_id) VALUES (1, 1)",
+)
+
+
+async def _seed(url: str) -> None:
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            for statement in _SEED_SQL:
+                await conn.execute(text(statement))
+    finally:
+        await engine.dispose()
+
+
+async def _create_schema(url: str) -> None:
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP SCHEMA public CASCADE"))
+            await conn.execute(text("CREATE SCHEMA public"))
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+            await conn.run_sync(Base.metadata.create_all)
+    finally:
+        await engine.dispose()
+
+
+def _alembic_config() -> Config:
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    return config
+
+
+@pytest.fixture(scope="session")
+def pg_url():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    return TEST_DATABASE_URL
+
+
+@pytest.fixture(scope="session")
+def migrated_pg(pg_url, monkeypatch_session):
+    """Схема как при развертывании (init_db.py + alembic upgrade head).
+
+    Перед upgrade миграции откатываются, чтобы индексы и ограничения создавались
+    именно миграциями, а не create_all.
+    """
+    asyncio.run(_create_schema(pg_url))
+    # migrations/env.py берет URL из Configs().DATABASE_URL
+    monkeypatch_session.setenv("DATABASE_URL", pg_url)
+    config = _alembic_config()
+    command.stamp(config, "head")
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+    return pg_url
+
+
+@pytest.fixture(scope="session")
+def monkeypatch_session():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        yield monkeypatch
+
+
+@pytest.fixture
+def seeded_pg(migrated_pg):
+    """Мигрированная база с местом id=1 (свободно) и привязкой машины к пользователю id=1"""
+    asyncio.run(_seed(migrated_pg))
+    return migrated_pg
@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from application.services.impl.booking_service import BookingService
+from application.services.impl.place_service import ParkingPlaceService
+from domain.exceptions import BookingConflictError
+from infrastructure.database import Database
+from infrastructure.repositories.booking import BookingRepository
+from infrastructure.repositories.parking_place import ParkingPlaceRepository
+from web.handlers.booking import update_booking
+from web.schemas import BookingCreate, BookingCreateWithoutEnd
+
+FUTURE = datetime(2030, 1, 1, 10, 0)
+
+
+def _booking(start: datetime, end: datetime) -> BookingCreate:
+    return BookingCreate(car_user_id=1, start_time=start, end_time=end, parking_place_id=1, booking_status_id=1)
+
+
+def _service(db: Database) -> BookingService:
+    return BookingService(BookingRepository(db), ParkingPlaceService(ParkingPlaceRepository(db)))
+
+
+def test_create_without_end_checks_place_and_inserts_in_one_unit_of_work(seeded_pg):
+    async def run():
+        db = Database(seeded_pg, pool_size=1, max_overflow=0)
+        try:
+            service = _service(db)
+            await service.create_booking_without_end(BookingCreateWithoutEnd(car_user_id=1, parking_place_id=1))
+            stats = db.get_routing_stats()["primary"]
+
+            with pytest.raises(ValueError, match="already occupied"):
+                await service.create_booking_without_end(BookingCreateWithoutEnd(car_user_id=1, parking_place_id=1))
+            return stats
+        finally:
+            await db._async_engine.dispose()
+
+    stats = asyncio.run(run())
+    # Чтение места и вставка брони - одна сессия, отдельных сессий нет
+    assert stats == {"reads": 0, "writes": 0, "units_of_work": 1}
+
+
+def test_booking_end_before_start_is_rejected():
+    with pytest.raises(ValidationError, match="раньше времени начала"):
+        _booking(FUTURE, FUTURE - timedelta(minutes=1))
+    # Время с часовым поясом сравнивается в UTC: 13:00+03:00 - это 10:00 UTC
+    with pytest.raises(ValidationError):
+        _booking(FUTURE.replace(hour=10, minute=30), datetime(2030, 1, 1, 13, 0, tzinfo=timezone(timedelta(hours=3))))
+    assert _booking(FUTURE, FUTURE).end_time == FUTURE
+
+
+def test_update_into_overlap_is_conflict(seeded_pg):
+    async def run():
+        db = Database(seeded_pg, pool_size=2, max_overflow=0)
+        try:
+            service = _service(db)
+            await service.create_booking(_booking(FUTURE, FUTURE + timedelta(hours=1)))
+            later = await service.create_booking(_booking(FUTURE + timedelta(hours=2), FUTURE + timedelta(hours=3)))
+
+            overlapping = _booking(FUTURE + timedelta(minutes=30), FUTURE + timedelta(hours=3))
+            with pytest.raises(BookingConflictError):
+                await service.update_booking(later.id, overlapping)
+            with pytest.raises(HTTPException) as error:
+                await update_booking(later.id, overlapping, service)
+            return error.value.status_code, await service.get_booking(later.id)
+        finally:
+            await db._async_engine.dispose()
+
+    status_code, unchanged = asyncio.run(run())
+    assert status_code == 409
+    assert unchanged.start_time == FUTURE + timedelta(hours=2)
+
+
+def test_concurrent_finish_succeeds_once(seeded_pg):
+    async def run():
+        db = Database(seeded_pg, pool_size=2, max_overflow=0)
+        try:
+            service = _service(db)
+            outcomes = []
+            for _ in range(10):
+                booking = await service.create_booking_without_end(
+                    BookingCreateWithoutEnd(car_user_id=1, parking_place_id=1)
+                )
+                outcomes.append(await asyncio.gather(
+                    service.finish_booking(booking.id), service.finish_booking(booking.id), return_exceptions=True
+                ))
+            return outcomes
+        finally:
+            await db._async_engine.dispose()
+
+    for outcome in asyncio.run(run()):
+        errors = [result for result in outcome if isinstance(result, Exception)]
+        finished = [result for result in outcome if not isinstance(result, Exception)]
+        assert len(finished) == 1 and finished[0].status == "Завершено"
+        assert len(errors) == 1 and type(errors[0]) is ValueError
+        assert "already finished" in str(errors[0])
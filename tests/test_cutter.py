@@ -0,0 +1,151 @@
+import asyncio
+import io
+from types import SimpleNamespace
+
+from PIL import Image
+
+from application.services.impl import zone_service
+from application.services.impl.zone_service import ParkingZoneService
+from infrastructure.utils import cutter
+from infrastructure.utils.cutter import LocalCutter, RabbitMQCutter
+from infrastructure.utils.rabbitmq_utils import rabbitmq_client
+from infrastructure.utils.s3_utils import LocalObjectStore
+from web.schemas import PlaceCut
+
+
+def _snapshot() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), (200, 10, 10)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_local_cutter_reuses_object_names(monkeypatch):
+    stored = {}
+
+    async def put(object_name, data, content_type=None):
+        stored[object_name] = data
+
+    monkeypatch.setattr(cutter.object_store, "put", put)
+    places = [
+        PlaceCut(place_id=1, location=[[0, 0], [20, 0], [20, 20], [0, 20]]),
+        PlaceCut(place_id=2, location=[[30, 10], [60, 10], [60, 40], [30, 40]]),
+    ]
+    local_cutter = LocalCutter(workers=1, quality=80)
+
+    async def run():
+        image = _snapshot()
+        first = await local_cutter.cut("images/camera_5.jpg", places, image)
+        second = await local_cutter.cut("images/camera_5.jpg", places, image)
+        other_camera = await local_cutter.cut("images/camera_6.jpg", places[:1], image)
+        return first, second, other_camera
+
+    try:
+        first, second, other_camera = asyncio.run(run())
+        start_method = local_cutter._executor._mp_context.get_start_method()
+    finally:
+        local_cutter.close()
+
+    assert first == second == {
+        1: "cut_images/images_camera_5/place_1.jpg",
+        2: "cut_images/images_camera_5/place_2.jpg",
+    }
+    assert other_camera == {1: "cut_images/images_camera_6/place_1.jpg"}
+    # Повторные циклы перезаписывают те же объекты
+    assert len(stored) == 3
+    assert start_method in ("forkserver", "spawn")
+
+
+def test_local_cutter_uses_given_layout(monkeypatch):
+    stored = {}
+
+    async def put(object_name, data, content_type=None):
+        stored[object_name] = data
+
+    monkeypatch.setattr(cutter.object_store, "put", put)
+    # Координаты PlaceCut не разбираются, если передана готовая разметка
+    places = [PlaceCut.model_construct(place_id=1, location=None)]
+    layout = ((1, ((0.0, 0.0), (20.0, 0.0), (20.0, 20.0)), (0, 0, 21, 21)),)
+    local_cutter = LocalCutter(workers=1, quality=80)
+    try:
+        names = asyncio.run(local_cutter.cut("images/camera_5.jpg", places, _snapshot(), layout))
+    finally:
+        local_cutter.close()
+
+    assert names == {1: "cut_images/images_camera_5/place_1.jpg"}
+    with Image.open(io.BytesIO(stored[names[1]])) as crop:
+        assert crop.size == (21, 21)
+
+
+def test_rabbitmq_cutter_returns_object_names(monkeypatch):
+    async def call(queue_name, message, timeout=None):
+        return {"place_images": [
+            {"place_id": 1, "image_url": "http://minio:9000/parking/cut_images/abc_1.jpg"},
+            {"place_id": 2, "image_url": "cut_images/abc_2.jpg"},
+            {"place_id": 3, "image_url": None},
+        ]}
+
+    monkeypatch.setattr(rabbitmq_client, "call", call)
+    places = [PlaceCut(place_id=place_id, location=[[0, 0], [1, 0], [1, 1]]) for place_id in (1, 2, 3)]
+    names = asyncio.run(RabbitMQCutter().cut("images/test.jpg", places))
+
+    assert names == {1: "cut_images/abc_1.jpg", 2: "cut_images/abc_2.jpg"}
+
+
+class _ZoneRepo:
+    def __init__(self, places):
+        self.places = places
+        self.updates = None
+
+    async def get_places_by_zone(self, zone_id):
+        return self.places
+
+    async def update_places_status(self, place_status_updates):
+        self.updates = place_status_updates
+        return len(place_status_updates)
+
+
+class _BookingService:
+    async def get_booked_place_ids(self, current_time, zone_id):
+        return set()
+
+
+def test_process_zone_image_with_local_cutter(monkeypatch, tmp_path):
+    store = LocalObjectStore(str(tmp_path), chunk_size=1024)
+    local_cutter = LocalCutter(workers=1, quality=80)
+    classified = {}
+
+    async def consumer_count(queue_name):
+        return 0
+
+    async def call(queue_name, message, timeout=None, embed_reply_to=False):
+        # Классификатор читает изображение места по имени объекта
+        filename = message["data"]["filename"]
+        with Image.open(io.BytesIO(await store.get(filename))) as crop:
+            classified[filename] = crop.size
+        return {"class_id": 1, "class_name": "occupied"}
+
+    monkeypatch.setattr(cutter, "object_store", store)
+    monkeypatch.setattr(zone_service, "place_cutter", local_cutter)
+    monkeypatch.setattr(rabbitmq_client, "consumer_count", consumer_count)
+    monkeypatch.setattr(rabbitmq_client, "call", call)
+    repo = _ZoneRepo([
+        (SimpleNamespace(id=1), {"location": [[0, 0], [20, 0], [20, 20], [0, 20]]}),
+        (SimpleNamespace(id=2), {"location": [[30, 10], [60, 10], [60, 40], [30, 40]]}),
+    ])
+    service = ParkingZoneService(repo, _BookingService())
+
+    async def run():
+        await store.put("images/test.jpg", _snapshot())
+        return await service.process_zone_image(1)
+
+    try:
+        response = asyncio.run(run())
+    finally:
+        local_cutter.close()
+
+    assert response.updated_places == 2
+    assert repo.updates == {1: 2, 2: 2}
+    assert classified == {
+        "cut_images/images_test/place_1.jpg": (21, 21),
+        "cut_images/images_test/place_2.jpg": (31, 31),
+    }
@@ -0,0 +1,109 @@
+"""Маршрутизация сессий между основной БД и репликами.
+
+Основная БД и реплики - отдельные файлы SQLite; в каждом лежит строка с его
+именем, поэтому по результату чтения видно, куда ушел запрос.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from domain.models import Violation
+from infrastructure.database import Database
+from infrastructure.repositories.violation import ViolationRepository
+
+
+async def _create_source(path, name: str) -> str:
+    url = f"sqlite+aiosqlite:///{path}"
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE source (name TEXT)"))
+            await conn.execute(text("INSERT INTO source VALUES (:name)"), {"name": name})
+            await conn.run_sync(Violation.__table__.create)
+    finally:
+        await engine.dispose()
+    return url
+
+
+def _run(tmp_path, scenario, replicas=1, strategy="round_robin"):
+    async def run():
+        primary = await _create_source(tmp_path / "primary.db", "primary")
+        replica_urls = [
+            await _create_source(tmp_path / f"replica{i}.db", f"replica{i}") for i in range(replicas)
+        ]
+        db = Database(primary, replica_urls=replica_urls, replica_strategy=strategy)
+        try:
+            return await scenario(db)
+        finally:
+            await db._async_engine.dispose()
+            for replica in db._replicas:
+                await replica.engine.dispose()
+
+    return asyncio.run(run())
+
+
+async def _source(db: Database, **session_options) -> str:
+    async with db.get_session(**session_options) as session:
+        return (await session.execute(text("SELECT name FROM source"))).scalar_one()
+
+
+def test_reads_go_to_replica_and_writes_to_primary(tmp_path):
+    async def scenario(db):
+        return await _source(db, read_only=True), await _source(db), db.get_routing_stats()
+
+    read, write, stats = _run(tmp_path, scenario)
+
+    assert (read, write) == ("replica0", "primary")
+    assert stats["primary"] == {"reads": 0, "writes": 1, "units_of_work": 0}
+    assert stats["replicas"][0]["reads"] == 1
+
+
+def test_primary_reads(tmp_path):
+    async def scenario(db):
+        async with db.unit_of_work():
+            in_unit_of_work = await _source(db, read_only=True)
+        with db.pin_primary():
+            pinned = await _source(db, read_only=True)
+        without_replica = await _source(db, read_only=True, allow_replica=False)
+        after_pin = await _source(db, read_only=True)
+        return in_unit_of_work, pinned, without_replica, after_pin, db.get_routing_stats()
+
+    *sources, stats = _run(tmp_path, scenario)
+
+    assert sources == ["primary", "primary", "primary", "replica0"]
+    assert stats["primary"] == {"reads": 2, "writes": 0, "units_of_work": 1}
+
+
+def test_round_robin_alternates_replicas(tmp_path):
+    async def scenario(db):
+        return [await _source(db, read_only=True) for _ in range(4)]
+
+    assert _run(tmp_path, scenario, replicas=2) == ["replica0", "replica1", "replica0", "replica1"]
+
+
+def test_least_connections_avoids_busy_replica(tmp_path):
+    async def scenario(db):
+        async with db.get_session(read_only=True) as busy:
+            busy_source = (await busy.execute(text("SELECT name FROM source"))).scalar_one()
+            others = [await _source(db, read_only=True) for _ in range(3)]
+        stats = db.get_routing_stats()
+        return busy_source, others, stats
+
+    busy_source, others, stats = _run(tmp_path, scenario, replicas=2, strategy="least_connections")
+
+    assert busy_source not in others and len(set(others)) == 1
+    assert [replica["in_flight"] for replica in stats["replicas"]] == [0, 0]
+
+
+def test_recent_violation_check_reads_primary(tmp_path):
+    """Проверка дубликата нарушения видит запись, еще не дошедшую до реплики"""
+    now = datetime(2026, 1, 1, 12, 0)
+
+    async def scenario(db):
+        repo = ViolationRepository(db)
+        await repo.save(Violation(car_number="A123BC", timestamp=now, parking_place_id=1))
+        return await repo.has_recent_violation(1, "A123BC", now - timedelta(hours=2))
+
+    assert _run(tmp_path, scenario) is True
@@ -0,0 +1,158 @@
+import asyncio
+from datetime import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from application.background import violation_detection_service as detection
+from application.background.violation_detection_service import ViolationDetectionService
+from application.services.impl.camera_parking_place_service import CameraParkingPlaceService
+from application.services.impl.zone_service import ParkingZoneService
+from infrastructure.database import Database
+from infrastructure.repositories.parking_zone import ParkingZoneRepository
+from infrastructure.utils.geometry_cache import GeometryCache, PlaceGeometry, geometry_cache, normalize_polygon
+from web.config import Configs
+from web.schemas import ParkingZoneCreate
+
+SQUARE = [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]
+
+
+def _link(link_id, place_id, location):
+    return SimpleNamespace(id=link_id, parking_place_id=place_id, location=location)
+
+
+def test_normalize_polygon():
+    assert normalize_polygon(SQUARE) == ((0.0, 0.0), (10.0, 0.0), (10.0, 10.0), (0.0, 10.0))
+    # Замкнутый "треугольник" из двух точек и неразбираемые координаты
+    assert normalize_polygon([[0, 0], [1, 1], [0, 0]]) is None
+    assert normalize_polygon([[0, 0], [1], [2, 2]]) is None
+
+
+def test_place_geometry():
+    place = PlaceGeometry(1, 7, normalize_polygon([[-2.5, 1], [10.2, 1], [10.2, 8], [-2.5, 8]]))
+    neighbour = PlaceGeometry(2, 8, normalize_polygon([[5, 0], [20, 0], [20, 5], [5, 5]]))
+
+    assert place.bounds == (-2.5, 1.0, 10.2, 8.0)
+    assert place.crop_box == (0, 1, 11, 9)
+    assert place.area == pytest.approx(12.7 * 7)
+    assert place.contains(0, 5) and not place.contains(11, 5)
+    assert place.overlap_area(neighbour) == pytest.approx(5.2 * 4)
+
+
+def test_camera_entry_invalidation_and_stale_build():
+    cache = GeometryCache()
+    generation = cache.generation(3)
+    geometry = cache.build(3, [_link(1, 7, SQUARE), _link(2, 7, [[50, 50], [60, 50], [60, 60]]), _link(3, 8, None)])
+
+    assert cache.get(3) is geometry
+    # Место без полигона не попадает в разметку, при повторной привязке берется первая
+    assert [place.place_id for place in geometry.places] == [7, 7]
+    assert geometry.place(7).link_id == 1 and geometry.place(8) is None
+
+    cache.invalidate(3)
+    assert cache.get(3) is None
+    # Связи прочитаны до сброса - результат не кэшируется
+    cache.build(3, [_link(1, 7, SQUARE)], generation)
+    assert cache.get(3) is None
+
+
+def test_zone_entry():
+    cache = GeometryCache()
+    zone = cache.build_zone(1, SQUARE)
+    assert cache.get_zone(1) is zone and zone.contains(5, 5) and not zone.contains(15, 5)
+
+    # Неразбираемый контур тоже кэшируется, чтобы не разбирать его на каждый запрос
+    broken = cache.build_zone(2, {"type": "Point"})
+    assert broken.outline is None and not broken.contains(0, 0)
+    assert cache.get_zone(2) is broken
+
+    generation = cache.zone_generation(1)
+    cache.invalidate_zone(1)
+    assert cache.get_zone(1) is None
+    cache.build_zone(1, SQUARE, generation)
+    assert cache.get_zone(1) is None
+
+
+def test_validate_polygon_uses_cache_rules():
+    service = CameraParkingPlaceService(camera_parking_place_repo=None)
+    service._validate_polygon(SQUARE)
+    with pytest.raises(HTTPException):
+        service._validate_polygon([[0, 0], [1, 1], [0, 0]])
+    with pytest.raises(HTTPException):
+        service._validate_polygon([[0, 0], [10, 0], [10, 10], [0, 10]])
+
+
+class _GeometryService:
+    def __init__(self, links):
+        self.links = links
+        self.calls = 0
+
+    async def get_camera_geometry(self, camera_id):
+        self.calls += 1
+        return GeometryCache().build(camera_id, self.links)
+
+
+def test_detector_takes_layout_and_boxes_from_geometry(monkeypatch):
+    captured = {}
+
+    async def cut(image_url, places, image=None, layout=None):
+        captured["places"], captured["layout"] = places, layout
+        return {}
+
+    def compute_fingerprints(image, boxes, hash_size):
+        captured["boxes"] = boxes
+        return {}
+
+    monkeypatch.setattr(detection.place_cutter, "cut", cut)
+    monkeypatch.setattr(detection, "compute_fingerprints", compute_fingerprints)
+    service = _GeometryService([_link(1, 7, SQUARE), _link(2, 8, [[20, 0], [30, 0], [30, 10]])])
+    detector = ViolationDetectionService(
+        parking_zone_service=None, violation_service=None, booking_service=None, camera_service=None,
+        camera_parking_place_service=service, settings=Configs()
+    )
+    places = [SimpleNamespace(id=7), SimpleNamespace(id=8), SimpleNamespace(id=9)]
+    snapshot = SimpleNamespace(camera_id=3, image=b"")
+
+    async def run():
+        camera_places = await detector._camera_places(3, places)
+        await detector._skip_unchanged(camera_places, snapshot, detection.CycleStats())
+        await detector._cut_places("images/camera_3.jpg", camera_places)
+        return camera_places
+
+    camera_places = asyncio.run(run())
+
+    # Место 9 без полигона пропускается, координаты не читаются из данных места
+    assert [place.id for place, _ in camera_places] == [7, 8]
+    assert captured["boxes"] == {7: (0, 0, 11, 11), 8: (20, 0, 31, 11)}
+    assert captured["layout"] == (
+        (7, ((0.0, 0.0), (10.0, 0.0), (10.0, 10.0), (0.0, 10.0)), (0, 0, 11, 11)),
+        (8, ((20.0, 0.0), (30.0, 0.0), (30.0, 10.0)), (20, 0, 31, 11)),
+    )
+    assert [place.place_id for place in captured["places"]] == [7, 8]
+
+
+def test_zone_geometry_invalidated_on_update(seeded_pg):
+    def zone_data(location):
+        return ParkingZoneCreate(
+            zone_name="zone", zone_type_id=1, address="address", start_time=time(0, 0), end_time=time(23, 59),
+            price_per_minute=2, location=location, admin_id=1
+        )
+
+    async def run():
+        db = Database(seeded_pg, pool_size=1, max_overflow=0)
+        try:
+            service = ParkingZoneService(ParkingZoneRepository(db), booking_service=None)
+            before = await service.zone_contains(1, 5, 5)
+            await service.update_zone(1, zone_data(SQUARE))
+            inside = await service.zone_contains(1, 5, 5)
+            cached = geometry_cache.get_zone(1)
+            await service.delete_zone(1)
+            return before, inside, cached, geometry_cache.get_zone(1)
+        finally:
+            await db._async_engine.dispose()
+
+    before, inside, cached, after_delete = asyncio.run(run())
+    assert before is False and inside is True
+    assert cached.outline is not None
+    assert after_delete is None
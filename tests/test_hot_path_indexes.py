@@ -0,0 +1,159 @@
+"""Планы горячих запросов после миграций используют индексы из 0001/0002.
+
+Запросы берутся из самих репозиториев: выполненные SQL-выражения перехватываются
+и повторяются через EXPLAIN с теми же параметрами. В тестовой базе почти нет данных,
+поэтому последовательное сканирование отключено (enable_seqscan = off) - проверяется,
+что подходящий индекс вообще применим к условию запроса.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import Callable, List, Set, Tuple
+
+import pytest
+from sqlalchemy import event
+
+from infrastructure.database import Database
+from infrastructure.repositories.booking import BookingRepository
+from infrastructure.repositories.camera import CameraRepository
+from infrastructure.repositories.camera_parking_place import CameraParkingPlaceRepository
+from infrastructure.repositories.parking_place import ParkingPlaceRepository
+from infrastructure.repositories.parking_zone import ParkingZoneRepository
+from infrastructure.repositories.violation import ViolationRepository
+
+INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+
+class PlanCapture:
+    """Перехватывает SQL, выполненный через движок, и строит для него планы"""
+
+    def __init__(self, db: Database):
+        self.engine = db._async_engine
+        self.statements: List[Tuple[str, tuple]] = []
+        self.explaining = False
+        event.listen(self.engine.sync_engine, "connect", self._on_connect)
+        event.listen(self.engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    @staticmethod
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("SET enable_seqscan = off")
+        cursor.close()
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not self.explaining and not executemany:
+            self.statements.append((statement, parameters))
+
+    async def index_scans(self) -> Set[str]:
+        """Индексы, которые встречаются в планах всех перехваченных выражений"""
+        found = set()
+        self.explaining = True
+        try:
+            async with self.engine.connect() as conn:
+                for statement, parameters in self.statements:
+                    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                    plan = result.scalar()
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    found |= _index_scans(plan[0]["Plan"])
+        finally:
+            self.explaining = False
+        return found
+
+
+def _index_scans(node) -> Set[str]:
+    found = set()
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        if node.get("Node Type") in INDEX_SCANS:
+            found.add(node["Index Name"])
+        nodes.extend(node.get("Plans", []))
+    return found
+
+
+HOT_QUERIES: List[Tuple[str, Callable, Set[str]]] = [
+    (
+        "booking_has_overlapping",
+        lambda db: BookingRepository(db).has_overlapping_booking(1, NOW, NOW + timedelta(hours=1)),
+        {"ix_bookings_place_status_period", "bookings_no_overlap"},
+    ),
+    (
+        "booking_list_active",
+        lambda db: BookingRepository(db).list_active(NOW),
+        {"ix_bookings_active_start_end", "ix_bookings_active_end"},
+    ),
+    (
+        "booking_list_active_place_ids_in_zone",
+        lambda db: BookingRepository(db).list_active_place_ids(NOW, zone_id=1),
+        {"ix_bookings_active_start_end", "ix_bookings_active_end"},
+    ),
+    (
+        "booking_complete_expired",
+        lambda db: BookingRepository(db).complete_expired_bookings(),
+        {"ix_bookings_active_end"},
+    ),
+    (
+        "place_free_up_expired_booking_places",
+        lambda db: ParkingPlaceRepository(db).free_up_expired_booking_places(),
+        {"ix_bookings_active_end"},
+    ),
+    (
+        "place_occupy_started_booking_places",
+        lambda db: ParkingPlaceRepository(db).occupy_started_booking_places(),
+        {"ix_bookings_active_start_end", "ix_bookings_active_end"},
+    ),
+    (
+        "violation_list_by_place",
+        lambda db: ViolationRepository(db).list_by_place(1),
+        {"ix_violations_place_car_timestamp"},
+    ),
+    (
+        "violation_has_recent",
+        lambda db: ViolationRepository(db).has_recent_violation(1, "A123BC", NOW - timedelta(hours=2)),
+        {"ix_violations_place_car_timestamp"},
+    ),
+    (
+        "violation_list_by_date_range",
+        lambda db: ViolationRepository(db).list_by_date_range(NOW - timedelta(days=1), NOW),
+        {"ix_violations_timestamp"},
+    ),
+    (
+        "place_list_by_zone",
+        lambda db: ParkingPlaceRepository(db).list_by_zone(1),
+        {"ix_parking_places_zone_status"},
+    ),
+    (
+        "zone_places_with_camera_link",
+        lambda db: ParkingZoneRepository(db).get_places_by_zone(1),
+        {"ix_parking_places_zone_status"},
+    ),
+    (
+        "camera_list_by_zone",
+        lambda db: CameraRepository(db).list_by_zone(1),
+        {"ix_cameras_parking_zone_id"},
+    ),
+    (
+        "camera_places_by_camera",
+        lambda db: CameraParkingPlaceRepository(db).list_places_by_camera(1),
+        {"ix_camera_parking_places_camera_id"},
+    ),
+]
+
+
+@pytest.mark.parametrize("query, expected", [(q[1], q[2]) for q in HOT_QUERIES], ids=[q[0] for q in HOT_QUERIES])
+def test_hot_query_uses_index(migrated_pg, query, expected):
+    async def run() -> Set[str]:
+        db = Database(migrated_pg, pool_size=1, max_overflow=0)
+        capture = PlanCapture(db)
+        try:
+            await query(db)
+            assert capture.statements, "query did not reach the database"
+            return await capture.index_scans()
+        finally:
+            await db._async_engine.dispose()
+
+    used = asyncio.run(run())
+    assert used & expected, f"expected an index scan on one of {sorted(expected)}, plan used {sorted(used)}"
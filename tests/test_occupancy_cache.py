@@ -0,0 +1,126 @@
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.models import ParkingPlace
+from infrastructure.database import Database
+from infrastructure.repositories.parking_place import OCCUPANCY_COLUMNS, ParkingPlaceRepository
+from infrastructure.utils.occupancy_cache import OccupancyCache, occupancy_cache
+
+
+def _cache(rows):
+    cache = OccupancyCache()
+    cache.load(rows)
+    return cache
+
+
+def test_status_ids_above_int8_range():
+    cache = _cache([(1, 10, 1, 1)])
+    cache.upsert_places([(1, 10, 1, 300), (2, 10, 2, 40000)])
+
+    assert cache.get_zone(10).places() == [(1, 1, 300), (2, 2, 40000)]
+    assert [row[0] for row in cache.list_by_status(300)] == [1]
+
+
+def test_reconcile_fixes_only_diverged_places():
+    cache = _cache([(1, 10, 1, 1), (2, 10, 2, 1), (3, 20, 1, 2)])
+    untouched_version = cache.version(20)
+
+    # Место 1 изменилось, место 2 удалено, место 4 добавлено другим процессом
+    fixed = cache.reconcile([(1, 10, 1, 2), (3, 20, 1, 2), (4, 10, 3, 1)])
+
+    assert fixed == 3
+    assert cache.get_zone(10).places() == [(1, 1, 2), (4, 3, 1)]
+    assert cache.version(20) == untouched_version
+    assert cache.reconcile([(1, 10, 1, 2), (3, 20, 1, 2), (4, 10, 3, 1)]) == 0
+
+
+def test_reconcile_skips_zones_changed_after_snapshot():
+    cache = _cache([(1, 10, 1, 1), (2, 20, 1, 1)])
+    versions = cache.versions()
+    # Write-through после снимка: место 1 занято, место 3 добавлено
+    cache.upsert_places([(1, 10, 1, 2), (3, 10, 2, 1)])
+
+    fixed = cache.reconcile([(1, 10, 1, 1), (2, 20, 1, 2)], versions)
+
+    assert fixed == 1
+    assert cache.get_zone(10).places() == [(1, 1, 2), (3, 2, 1)]
+    assert cache.get_zone(20).places() == [(2, 1, 2)]
+
+
+def test_after_commit_callbacks_follow_commit_order(tmp_path, monkeypatch):
+    """Колбэк второй транзакции не обгоняет колбэк первой, даже если ее COMMIT быстрее"""
+    applied = []
+    original_commit = AsyncSession.commit
+
+    async def commit(self):
+        if self.info.get("slow"):
+            await asyncio.sleep(0.05)
+        await original_commit(self)
+
+    monkeypatch.setattr(AsyncSession, "commit", commit)
+
+    async def run():
+        db = Database(f"sqlite+aiosqlite:///{tmp_path / 'commit_order.db'}")
+        first_committing = asyncio.Event()
+
+        async def first():
+            async with db.get_session() as session:
+                session.info["slow"] = True
+                db.after_commit(lambda: applied.append("first"))
+                first_committing.set()
+
+        async def second():
+            await first_committing.wait()
+            async with db.get_session() as session:
+                db.after_commit(lambda: applied.append("second"))
+
+        try:
+            await asyncio.gather(first(), second())
+        finally:
+            await db._async_engine.dispose()
+
+    asyncio.run(run())
+    assert applied == ["first", "second"]
+
+
+def test_after_commit_is_skipped_on_rollback(tmp_path):
+    applied = []
+
+    async def run():
+        db = Database(f"sqlite+aiosqlite:///{tmp_path / 'rollback.db'}")
+        try:
+            async with db.get_session():
+                db.after_commit(lambda: applied.append("write"))
+                raise RuntimeError("failed write")
+        except RuntimeError:
+            pass
+        finally:
+            await db._async_engine.dispose()
+
+    asyncio.run(run())
+    assert applied == []
+
+
+def test_snapshot_read_does_not_block_commits(seeded_pg):
+    async def run():
+        db = Database(seeded_pg, pool_size=2, max_overflow=0)
+        repo = ParkingPlaceRepository(db)
+        try:
+            occupancy_cache.load(await repo.list_occupancy())
+            async with db.snapshot_session(occupancy_cache.versions) as (session, versions):
+                # Запись фиксируется, пока открыт снимок, и сразу попадает в кэш
+                await asyncio.wait_for(repo.update_status(1, 2), timeout=5)
+                result = await session.execute(select(*OCCUPANCY_COLUMNS).where(ParkingPlace.id == 1))
+                rows = [tuple(row) for row in result.all()]
+            fixed = occupancy_cache.reconcile(rows, versions)
+            return rows, fixed, occupancy_cache.get_zone(1).places()
+        finally:
+            await db._async_engine.dispose()
+
+    rows, fixed, places = asyncio.run(run())
+    # Снимок видит состояние до записи, но не откатывает кэш к нему
+    assert rows == [(1, 1, 1, 1)]
+    assert fixed == 0
+    assert (1, 1, 2) in places
@@ -0,0 +1,29 @@
+import io
+
+from PIL import Image, ImageDraw
+
+from infrastructure.utils.place_fingerprint import compute_fingerprints
+
+
+def _snapshot(stripe: bool) -> bytes:
+    image = Image.new("RGB", (64, 48), (30, 30, 30))
+    if stripe:
+        ImageDraw.Draw(image).rectangle((56, 0, 63, 47), fill=(250, 250, 250))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_box_past_snapshot_edge_is_clamped():
+    boxes = {
+        1: (0, 0, 20, 20),
+        2: (40, 30, 80, 60),  # выходит за правый и нижний край
+        3: (70, 0, 90, 20),  # целиком вне кадра
+    }
+    plain = compute_fingerprints(_snapshot(stripe=False), boxes, hash_size=8)
+    striped = compute_fingerprints(_snapshot(stripe=True), boxes, hash_size=8)
+
+    assert sorted(plain) == sorted(striped) == [1, 2]
+    # Отпечаток обрезанной области меняется вместе с её содержимым
+    assert plain[1] == striped[1]
+    assert plain[2] != striped[2]
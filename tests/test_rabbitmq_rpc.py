@@ -0,0 +1,58 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from infrastructure.utils.rabbitmq_utils import RabbitMQClient
+
+
+def _reply(data, correlation_id=None):
+    return SimpleNamespace(body=json.dumps(data).encode(), correlation_id=correlation_id)
+
+
+def _client(published):
+    client = RabbitMQClient()
+
+    async def ensure_rpc_queue():
+        return "rpc_reply"
+
+    async def publish_message(queue_name, message, reply_to=None, correlation_id=None):
+        published.append((message, correlation_id))
+
+    client._ensure_rpc_queue = ensure_rpc_queue
+    client.publish_message = publish_message
+    return client
+
+
+def test_calls_with_same_request_id_get_their_own_replies():
+    published = []
+    client = _client(published)
+
+    async def run():
+        calls = [
+            asyncio.create_task(client.call("classify_queue", {"request_id": "same", "data": {"n": n}}, timeout=1))
+            for n in (1, 2)
+        ]
+        await asyncio.sleep(0)
+        # Отвечаем в обратном порядке, по correlation_id каждого запроса
+        for message, correlation_id in reversed(published):
+            await client._on_rpc_reply(_reply({"n": message["data"]["n"]}, correlation_id))
+        return await asyncio.gather(*calls)
+
+    assert asyncio.run(run()) == [{"n": 1}, {"n": 2}]
+    assert len({correlation_id for _, correlation_id in published}) == 2
+    assert all(message["request_id"] == "same" for message, _ in published)
+    assert client._rpc_futures == {} and client._rpc_request_ids == {}
+
+
+def test_reply_without_correlation_id_is_matched_by_request_id():
+    published = []
+    client = _client(published)
+
+    async def run():
+        call = asyncio.create_task(client.call("cut_queue", {"request_id": "r1"}, timeout=1))
+        await asyncio.sleep(0)
+        await client._on_rpc_reply(_reply({"request_id": "r1", "ok": True}))
+        return await call
+
+    assert asyncio.run(run()) == {"request_id": "r1", "ok": True}
+    assert client._rpc_request_ids == {}
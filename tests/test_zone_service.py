@@ -0,0 +1,28 @@
+import asyncio
+
+from application.services.impl.zone_service import ParkingZoneService
+from infrastructure.utils.rabbitmq_utils import rabbitmq_client
+
+
+def test_classify_concurrently_keeps_results_of_other_places(monkeypatch):
+    replies = {
+        "cut_images/1.jpg": {"class_id": 1, "class_name": "occupied"},
+        "cut_images/2.jpg": ConnectionError("channel closed"),
+        "cut_images/3.jpg": asyncio.TimeoutError(),
+        "cut_images/4.jpg": ["not", "a", "dict"],
+        "cut_images/5.jpg": {"error": "model not loaded"},
+        "cut_images/6.jpg": {"class_id": 0, "class_name": "free"},
+    }
+
+    async def call(queue_name, message, timeout=None, embed_reply_to=False):
+        reply = replies[message["data"]["filename"]]
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    monkeypatch.setattr(rabbitmq_client, "call", call)
+    service = ParkingZoneService(parking_zone_repo=None, booking_service=None)
+    place_files = {place_id: f"cut_images/{place_id}.jpg" for place_id in range(1, 7)}
+
+    # Ошибка публикации или неожиданный ответ по одному месту не отменяет остальные
+    assert asyncio.run(service._classify_concurrently(place_files)) == {1: 1, 6: 0}
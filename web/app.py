@@ -7,13 +7,16 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from application.background.violation_detection_service import ViolationDetectionService
 from application.services.interfaces.i_booking_service import IBookingService
+from application.services.interfaces.i_camera_parking_place_service import ICameraParkingPlaceService
 from application.services.interfaces.i_camera_service import ICameraService
 from application.services.interfaces.i_parking_place_service import IParkingPlaceService
 from application.services.interfaces.i_parking_zone_service import IParkingZoneService
 from application.services.interfaces.i_violation_service import IViolationService
+from infrastructure.utils.cutter import place_cutter
 from infrastructure.utils.rabbitmq_utils import rabbitmq_client
+from infrastructure.utils.s3_utils import object_store
 from web.config import Configs
-from web.container import get_container
+from web.container import get_container, resolve_all
 from web.handlers.admin import router as admin_router
 from web.handlers.booking import router as booking_router
 from web.handlers.booking_status import router as booking_status_router
@@ -21,6 +24,7 @@ from web.handlers.camera import router as camera_router
 from web.handlers.camera_parking_place import router as camera_parking_place_router
 from web.handlers.car import router as car_router
 from web.handlers.car_user import router as car_user_router
+from web.handlers.metrics import router as metrics_router
 from web.handlers.place_status import router as place_status_router
 from web.handlers.places import router as places_router
 from web.handlers.unified_auth import router as unified_auth_router
@@ -38,6 +42,8 @@ async def lifespan(app: FastAPI):
     logger.info("Starting application...")
     container = get_container()
     app.state.container = container
+    # Синглтоны сервисов собираются один раз при старте
+    resolve_all()
 
     try:
         logger.info("Connecting to RabbitMQ...")
@@ -50,14 +56,19 @@ async def lifespan(app: FastAPI):
         violation_service: IViolationService = container.resolve(IViolationService)
         booking_service: IBookingService = container.resolve(IBookingService)
         camera_service: ICameraService = container.resolve(ICameraService)
+        camera_parking_place_service: ICameraParkingPlaceService = container.resolve(ICameraParkingPlaceService)
         parking_place_service: IParkingPlaceService = container.resolve(IParkingPlaceService)
 
+        # Прогрев кэша занятости мест до запуска фоновых задач
+        await parking_place_service.warm_occupancy_cache()
+
         # Настройка и запуск сервиса обнаружения нарушений
         violation_detection_service = ViolationDetectionService(
             parking_zone_service=parking_zone_service,
             violation_service=violation_service,
             booking_service=booking_service,
             camera_service=camera_service,
+            camera_parking_place_service=camera_parking_place_service,
             settings=settings,
             check_interval_minutes=15
         )
@@ -79,6 +90,13 @@ async def lifespan(app: FastAPI):
             minutes=1,
             id="complete_expired_bookings_job"
         )
+        if settings.OCCUPANCY_CACHE_RELOAD_SECONDS > 0:
+            scheduler.add_job(
+                parking_place_service.reload_occupancy_cache,
+                'interval',
+                seconds=settings.OCCUPANCY_CACHE_RELOAD_SECONDS,
+                id="reload_occupancy_cache_job"
+            )
         scheduler.start()
         app.state.scheduler = scheduler
         logger.info("APScheduler for status automation started")
@@ -104,6 +122,9 @@ async def lifespan(app: FastAPI):
     await rabbitmq_client.close()
     logger.info("RabbitMQ connection closed")
 
+    place_cutter.close()
+    object_store.close()
+
 
 app = FastAPI(title="Parking Service API", lifespan=lifespan)
 
@@ -129,4 +150,5 @@ app.include_router(user_router)
 app.include_router(violation_router)
 app.include_router(zone_type_router)
 app.include_router(places_router)
-app.include_router(zones_router)
\ No newline at end of file
+app.include_router(zones_router)
+app.include_router(metrics_router)
\ No newline at end of file
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Any, Dict, Type, TypeVar
 
 import punq
 
@@ -67,10 +68,51 @@ from application.services.impl.unified_auth_service import UnifiedAuthService
 from web.config import Configs
 
 
+T = TypeVar("T")
+
+# Уже собранные зависимости: handlers берут их по интерфейсу без обращения к punq на каждый запрос
+_resolved: Dict[type, Any] = {}
+
+# Сервисы, которые собираются заранее при старте приложения
+SERVICE_INTERFACES = (
+    IParkingZoneService,
+    IParkingPlaceService,
+    IAdminService,
+    IBookingService,
+    IBookingStatusService,
+    ICarService,
+    ICarUserService,
+    ICameraService,
+    ICameraParkingPlaceService,
+    IPlaceStatusService,
+    IUserService,
+    IViolationService,
+    IZoneTypeService,
+    IUnifiedAuthService,
+    Database,
+    Configs,
+)
+
+
 @lru_cache(1)
 def get_container() -> punq.Container:
     return _init_container()
 
+
+def get_service(interface: Type[T]) -> T:
+    """Синглтон по интерфейсу из таблицы собранных зависимостей"""
+    try:
+        return _resolved[interface]
+    except KeyError:
+        service = _resolved[interface] = get_container().resolve(interface)
+        return service
+
+
+def resolve_all() -> None:
+    """Собрать все сервисы заранее, чтобы первый запрос не платил за построение графа"""
+    for interface in SERVICE_INTERFACES:
+        get_service(interface)
+
 def _init_container() -> punq.Container:
     container = punq.Container()
 
@@ -86,6 +128,14 @@ def _init_container() -> punq.Container:
         scope=punq.Scope.singleton,
         factory=lambda: Database(
             url=configs.DATABASE_URL,
+            pool_size=configs.DB_POOL_SIZE,
+            max_overflow=configs.DB_MAX_OVERFLOW,
+            pool_recycle=configs.DB_POOL_RECYCLE_SECONDS,
+            pool_timeout=configs.DB_POOL_TIMEOUT_SECONDS,
+            pool_pre_ping=configs.DB_POOL_PRE_PING,
+            statement_cache_size=configs.DB_STATEMENT_CACHE_SIZE,
+            replica_urls=configs.DATABASE_REPLICA_URLS,
+            replica_strategy=configs.DB_REPLICA_STRATEGY,
         ),
     )
 
@@ -98,45 +148,45 @@ def _init_container() -> punq.Container:
 def _register_repositories(container: punq.Container) -> None:
     db = container.resolve(Database)
     
-    container.register(IParkingZone, factory=lambda: ParkingZoneRepository(db))
-    container.register(IParkingPlace, factory=lambda: ParkingPlaceRepository(db))
-    container.register(IAdmin, factory=lambda: AdminRepository(db))
-    container.register(IBooking, factory=lambda: BookingRepository(db))
-    container.register(IBookingStatus, factory=lambda: BookingStatusRepository(db))
-    container.register(ICar, factory=lambda: CarRepository(db))
-    container.register(ICarUser, factory=lambda: CarUserRepository(db))
-    container.register(ICamera, factory=lambda: CameraRepository(db))
-    container.register(ICameraParkingPlace, factory=lambda: CameraParkingPlaceRepository(db))
-    container.register(IPlaceStatus, factory=lambda: PlaceStatusRepository(db))
-    container.register(IUser, factory=lambda: UserRepository(db))
-    container.register(IViolation, factory=lambda: ViolationRepository(db))
-    container.register(IZoneType, factory=lambda: ZoneTypeRepository(db))
-    container.register(IUnifiedAuth, factory=lambda: UnifiedAuthRepository(db))
+    container.register(IParkingZone, factory=lambda: ParkingZoneRepository(db), scope=punq.Scope.singleton)
+    container.register(IParkingPlace, factory=lambda: ParkingPlaceRepository(db), scope=punq.Scope.singleton)
+    container.register(IAdmin, factory=lambda: AdminRepository(db), scope=punq.Scope.singleton)
+    container.register(IBooking, factory=lambda: BookingRepository(db), scope=punq.Scope.singleton)
+    container.register(IBookingStatus, factory=lambda: BookingStatusRepository(db), scope=punq.Scope.singleton)
+    container.register(ICar, factory=lambda: CarRepository(db), scope=punq.Scope.singleton)
+    container.register(ICarUser, factory=lambda: CarUserRepository(db), scope=punq.Scope.singleton)
+    container.register(ICamera, factory=lambda: CameraRepository(db), scope=punq.Scope.singleton)
+    container.register(ICameraParkingPlace, factory=lambda: CameraParkingPlaceRepository(db), scope=punq.Scope.singleton)
+    container.register(IPlaceStatus, factory=lambda: PlaceStatusRepository(db), scope=punq.Scope.singleton)
+    container.register(IUser, factory=lambda: UserRepository(db), scope=punq.Scope.singleton)
+    container.register(IViolation, factory=lambda: ViolationRepository(db), scope=punq.Scope.singleton)
+    container.register(IZoneType, factory=lambda: ZoneTypeRepository(db), scope=punq.Scope.singleton)
+    container.register(IUnifiedAuth, factory=lambda: UnifiedAuthRepository(db), scope=punq.Scope.singleton)
 
 
 def _register_services(container: punq.Container) -> None:
     container.register(IParkingZoneService, factory=lambda: ParkingZoneService(
         container.resolve(IParkingZone),
         container.resolve(IBookingService)
-    ))
-    container.register(IParkingPlaceService, factory=lambda: ParkingPlaceService(container.resolve(IParkingPlace)))
-    container.register(IAdminService, factory=lambda: AdminService(container.resolve(IAdmin)))
+    ), scope=punq.Scope.singleton)
+    container.register(IParkingPlaceService, factory=lambda: ParkingPlaceService(container.resolve(IParkingPlace)), scope=punq.Scope.singleton)
+    container.register(IAdminService, factory=lambda: AdminService(container.resolve(IAdmin)), scope=punq.Scope.singleton)
     container.register(IBookingService, factory=lambda: BookingService(
         container.resolve(IBooking),
         container.resolve(IParkingPlaceService)
-    ))
-    container.register(IBookingStatusService, factory=lambda: BookingStatusService(container.resolve(IBookingStatus)))
-    container.register(ICarService, factory=lambda: CarService(container.resolve(ICar)))
-    container.register(ICarUserService, factory=lambda: CarUserService(container.resolve(ICarUser)))
-    container.register(ICameraService, factory=lambda: CameraService(container.resolve(ICamera)))
-    container.register(ICameraParkingPlaceService, factory=lambda: CameraParkingPlaceService(container.resolve(ICameraParkingPlace)))
-    container.register(IPlaceStatusService, factory=lambda: PlaceStatusService(container.resolve(IPlaceStatus)))
-    container.register(IUserService, factory=lambda: UserService(container.resolve(IUser)))
-    container.register(IViolationService, factory=lambda: ViolationService(container.resolve(IViolation)))
-    container.register(IZoneTypeService, factory=lambda: ZoneTypeService(container.resolve(IZoneType)))
+    ), scope=punq.Scope.singleton)
+    container.register(IBookingStatusService, factory=lambda: BookingStatusService(container.resolve(IBookingStatus)), scope=punq.Scope.singleton)
+    container.register(ICarService, factory=lambda: CarService(container.resolve(ICar)), scope=punq.Scope.singleton)
+    container.register(ICarUserService, factory=lambda: CarUserService(container.resolve(ICarUser)), scope=punq.Scope.singleton)
+    container.register(ICameraService, factory=lambda: CameraService(container.resolve(ICamera)), scope=punq.Scope.singleton)
+    container.register(ICameraParkingPlaceService, factory=lambda: CameraParkingPlaceService(container.resolve(ICameraParkingPlace)), scope=punq.Scope.singleton)
+    container.register(IPlaceStatusService, factory=lambda: PlaceStatusService(container.resolve(IPlaceStatus)), scope=punq.Scope.singleton)
+    container.register(IUserService, factory=lambda: UserService(container.resolve(IUser)), scope=punq.Scope.singleton)
+    container.register(IViolationService, factory=lambda: ViolationService(container.resolve(IViolation)), scope=punq.Scope.singleton)
+    container.register(IZoneTypeService, factory=lambda: ZoneTypeService(container.resolve(IZoneType)), scope=punq.Scope.singleton)
     
     container.register(IUnifiedAuthService, factory=lambda: UnifiedAuthService(
         container.resolve(IUnifiedAuth), 
         container.resolve(IUser), 
         container.resolve(IAdmin)
-    ))
+    ), scope=punq.Scope.singleton)
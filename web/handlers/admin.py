@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends
-from typing import List, Annotated
+from fastapi import APIRouter, Depends, Query
+from typing import List, Annotated, Optional
 
-from web.container import get_container
+from web.container import get_service
 from web.schemas import AdminCreate, AdminResponse
 from web.handlers.unified_auth import get_current_admin
 from application.services.interfaces.i_admin_service import IAdminService
@@ -10,15 +10,19 @@ from domain.models import Admin as AdminModel
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 def get_admin_service() -> IAdminService:
-    return get_container().resolve(IAdminService)
+    return get_service(IAdminService)
 
 @router.get("/{admin_id}", response_model=AdminResponse)
 async def get_admin(admin_id: int, service: IAdminService = Depends(get_admin_service)):
     return await service.get_admin(admin_id)
 
 @router.get("/", response_model=List[AdminResponse])
-async def get_all_admins(service: IAdminService = Depends(get_admin_service)):
-    return await service.get_all_admins()
+async def get_all_admins(
+    after_id: Optional[int] = Query(None, description="Вернуть записи с id больше указанного"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Размер страницы"),
+    service: IAdminService = Depends(get_admin_service)
+):
+    return await service.get_all_admins(after_id, limit)
 
 @router.put("/{admin_id}", response_model=AdminResponse)
 async def update_admin(admin_id: int, data: AdminCreate, service: IAdminService = Depends(get_admin_service)):
@@ -1,30 +1,46 @@
-from fastapi import APIRouter, Depends
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
 
-from web.container import get_container
+from web.container import get_service
+from web.streaming import ndjson_response
 from web.schemas import BookingCreate, BookingResponse, BookingDetailedResponse, BookingCreateWithoutEnd, BookingFinishResponse
 from application.services.interfaces.i_booking_service import IBookingService
+from domain.exceptions import BookingConflictError
 
 router = APIRouter(prefix="/booking", tags=["booking"])
 
 def get_booking_service() -> IBookingService:
-    return get_container().resolve(IBookingService)
+    return get_service(IBookingService)
 
 @router.post("/", response_model=BookingResponse)
 async def create_booking(data: BookingCreate, service: IBookingService = Depends(get_booking_service)):
-    return await service.create_booking(data)
+    try:
+        return await service.create_booking(data)
+    except BookingConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.get("/export", summary="Выгрузка всех бронирований (NDJSON)")
+async def export_bookings(service: IBookingService = Depends(get_booking_service)):
+    return ndjson_response(service.stream_all_bookings(), "bookings.ndjson")
 
 @router.get("/{booking_id}", response_model=BookingResponse)
 async def get_booking(booking_id: int, service: IBookingService = Depends(get_booking_service)):
     return await service.get_booking(booking_id)
 
 @router.get("/", response_model=List[BookingResponse])
-async def get_all_bookings(service: IBookingService = Depends(get_booking_service)):
-    return await service.get_all_bookings()
+async def get_all_bookings(
+    after_id: Optional[int] = Query(None, description="Вернуть записи с id больше указанного"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Размер страницы"),
+    service: IBookingService = Depends(get_booking_service)
+):
+    return await service.get_all_bookings(after_id, limit)
 
 @router.put("/{booking_id}", response_model=BookingResponse)
 async def update_booking(booking_id: int, data: BookingCreate, service: IBookingService = Depends(get_booking_service)):
-    return await service.update_booking(booking_id, data)
+    try:
+        return await service.update_booking(booking_id, data)
+    except BookingConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 @router.delete("/{booking_id}")
 async def delete_booking(booking_id: int, service: IBookingService = Depends(get_booking_service)):
@@ -53,7 +69,10 @@ async def create_booking_without_end(data: BookingCreateWithoutEnd, service: IBo
     Создание бронирования без указания времени окончания. 
     Время начала будет установлено автоматически на текущий момент времени.
     """
-    return await service.create_booking_without_end(data)
+    try:
+        return await service.create_booking_without_end(data)
+    except BookingConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     
 @router.post("/{booking_id}/finish", response_model=BookingFinishResponse, summary="Завершение бронирования с расчетом стоимости")
 async def finish_booking(booking_id: int, service: IBookingService = Depends(get_booking_service)):
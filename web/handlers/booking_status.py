@@ -1,14 +1,14 @@
 from fastapi import APIRouter, Depends
 from typing import List
 
-from web.container import get_container
+from web.container import get_service
 from web.schemas import BookingStatusCreate, BookingStatusResponse
 from application.services.interfaces.i_booking_status_service import IBookingStatusService
 
 router = APIRouter(prefix="/booking-status", tags=["booking-status"])
 
 def get_booking_status_service() -> IBookingStatusService:
-    return get_container().resolve(IBookingStatusService)
+    return get_service(IBookingStatusService)
 
 @router.post("/", response_model=BookingStatusResponse)
 async def create_booking_status(data: BookingStatusCreate, service: IBookingStatusService = Depends(get_booking_status_service)):
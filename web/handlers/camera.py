@@ -1,17 +1,18 @@
-from fastapi import APIRouter, Depends, Response, HTTPException
-from typing import List, Dict
+from fastapi import APIRouter, Depends, Response, HTTPException, Query
+from typing import List, Dict, Optional
 import base64
+from datetime import datetime
 from pydantic import BaseModel
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from web.container import get_container
+from web.container import get_service
 from web.schemas import CameraCreate, CameraResponse
 from application.services.interfaces.i_camera_service import ICameraService
 
 router = APIRouter(prefix="/camera", tags=["camera"])
 
 def get_camera_service() -> ICameraService:
-    return get_container().resolve(ICameraService)
+    return get_service(ICameraService)
 
 @router.post("/", response_model=CameraResponse)
 async def create_camera(data: CameraCreate, service: ICameraService = Depends(get_camera_service)):
@@ -22,8 +23,12 @@ async def get_camera(camera_id: int, service: ICameraService = Depends(get_camer
     return await service.get_camera(camera_id)
 
 @router.get("/", response_model=List[CameraResponse])
-async def get_all_cameras(service: ICameraService = Depends(get_camera_service)):
-    return await service.get_all_cameras()
+async def get_all_cameras(
+    after_id: Optional[int] = Query(None, description="Вернуть записи с id больше указанного"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Размер страницы"),
+    service: ICameraService = Depends(get_camera_service)
+):
+    return await service.get_all_cameras(after_id, limit)
 
 @router.put("/{camera_id}", response_model=CameraResponse)
 async def update_camera(camera_id: int, data: CameraCreate, service: ICameraService = Depends(get_camera_service)):
@@ -42,10 +47,14 @@ class CameraSnapshot(BaseModel):
     camera_id: int
     image_base64: str
     content_type: str = "image/jpeg"
+    size: int
+    captured_at: Optional[datetime] = None
+    etag: Optional[str] = None
 
 class ZoneSnapshotsResponse(BaseModel):
     zone_id: int
     snapshots: List[CameraSnapshot]
+    failed_camera_ids: List[int] = []
 
 @router.get("/snapshot/{zone_id}", response_model=ZoneSnapshotsResponse, summary="Получить снимки со всех камер зоны")
 async def get_zone_snapshots(zone_id: int, service: ICameraService = Depends(get_camera_service)):
@@ -53,16 +62,28 @@ async def get_zone_snapshots(zone_id: int, service: ICameraService = Depends(get
         snapshots = await service.get_zone_snapshots(zone_id)
         
         camera_snapshots = []
-        for camera_id, image_data in snapshots.items():
-            base64_image = base64.b64encode(image_data).decode('utf-8')
+        for snapshot in snapshots.snapshots:
+            base64_image = base64.b64encode(snapshot.image).decode('utf-8')
             camera_snapshots.append(CameraSnapshot(
-                camera_id=camera_id,
-                image_base64=base64_image
+                camera_id=snapshot.camera_id,
+                image_base64=base64_image,
+                size=snapshot.size,
+                captured_at=snapshot.captured_at,
+                etag=snapshot.etag
             ))
         
         return ZoneSnapshotsResponse(
             zone_id=zone_id,
-            snapshots=camera_snapshots
+            snapshots=camera_snapshots,
+            failed_camera_ids=snapshots.failed_camera_ids
         )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Ошибка при получении снимков: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Ошибка при получении снимков: {str(e)}")
+
+@router.get("/{camera_id}/snapshot/raw", summary="Снимок камеры в виде изображения (потоковая выдача)")
+async def stream_camera_snapshot(camera_id: int, service: ICameraService = Depends(get_camera_service)):
+    try:
+        chunks = await service.stream_camera_snapshot(camera_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return StreamingResponse(chunks, media_type="image/jpeg")
@@ -1,14 +1,14 @@
-from fastapi import APIRouter, Depends
-from typing import List
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
 
-from web.container import get_container
-from web.schemas import CameraParkingPlaceCreate, CameraParkingPlaceResponse
+from web.container import get_service
+from web.schemas import CameraParkingPlaceCreate, CameraParkingPlaceResponse, PlaceGeometryResponse, PlaceOverlap
 from application.services.interfaces.i_camera_parking_place_service import ICameraParkingPlaceService
 
 router = APIRouter(prefix="/camera-parking-place", tags=["camera-parking-place"])
 
 def get_camera_parking_place_service() -> ICameraParkingPlaceService:
-    return get_container().resolve(ICameraParkingPlaceService)
+    return get_service(ICameraParkingPlaceService)
 
 @router.post("/", response_model=CameraParkingPlaceResponse)
 async def create_camera_parking_place(data: CameraParkingPlaceCreate, service: ICameraParkingPlaceService = Depends(get_camera_parking_place_service)):
@@ -19,8 +19,12 @@ async def get_camera_parking_place(id: int, service: ICameraParkingPlaceService
     return await service.get_camera_parking_place(id)
 
 @router.get("/", response_model=List[CameraParkingPlaceResponse])
-async def get_all_camera_parking_places(service: ICameraParkingPlaceService = Depends(get_camera_parking_place_service)):
-    return await service.get_all_camera_parking_places()
+async def get_all_camera_parking_places(
+    after_id: Optional[int] = Query(None, description="Вернуть записи с id больше указанного"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Размер страницы"),
+    service: ICameraParkingPlaceService = Depends(get_camera_parking_place_service)
+):
+    return await service.get_all_camera_parking_places(after_id, limit)
 
 @router.put("/{id}", response_model=CameraParkingPlaceResponse)
 async def update_camera_parking_place(id: int, data: CameraParkingPlaceCreate, service: ICameraParkingPlaceService = Depends(get_camera_parking_place_service)):
@@ -35,6 +39,23 @@ async def delete_camera_parking_place(id: int, service: ICameraParkingPlaceServi
 async def list_places_for_camera(camera_id: int, service: ICameraParkingPlaceService = Depends(get_camera_parking_place_service)):
     return await service.list_places_for_camera(camera_id)
 
+@router.get("/camera/{camera_id}/locate", response_model=List[PlaceGeometryResponse], summary="Места камеры, содержащие точку снимка")
+async def locate_places(
+    camera_id: int,
+    x: float = Query(..., description="Координата X на снимке камеры"),
+    y: float = Query(..., description="Координата Y на снимке камеры"),
+    service: ICameraParkingPlaceService = Depends(get_camera_parking_place_service)
+):
+    return await service.locate_places(camera_id, x, y)
+
+@router.get("/camera/{camera_id}/overlaps", response_model=List[PlaceOverlap], summary="Пересекающиеся полигоны мест камеры")
+async def find_overlaps(
+    camera_id: int,
+    min_area: float = Query(1.0, ge=0, description="Минимальная площадь пересечения в пикселях"),
+    service: ICameraParkingPlaceService = Depends(get_camera_parking_place_service)
+):
+    return await service.find_overlaps(camera_id, min_area)
+
 @router.get("/place/{place_id}", response_model=List[CameraParkingPlaceResponse])
 async def list_cameras_for_place(place_id: int, service: ICameraParkingPlaceService = Depends(get_camera_parking_place_service)):
     return await service.list_cameras_for_place(place_id)
@@ -1,14 +1,14 @@
-from fastapi import APIRouter, Depends
-from typing import List
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
 
-from web.container import get_container
+from web.container import get_service
 from web.schemas import CarCreate, CarResponse
 from application.services.interfaces.i_car_service import ICarService
 
 router = APIRouter(prefix="/car", tags=["car"])
 
 def get_car_service() -> ICarService:
-    return get_container().resolve(ICarService)
+    return get_service(ICarService)
 
 @router.post("/", response_model=CarResponse)
 async def create_car(data: CarCreate, service: ICarService = Depends(get_car_service)):
@@ -19,8 +19,12 @@ async def get_car(car_id: int, service: ICarService = Depends(get_car_service)):
     return await service.get_car(car_id)
 
 @router.get("/", response_model=List[CarResponse])
-async def get_all_cars(service: ICarService = Depends(get_car_service)):
-    return await service.get_all_cars()
+async def get_all_cars(
+    after_id: Optional[int] = Query(None, description="Вернуть записи с id больше указанного"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Размер страницы"),
+    service: ICarService = Depends(get_car_service)
+):
+    return await service.get_all_cars(after_id, limit)
 
 @router.put("/{car_id}", response_model=CarResponse)
 async def update_car(car_id: int, data: CarCreate, service: ICarService = Depends(get_car_service)):
@@ -1,14 +1,14 @@
-from fastapi import APIRouter, Depends
-from typing import List
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
 
-from web.container import get_container
+from web.container import get_service
 from web.schemas import CarUserCreate, CarUserResponse, CarUserDetailedResponse
 from application.services.interfaces.i_car_user_service import ICarUserService
 
 router = APIRouter(prefix="/car-user", tags=["car-user"])
 
 def get_car_user_service() -> ICarUserService:
-    return get_container().resolve(ICarUserService)
+    return get_service(ICarUserService)
 
 @router.post("/", response_model=CarUserResponse)
 async def create_car_user(data: CarUserCreate, service: ICarUserService = Depends(get_car_user_service)):
@@ -19,8 +19,12 @@ async def get_car_user(id: int, service: ICarUserService = Depends(get_car_user_
     return await service.get_car_user(id)
 
 @router.get("/", response_model=List[CarUserResponse])
-async def get_all_car_users(service: ICarUserService = Depends(get_car_user_service)):
-    return await service.get_all_car_users()
+async def get_all_car_users(
+    after_id: Optional[int] = Query(None, description="Вернуть записи с id больше указанного"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Размер страницы"),
+    service: ICarUserService = Depends(get_car_user_service)
+):
+    return await service.get_all_car_users(after_id, limit)
 
 @router.put("/{id}", response_model=CarUserResponse)
 async def update_car_user(id: int, data: CarUserCreate, service: ICarUserService = Depends(get_car_user_service)):
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Request
+
+from infrastructure.database import Database
+from infrastructure.utils.auth_cache import auth_cache
+from infrastructure.utils.geometry_cache import geometry_cache
+from infrastructure.utils.place_fingerprint import place_fingerprints
+from infrastructure.utils.rabbitmq_utils import rabbitmq_client
+from infrastructure.utils.status_hub import status_hub
+from web.container import get_service
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/", summary="Метрики сервиса")
+async def get_metrics(request: Request):
+    violation_detection_service = getattr(request.app.state, "violation_detection_service", None)
+    return {
+        "auth_cache": auth_cache.stats(),
+        "database_routing": get_service(Database).get_routing_stats(),
+        "geometry_cache": geometry_cache.stats(),
+        "place_fingerprints": place_fingerprints.stats(),
+        "rabbitmq_publish_latency": rabbitmq_client.get_publish_stats(),
+        "status_stream": status_hub.stats(),
+        "violation_detection_last_cycle": (
+            violation_detection_service.last_cycle_summary if violation_detection_service else None
+        ),
+    }
@@ -1,14 +1,14 @@
 from fastapi import APIRouter, Depends
 from typing import List
 
-from web.container import get_container
+from web.container import get_service
 from web.schemas import PlaceStatusCreate, PlaceStatusResponse
 from application.services.interfaces.i_place_status_service import IPlaceStatusService
 
 router = APIRouter(prefix="/place-status", tags=["place-status"])
 
 def get_place_status_service() -> IPlaceStatusService:
-    return get_container().resolve(IPlaceStatusService)
+    return get_service(IPlaceStatusService)
 
 @router.post("/", response_model=PlaceStatusResponse)
 async def create_place_status(data: PlaceStatusCreate, service: IPlaceStatusService = Depends(get_place_status_service)):
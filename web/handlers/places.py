@@ -1,14 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 
-from web.schemas import ParkingPlaceCreate, ParkingPlaceResponse
+from web.schemas import ParkingPlaceCreate, ParkingPlaceResponse, ZoneOccupancyResponse
 from application.services.interfaces.i_parking_place_service import IParkingPlaceService
-from web.container import get_container
+from web.container import get_service
+from web.streaming import ndjson_response
+from web.config import Configs
+from infrastructure.utils.occupancy_cache import occupancy_cache
+from infrastructure.utils.status_hub import status_hub
 
 router = APIRouter(prefix="/places", tags=["places"])
 
 def get_place_service() -> IParkingPlaceService:
-    return get_container().resolve(IParkingPlaceService)
+    return get_service(IParkingPlaceService)
 
 @router.post("/", response_model=ParkingPlaceResponse)
 async def create_place(data: ParkingPlaceCreate, service: IParkingPlaceService = Depends(get_place_service)):
@@ -18,8 +25,16 @@ async def create_place(data: ParkingPlaceCreate, service: IParkingPlaceService =
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/", response_model=List[ParkingPlaceResponse])
-async def get_all_places(service: IParkingPlaceService = Depends(get_place_service)):
-    return await service.get_all_places()
+async def get_all_places(
+    after_id: Optional[int] = Query(None, description="Вернуть записи с id больше указанного"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Размер страницы"),
+    service: IParkingPlaceService = Depends(get_place_service)
+):
+    return await service.get_all_places(after_id, limit)
+
+@router.get("/export", summary="Выгрузка всех парковочных мест (NDJSON)")
+async def export_places(service: IParkingPlaceService = Depends(get_place_service)):
+    return ndjson_response(service.stream_all_places(), "places.ndjson")
 
 @router.get("/{place_id}", response_model=ParkingPlaceResponse)
 async def get_place(place_id: int, service: IParkingPlaceService = Depends(get_place_service)):
@@ -35,6 +50,92 @@ async def get_places_by_zone(zone_id: int, service: IParkingPlaceService = Depen
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+@router.get("/zone/{zone_id}/occupancy", response_model=ZoneOccupancyResponse, summary="Zone Occupancy With Conditional Requests")
+async def get_zone_occupancy(zone_id: int, request: Request, response: Response, service: IParkingPlaceService = Depends(get_place_service)):
+    """
+    Статусы мест зоны из кэша занятости.
+    
+    Ответ содержит заголовок ETag с версией зоны; при совпадении If-None-Match возвращается 304.
+    """
+    occupancy = await service.get_zone_occupancy(zone_id)
+    if occupancy.version:
+        if request.headers.get("if-none-match") == occupancy.version:
+            return Response(status_code=304, headers={"ETag": occupancy.version})
+        response.headers["ETag"] = occupancy.version
+    return occupancy
+
+def _format_sse(event: str, data: dict, version: int) -> str:
+    return f"id: {occupancy_cache.epoch}-{version}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _parse_last_event_id(last_event_id: Optional[str]) -> Optional[int]:
+    """Версия из Last-Event-ID вида "<epoch>-<version>"; события другого запуска не продолжаются"""
+    if not last_event_id:
+        return None
+    epoch, _, version = last_event_id.rpartition("-")
+    if epoch != occupancy_cache.epoch or not version.isdigit():
+        return None
+    return int(version)
+
+
+@router.get("/zone/{zone_id}/stream", summary="Stream Zone Place Status Changes (SSE)")
+async def stream_zone_statuses(zone_id: int, request: Request, last_event_id: Optional[str] = None, service: IParkingPlaceService = Depends(get_place_service)):
+    """
+    Поток изменений статусов мест зоны в формате Server-Sent Events.
+    
+    - первым событием приходит `snapshot` с полным состоянием зоны;
+    - дальше приходят `delta` только с изменившимися местами;
+    - при переподключении с заголовком `Last-Event-ID` (или параметром `last_event_id`)
+      досылаются пропущенные изменения, а если их уже нет в буфере - новый `snapshot`;
+    - если клиент не успевает читать, вместо накопившихся изменений отправляется `snapshot`.
+    """
+    heartbeat = Configs().STATUS_STREAM_HEARTBEAT_SECONDS
+    resume_from = _parse_last_event_id(request.headers.get("last-event-id") or last_event_id)
+
+    async def event_stream():
+        # Подписываемся до снимка, чтобы не потерять изменения между ними
+        subscription = status_hub.subscribe(zone_id)
+        try:
+            backlog = None
+            if resume_from is not None:
+                if resume_from == occupancy_cache.version(zone_id):
+                    backlog = []
+                else:
+                    backlog = status_hub.events_since(zone_id, resume_from)
+
+            if backlog is None:
+                snapshot = await service.get_zone_occupancy(zone_id)
+                sent_version = occupancy_cache.version(zone_id)
+                yield _format_sse("snapshot", snapshot.dict(), sent_version)
+            else:
+                sent_version = resume_from
+                for event in backlog:
+                    sent_version = event.version
+                    yield _format_sse("delta", {"zone_id": zone_id, "version": event.version, "places": event.places}, event.version)
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+
+                if event is None or event.kind == "reset":
+                    snapshot = await service.get_zone_occupancy(zone_id)
+                    sent_version = occupancy_cache.version(zone_id)
+                    yield _format_sse("snapshot", snapshot.dict(), sent_version)
+                elif event.version > sent_version:
+                    sent_version = event.version
+                    yield _format_sse("delta", {"zone_id": zone_id, "version": event.version, "places": event.places}, event.version)
+        finally:
+            status_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/status/{status_id}", response_model=List[ParkingPlaceResponse])
 async def get_places_by_status(status_id: int, service: IParkingPlaceService = Depends(get_place_service)):
     try:
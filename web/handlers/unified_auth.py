@@ -5,10 +5,11 @@ from pydantic import BaseModel
 from functools import partial
 
 from domain.models import User, Admin
-from web.schemas import UserCreate, AdminCreate, Token, User as UserSchema, Admin as AdminSchema, UserLogin, AdminLogin
+from web.schemas import UserCreate, AdminCreate, Token, TokenData, User as UserSchema, Admin as AdminSchema, UserLogin, AdminLogin
 from web.security import verify_token
-from web.container import get_container
+from web.container import get_service
 from application.services.interfaces.i_unified_auth_service import IUnifiedAuthService
+from infrastructure.utils.auth_cache import auth_cache
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 oauth2_scheme_admin = OAuth2PasswordBearer(tokenUrl="auth/token/admin")
@@ -26,25 +27,40 @@ async def get_current_user_or_admin(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    token_data = verify_token(token)
-    if token_data is None:
+    # Повторные запросы с тем же токеном обслуживаются из кэша без декодирования и похода в БД
+    cached = auth_cache.get(token)
+    if cached is not None:
+        token_data, subject = cached
+        _check_role(token_data, required_role)
+        return subject
+
+    payload = verify_token(token, return_payload=True)
+    if payload is None or payload.get("sub") is None:
         raise credentials_exception
-        
-    if required_role and token_data.role != required_role:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Недостаточно прав для доступа"
-        )
+    token_data = TokenData(
+        email=payload.get("sub"),
+        role=payload.get("role"),
+        subject_id=payload.get("subject_id")
+    )
+    _check_role(token_data, required_role)
 
-    container = get_container()
-    auth_service = container.resolve(IUnifiedAuthService)
+    auth_service = get_service(IUnifiedAuthService)
     
     subject = await auth_service.get_by_email(token_data.email, token_data.role)
     if subject is None:
         raise credentials_exception
+    auth_cache.put(token, token_data, subject, token_data.role, token_exp=payload.get("exp"))
     return subject
 
 
+def _check_role(token_data: TokenData, required_role: Optional[str]) -> None:
+    if required_role and token_data.role != required_role:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Недостаточно прав для доступа"
+        )
+
+
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme_user)]) -> User:
     return await get_current_user_or_admin(token, required_role="user")
 
@@ -54,8 +70,7 @@ async def get_current_admin(token: Annotated[str, Depends(oauth2_scheme_admin)])
 
 @router.post("/register/user", response_model=UserSchema, summary="Регистрация пользователя")
 async def register_user(user_data: UserCreate):
-    container = get_container()
-    auth_service = container.resolve(IUnifiedAuthService)
+    auth_service = get_service(IUnifiedAuthService)
     
     try:
         created_user = await auth_service.register(user_data, "user")
@@ -68,8 +83,7 @@ async def register_user(user_data: UserCreate):
 
 @router.post("/register/admin", response_model=AdminSchema, summary="Регистрация администратора")
 async def register_admin(admin_data: AdminCreate):
-    container = get_container()
-    auth_service = container.resolve(IUnifiedAuthService)
+    auth_service = get_service(IUnifiedAuthService)
     
     try:
         created_admin = await auth_service.register(admin_data, "admin")
@@ -83,8 +97,7 @@ async def register_admin(admin_data: AdminCreate):
 @router.post("/token/user", response_model=Token, summary="Получение токена доступа пользователя")
 async def login_user(login_data: UserLogin):
     try:
-        container = get_container()
-        auth_service = container.resolve(IUnifiedAuthService)
+        auth_service = get_service(IUnifiedAuthService)
 
         subject = await auth_service.authenticate(login_data.email, login_data.password, "user")
         if not subject:
@@ -105,8 +118,7 @@ async def login_user(login_data: UserLogin):
 @router.post("/token/admin", response_model=Token, summary="Получение токена доступа администратора")
 async def login_admin(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
     try:
-        container = get_container()
-        auth_service = container.resolve(IUnifiedAuthService)
+        auth_service = get_service(IUnifiedAuthService)
         
         subject = await auth_service.authenticate(form_data.username, form_data.password, "admin")
         if not subject:
@@ -148,10 +160,10 @@ async def logout(
     payload = verify_token(token, return_payload=True)
     role = payload.get("role", "user")
     
-    container = get_container()
-    auth_service = container.resolve(IUnifiedAuthService)
+    auth_service = get_service(IUnifiedAuthService)
     
     await auth_service.logout(current_subject.id, role)
+    auth_cache.invalidate_subject(role, current_subject.id)
     
     response.delete_cookie(key="access_token")
     return None
@@ -171,8 +183,7 @@ async def refresh_token(refresh_data: RefreshTokenRequest):
             detail="Недопустимая роль. Используйте 'user' или 'admin'"
         )
         
-    container = get_container()
-    auth_service = container.resolve(IUnifiedAuthService)
+    auth_service = get_service(IUnifiedAuthService)
     
     new_token = await auth_service.refresh_access_token(
         refresh_data.subject_id, refresh_data.role, refresh_data.refresh_token
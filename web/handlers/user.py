@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Annotated
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import List, Annotated, Optional
 
-from web.container import get_container
+from web.container import get_service
 from web.schemas import UserCreate, UserResponse, User
 from web.handlers.unified_auth import get_current_user
 from application.services.interfaces.i_user_service import IUserService
@@ -10,15 +10,19 @@ from domain.models import User as UserModel
 router = APIRouter(prefix="/user", tags=["user"])
 
 def get_user_service() -> IUserService:
-    return get_container().resolve(IUserService)
+    return get_service(IUserService)
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(user_id: int, service: IUserService = Depends(get_user_service)):
     return await service.get_user(user_id)
 
 @router.get("/", response_model=List[UserResponse])
-async def get_all_users(service: IUserService = Depends(get_user_service)):
-    return await service.get_all_users()
+async def get_all_users(
+    after_id: Optional[int] = Query(None, description="Вернуть записи с id больше указанного"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Размер страницы"),
+    service: IUserService = Depends(get_user_service)
+):
+    return await service.get_all_users(after_id, limit)
 
 @router.put("/{user_id}", response_model=UserResponse)
 async def update_user(user_id: int, data: UserCreate, service: IUserService = Depends(get_user_service)):
@@ -1,27 +1,36 @@
-from fastapi import APIRouter, Depends
-from typing import List
+from fastapi import APIRouter, Depends, Query
+from typing import List, Optional
 from datetime import datetime
 
-from web.container import get_container
+from web.container import get_service
+from web.streaming import ndjson_response
 from web.schemas import ViolationCreate, ViolationResponse
 from application.services.interfaces.i_violation_service import IViolationService
 
 router = APIRouter(prefix="/violation", tags=["violation"])
 
 def get_violation_service() -> IViolationService:
-    return get_container().resolve(IViolationService)
+    return get_service(IViolationService)
 
 @router.post("/", response_model=ViolationResponse)
 async def create_violation(data: ViolationCreate, service: IViolationService = Depends(get_violation_service)):
     return await service.create_violation(data)
 
+@router.get("/export", summary="Выгрузка всех нарушений (NDJSON)")
+async def export_violations(service: IViolationService = Depends(get_violation_service)):
+    return ndjson_response(service.stream_all_violations(), "violations.ndjson")
+
 @router.get("/{violation_id}", response_model=ViolationResponse)
 async def get_violation(violation_id: int, service: IViolationService = Depends(get_violation_service)):
     return await service.get_violation(violation_id)
 
 @router.get("/", response_model=List[ViolationResponse])
-async def get_all_violations(service: IViolationService = Depends(get_violation_service)):
-    return await service.get_all_violations()
+async def get_all_violations(
+    after_id: Optional[int] = Query(None, description="Вернуть записи с id больше указанного"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Размер страницы"),
+    service: IViolationService = Depends(get_violation_service)
+):
+    return await service.get_all_violations(after_id, limit)
 
 @router.put("/{violation_id}", response_model=ViolationResponse)
 async def update_violation(violation_id: int, data: ViolationCreate, service: IViolationService = Depends(get_violation_service)):
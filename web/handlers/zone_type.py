@@ -6,13 +6,13 @@ from web.handlers.unified_auth import get_current_user, get_current_admin
 
 from web.schemas import ZoneTypeCreate, ZoneTypeResponse
 from application.services.interfaces.i_zone_type_service import IZoneTypeService
-from web.container import get_container
+from web.container import get_service
 
 router = APIRouter(prefix="/zone-types", tags=["zone-types"])
 
 
 def get_zone_type_service() -> IZoneTypeService:
-    return get_container().resolve(IZoneTypeService)
+    return get_service(IZoneTypeService)
 
 
 @router.post("/", response_model=ZoneTypeResponse)
@@ -1,20 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
 
 from web.schemas import (
     ParkingZoneCreate, 
     ParkingZoneResponse, 
     ParkingZoneDetailedResponse,
-    PlaceStatusUpdateResponse
+    PlaceStatusUpdateResponse,
+    ZonePointResponse
 )
 from application.services.interfaces.i_parking_zone_service import IParkingZoneService
-from web.container import get_container
+from web.container import get_service
 
 router = APIRouter(prefix="/zones", tags=["zones"])
 
 
 def get_zone_service() -> IParkingZoneService:
-    return get_container().resolve(IParkingZoneService)
+    return get_service(IParkingZoneService)
 
 @router.post("/", response_model=ParkingZoneResponse)
 async def create_zone(data: ParkingZoneCreate, service: IParkingZoneService = Depends(get_zone_service)):
@@ -25,8 +26,22 @@ async def create_zone(data: ParkingZoneCreate, service: IParkingZoneService = De
 
 
 @router.get("/", response_model=List[ParkingZoneResponse])
-async def get_all_zones(service: IParkingZoneService = Depends(get_zone_service)):
-    return await service.get_all_zones()
+async def get_all_zones(
+    after_id: Optional[int] = Query(None, description="Вернуть записи с id больше указанного"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Размер страницы"),
+    service: IParkingZoneService = Depends(get_zone_service)
+):
+    return await service.get_all_zones(after_id, limit)
+
+
+@router.get("/detailed/batch", response_model=List[ParkingZoneDetailedResponse], summary="Get Detailed Information For Several Zones")
+async def get_zones_detailed(zone_ids: List[int] = Query(...), service: IParkingZoneService = Depends(get_zone_service)):
+    """
+    Возвращает детальную информацию сразу по нескольким зонам.
+    
+    - **zone_ids**: ID зон, например `?zone_ids=1&zone_ids=2`
+    """
+    return await service.get_detailed_info_batch(zone_ids)
 
 
 @router.get("/{zone_id}", response_model=ParkingZoneResponse)
@@ -66,6 +81,19 @@ async def get_zone_detailed(zone_id: int, service: IParkingZoneService = Depends
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+@router.get("/{zone_id}/contains", response_model=ZonePointResponse, summary="Point Inside Zone Outline")
+async def zone_contains(
+    zone_id: int,
+    x: float = Query(..., description="Координата X в системе координат контура зоны"),
+    y: float = Query(..., description="Координата Y в системе координат контура зоны"),
+    service: IParkingZoneService = Depends(get_zone_service)
+):
+    try:
+        inside = await service.zone_contains(zone_id, x, y)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return ZonePointResponse(zone_id=zone_id, x=x, y=y, inside=inside)
+
 @router.post("/{zone_id}/process-image", response_model=PlaceStatusUpdateResponse, summary="Process Zone Image and Update Parking Places Status")
 async def process_zone_image(zone_id: int, service: IParkingZoneService = Depends(get_zone_service)):
     """
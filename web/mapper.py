@@ -3,7 +3,6 @@ from domain.models import (
     PlaceStatus, ZoneType, Admin, ParkingZone,
     Camera, CameraParkingPlace, ParkingPlace, Violation
 )
-from web.security import get_password_hash
 from web.schemas import (
     UserCreate, UserResponse,
     CarCreate, CarResponse,
@@ -23,11 +22,12 @@ from web.schemas import (
 
 class UserMapper:
     @staticmethod
-    def to_entity(dto: UserCreate) -> User:
+    def to_entity(dto: UserCreate, hashed_password: str) -> User:
+        # Пароль хешируется заранее асинхронно (web.security.hash_password)
         return User(
             user_name=dto.user_name,
             phone=dto.phone,
-            password=get_password_hash(dto.password),  # Хешируем пароль
+            password=hashed_password,
             email=dto.email
         )
 
@@ -126,11 +126,12 @@ class ZoneTypeMapper:
 
 class AdminMapper:
     @staticmethod
-    def to_entity(dto: AdminCreate) -> Admin:
+    def to_entity(dto: AdminCreate, hashed_password: str) -> Admin:
+        # Пароль хешируется заранее асинхронно (web.security.hash_password)
         return Admin(
             admin_name=dto.admin_name,
             email=dto.email,
-            password=get_password_hash(dto.password)
+            password=hashed_password
         )
 
     @staticmethod
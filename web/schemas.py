@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import List, Dict, Optional, Any
-from datetime import datetime, time
+from datetime import datetime, time, timezone
 import re
 
 class UserBase(BaseModel):
@@ -207,6 +207,19 @@ class CameraResponse(CameraBase):
     class Config:
         orm_mode = True
 
+class CameraSnapshotData(BaseModel):
+    camera_id: int
+    object_name: str
+    image: bytes
+    size: int
+    captured_at: Optional[datetime] = None
+    etag: Optional[str] = None
+
+class ZoneSnapshots(BaseModel):
+    zone_id: int
+    snapshots: List[CameraSnapshotData] = []
+    failed_camera_ids: List[int] = []
+
 type JSONCoords = Any
 class CameraParkingPlaceBase(BaseModel):
     camera_id: int
@@ -222,6 +235,24 @@ class CameraParkingPlaceResponse(CameraParkingPlaceBase):
     class Config:
         orm_mode = True
 
+class PlaceGeometryResponse(BaseModel):
+    camera_parking_place_id: int
+    parking_place_id: int
+    bounds: List[float]
+    crop_box: List[int]
+    area: float
+
+class PlaceOverlap(BaseModel):
+    parking_place_id: int
+    other_parking_place_id: int
+    area: float
+
+class ZonePointResponse(BaseModel):
+    zone_id: int
+    x: float
+    y: float
+    inside: bool
+
 class ParkingPlaceBase(BaseModel):
     place_number: int
     parking_zone_id: int
@@ -238,6 +269,25 @@ class ParkingPlaceResponse(BaseModel):
     class Config:
         orm_mode = True
 
+class PlaceOccupancy(BaseModel):
+    id: int
+    place_number: int
+    place_status_id: Optional[int] = None
+
+class ZoneOccupancyResponse(BaseModel):
+    zone_id: int
+    version: Optional[str] = None
+    total_places: int
+    free_places: int
+    occupied_places: int
+    places: List[PlaceOccupancy]
+
+def _as_naive_utc(value: datetime) -> datetime:
+    """Время без часового пояса считается UTC (так оно хранится в БД)"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
 class BookingBase(BaseModel):
     car_user_id: int
     start_time: datetime
@@ -251,7 +301,13 @@ class BookingCreateWithoutEnd(BaseModel):
     booking_status_id: int = 1  # По умолчанию статус "Активно"
 
 class BookingCreate(BookingBase):
-    pass
+    @field_validator('end_time')
+    def validate_end_time(cls, v, info):
+        # Обратный интервал не доходит до tsrange в БД (DataError -> 500)
+        start_time = info.data.get('start_time')
+        if v is not None and start_time is not None and _as_naive_utc(v) < _as_naive_utc(start_time):
+            raise ValueError('Время окончания бронирования не может быть раньше времени начала')
+        return v
 
 class BookingResponse(BookingBase):
     id: int
@@ -360,6 +416,21 @@ class ClassificationResponse(BaseModel):
             }
         }
 
+# Схемы для пакетной классификации: один запрос на все места и один ответ со списком результатов
+class PlaceClassifyRequest(S3ObjectRequest):
+    place_id: int
+
+class ClassifyBatchRequest(BaseModel):
+    items: List[PlaceClassifyRequest]
+
+class PlaceClassification(BaseModel):
+    place_id: int
+    class_id: int
+    class_name: Optional[str] = None
+
+class ClassifyBatchResponse(BaseModel):
+    results: List[PlaceClassification]
+
 # Схема для ответа от метода /detect сервиса директора
 class DetectionResponse(BaseModel):
     status: str
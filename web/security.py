@@ -1,5 +1,7 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Annotated, Optional, Dict, Any
+from typing import Annotated, Optional, Dict, Any, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -15,12 +17,22 @@ oauth2_scheme_user = OAuth2PasswordBearer(tokenUrl="auth/token/user")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_configs = Configs()
+
+# Хеши с меньшей стоимостью прозрачно пересчитываются при входе (verify_and_update)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=_configs.BCRYPT_ROUNDS)
+
+# bcrypt выполняется в отдельном пуле потоков, чтобы не блокировать event loop
+_password_executor = ThreadPoolExecutor(
+    max_workers=_configs.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_password_pending = 0
 
 
 def get_config() -> Configs:
-    from web.container import get_container
-    return get_container().resolve(Configs)
+    from web.container import get_service
+    return get_service(Configs)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -31,6 +43,32 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def _run_password_task(func, *args):
+    """Выполнить операцию bcrypt в пуле; при переполнении очереди - 503"""
+    global _password_pending
+    if _password_pending >= _configs.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервис авторизации перегружен, повторите попытку позже",
+            headers={"Retry-After": "1"},
+        )
+    _password_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _run_password_task(pwd_context.hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Проверить пароль; вторым элементом возвращается новый хеш, если старый пора пересчитать"""
+    return await _run_password_task(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     configs = get_config()
     
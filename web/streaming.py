@@ -0,0 +1,18 @@
+from typing import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+
+async def _ndjson_lines(items: AsyncIterator[BaseModel]) -> AsyncIterator[str]:
+    async for item in items:
+        yield item.model_dump_json() + "\n"
+
+
+def ndjson_response(items: AsyncIterator[BaseModel], filename: str) -> StreamingResponse:
+    """Потоковая выгрузка в формате NDJSON: одна JSON-запись на строку"""
+    return StreamingResponse(
+        _ndjson_lines(items),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )